@@ -5,14 +5,28 @@ from contextlib import asynccontextmanager
 import threading
 import logging
 
-from app.utils.config import ENABLE_MONITOR, ENABLE_DB
-from app.utils.logging import setup_logging
+from app.utils.config import (
+    ENABLE_MONITOR,
+    ENABLE_DB,
+    PROFILE_ENABLED,
+    PARTITION_MAINTENANCE_INTERVAL,
+    YOLO_SERVICE_URL,
+    YOLO_BATCH_URL,
+    ML_HEALTH_URL,
+)
+from app.utils.logging import RequestIdMiddleware, setup_logging
+from app.utils.metrics import MetricsMiddleware
+from app.utils.profiling import ProfilingMiddleware, profile_store
 from app.routes import (
     health_router,
     detection_router,
     history_router,
     email_recipients_router,
     db_test_router,
+    events_router,
+    monitor_router,
+    video_jobs_router,
+    profiles_router,
 )
 
 setup_logging()
@@ -23,6 +37,7 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     stop_event = None
     monitor_thread = None
+    partition_stop = None
 
     if ENABLE_DB:
         try:
@@ -46,8 +61,49 @@ async def lifespan(app: FastAPI):
     elif ENABLE_MONITOR and not ENABLE_DB:
         logger.warning("Monitor enabled but DB not configured")
 
+    # Both are derived from a YOLO_SERVICE_URL ending in /detect/frame;
+    # without them batch detection and the ML readiness probe are off.
+    missing = [name for name, url in (("YOLO_BATCH_URL", YOLO_BATCH_URL), ("ML_HEALTH_URL", ML_HEALTH_URL)) if not url]
+    if YOLO_SERVICE_URL and missing:
+        logger.warning(
+            f"[CONFIG] {', '.join(missing)} not set and cannot be derived from "
+            f"YOLO_SERVICE_URL={YOLO_SERVICE_URL} (expected .../detect/frame)"
+        )
+
+    if ENABLE_DB and PARTITION_MAINTENANCE_INTERVAL > 0:
+        from app.store.partitions import partition_maintenance_loop
+
+        partition_stop = threading.Event()
+        threading.Thread(
+            target=partition_maintenance_loop,
+            args=(partition_stop,),
+            daemon=True
+        ).start()
+
+    from app.services.emailer import delivery_worker, SMTP_ENABLED
+    if SMTP_ENABLED:
+        await delivery_worker.start()
+
+    from app.services.health import health_monitor
+    await health_monitor.start()
+
     yield
 
+    await health_monitor.stop()
+
+    from app.routes.detection import notifier
+    notifier.shutdown()
+    await delivery_worker.stop()
+
+    from app.services.video_jobs import video_jobs
+    video_jobs.shutdown()
+
+    from app.services.ml_client import close_ml_client
+    await close_ml_client()
+
+    if partition_stop:
+        partition_stop.set()
+
     if stop_event:
         logger.info("Stopping background monitor thread")
         stop_event.set()
@@ -62,6 +118,12 @@ app = FastAPI(
     redirect_slashes=False
 )
 
+if PROFILE_ENABLED:
+    app.add_middleware(ProfilingMiddleware, store=profile_store)
+
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestIdMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -98,6 +160,30 @@ app.include_router(
     tags=["Database"]
 )
 
+app.include_router(
+    events_router,
+    prefix="/events",
+    tags=["Events"]
+)
+
+app.include_router(
+    monitor_router,
+    prefix="/monitor",
+    tags=["Monitor"]
+)
+
+app.include_router(
+    video_jobs_router,
+    prefix="/jobs",
+    tags=["Video Jobs"]
+)
+
+app.include_router(
+    profiles_router,
+    prefix="/debug/profiles",
+    tags=["Profiling"]
+)
+
 
 @app.get("/")
 def root():
@@ -2,4 +2,8 @@ from .health import router as health_router
 from .detection import router as detection_router
 from .history import router as history_router
 from .email_recipients import router as email_recipients_router
-from .db_test import router as db_test_router
\ No newline at end of file
+from .db_test import router as db_test_router
+from .events import router as events_router
+from .monitor import router as monitor_router
+from .video_jobs import router as video_jobs_router
+from .profiles import router as profiles_router
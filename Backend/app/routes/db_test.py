@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.store.database import test_connection
+from app.services.health import health_monitor
 from app.utils.config import ENABLE_DB
 
 router = APIRouter()
@@ -13,9 +13,13 @@ def db_test():
             "message": "Database not configured"
         }
 
-    ok = test_connection()
+    # Last background probe result; see app/services/health.py.
+    db = health_monitor.dependency("db") or {"status": "unknown"}
 
     return {
-        "status": "connected" if ok else "failed",
-        "db_enabled": ENABLE_DB
+        "status": "connected" if db["status"] == "up" else "failed",
+        "db_enabled": ENABLE_DB,
+        "latency_ms": db.get("latency_ms"),
+        "last_success": db.get("last_success"),
+        "error": db.get("error"),
     }
@@ -1,16 +1,54 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi import (
+    APIRouter,
+    UploadFile,
+    File,
+    Form,
+    HTTPException,
+    BackgroundTasks,
+    WebSocket,
+    WebSocketDisconnect,
+)
 import httpx
+import asyncio
+import contextvars
+import io
 import logging
-from typing import Optional
+import struct
+import tarfile
+import time
+import uuid
+import zipfile
+from datetime import datetime, timezone
+from functools import partial
+from typing import List, Optional, Tuple
 
-from app.utils.config import YOLO_SERVICE_URL, ENABLE_DB
-from app.store.db import get_db_connection, is_db_available
+from app.utils.config import (
+    ENABLE_DB,
+    STREAM_MAX_INFLIGHT,
+    STREAM_PERSIST_INTERVAL,
+    BATCH_MAX_IMAGES,
+    BATCH_MAX_BYTES,
+)
+from app.store.db import get_db_connection
+from app.services.notifier import NotificationScheduler, Digest
+from app.services.attachments import prepare_attachment, attachment_stats
+from app.services.events import broker
+from app.services.response_cache import history_cache
+from app.services.ml_client import detect_image, detect_batch, summarize
+from app.utils.logging import request_id_var
+from app.utils.metrics import timed_task
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Streaming frames are prefixed with a big-endian uint32 sequence number.
+STREAM_HEADER = struct.Struct(">I")
+
+_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+_ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz")
+
 try:
-    from app.services.emailer import send_email, SMTP_ENABLED
+    from app.services.emailer import queue_email, SMTP_ENABLED
     EMAIL_AVAILABLE = SMTP_ENABLED
     logger.info(f"Email service loaded. SMTP_ENABLED={SMTP_ENABLED}")
 except Exception as e:
@@ -18,23 +56,28 @@ except Exception as e:
     logger.warning(f"Email service not available: {e}")
 
 
+@timed_task("save_detection")
 def bg_save_detection(
     source: str,
     is_dirty: bool,
     confidence: float,
     image_data: Optional[bytes] = None,
     notes: Optional[str] = None,
-):
+) -> Optional[dict]:
+    """Insert one event; returns its history row fields, or None if not saved."""
     if not ENABLE_DB:
-        return
+        return None
 
     try:
         from sqlalchemy import text
+        # Set here rather than by the column default, so the live event
+        # carries the same created_at GET /history will return.
+        created_at = datetime.now().replace(microsecond=0)
         with get_db_connection() as conn:
             result = conn.execute(
                 text("""
-                    INSERT INTO floor_events (source, is_dirty, confidence, image_data, notes)
-                    VALUES (:source, :is_dirty, :confidence, :image_data, :notes)
+                    INSERT INTO floor_events (source, is_dirty, confidence, image_data, notes, created_at)
+                    VALUES (:source, :is_dirty, :confidence, :image_data, :notes, :created_at)
                 """),
                 {
                     "source": source,
@@ -42,13 +85,76 @@ def bg_save_detection(
                     "confidence": confidence,
                     "image_data": image_data,
                     "notes": notes,
+                    "created_at": created_at,
                 }
             )
             conn.commit()
-            logger.info(f"[BG] Saved detection: is_dirty={is_dirty}, conf={confidence:.2f}")
+            history_cache.invalidate()
+            logger.info("[BG] Saved detection: is_dirty=%s, conf=%.2f", is_dirty, confidence)
+            return {"id": result.lastrowid, "notes": notes, "created_at": created_at}
 
     except Exception as e:
         logger.error(f"[BG] Failed to save detection: {e}")
+        return None
+
+
+def save_and_publish(source: str, result: dict, **row):
+    """Publish the detection once it is saved, with its history row fields."""
+    publish_result(source, result, bg_save_detection(source=source, **row))
+
+
+@timed_task("save_detections_bulk")
+def save_detections_bulk(rows: List[dict], publish: bool = False) -> int:
+    """Insert ``rows`` in one transaction; returns how many were saved.
+
+    With ``publish``, each row's detection event (its ``result``) is
+    published once saved, with the row's history fields.
+    """
+    saved = _insert_events(rows, with_ids=publish) if ENABLE_DB and rows else None
+
+    if publish:
+        for i, r in enumerate(rows):
+            publish_result(r["source"], r["result"], saved[i] if saved else None)
+    return len(saved) if saved else 0
+
+
+def _insert_events(rows: List[dict], with_ids: bool) -> Optional[List[dict]]:
+    try:
+        from sqlalchemy import text
+        insert = text("""
+            INSERT INTO floor_events (source, is_dirty, confidence, image_data, notes, created_at)
+            VALUES (:source, :is_dirty, :confidence, :image_data, :notes, :created_at)
+        """)
+        created_at = datetime.now().replace(microsecond=0)
+        params = [
+            {
+                "source": r["source"],
+                "is_dirty": int(r["is_dirty"]),
+                "confidence": r["confidence"],
+                "image_data": r.get("image_data"),
+                "notes": r.get("notes"),
+                "created_at": created_at,
+            }
+            for r in rows
+        ]
+        with get_db_connection() as conn:
+            if with_ids:
+                # Row ids are only reliable one statement at a time.
+                ids = [conn.execute(insert, p).lastrowid for p in params]
+            else:
+                conn.execute(insert, params)
+                ids = [None] * len(params)
+            conn.commit()
+            history_cache.invalidate()
+            logger.info(f"[BG] Saved {len(rows)} detections in bulk")
+        return [
+            {"id": row_id, "notes": p["notes"], "created_at": created_at}
+            for row_id, p in zip(ids, params)
+        ]
+
+    except Exception as e:
+        logger.error(f"[BG] Failed to bulk save detections: {e}")
+        return None
 
 
 def get_active_recipients() -> list:
@@ -69,96 +175,169 @@ def get_active_recipients() -> list:
         return []
 
 
-def bg_send_notification(confidence: float, image_data: bytes = None):
-    logger.info(f"[BG-EMAIL] Starting notification, EMAIL_AVAILABLE={EMAIL_AVAILABLE}")
-
+@timed_task("send_notification")
+def _deliver_digest(digest: Digest) -> bool:
     if not EMAIL_AVAILABLE:
         logger.warning("[BG-EMAIL] Email service not available")
-        return
+        return False
 
     recipients = get_active_recipients()
-    logger.info(f"[BG-EMAIL] Found {len(recipients)} active recipients: {recipients}")
+    logger.info(f"[BG-EMAIL] Found {len(recipients)} active recipients")
 
     if not recipients:
         logger.info("[BG-EMAIL] No active email recipients")
+        return False
+
+    summary = ""
+    if digest.count > 1:
+        window = max(1, int(digest.last_at - digest.first_at))
+        summary = f"Jumlah deteksi: {digest.count} dalam {window} detik terakhir\n\n"
+
+    success = queue_email(
+        subject="🚨 [FloorEye] Lantai Kotor Terdeteksi!",
+        body=(
+            f"FloorEye mendeteksi lantai kotor.\n\n"
+            f"Sumber: {digest.source}\n"
+            f"Confidence: {digest.best_confidence * 100:.1f}%\n\n"
+            f"{summary}"
+            f"Lihat gambar terlampir untuk detail.\n\n"
+            f"Segera lakukan pembersihan.\n\n"
+            f"- FloorEye System"
+        ),
+        to_list=recipients,
+        image_data=prepare_attachment(digest.best_image, digest.best_detections),
+        image_filename="lantai_kotor.jpg",
+    )
+    logger.info(f"[BG-EMAIL] Notification queued: success={success}, folded={digest.count}")
+    return success
+
+
+notifier = NotificationScheduler(deliver=_deliver_digest)
+
+
+def bg_send_notification(
+    confidence: float,
+    image_data: bytes = None,
+    source: str = "live-camera",
+    detections: Optional[list] = None,
+):
+    if not EMAIL_AVAILABLE:
+        logger.warning("[BG-EMAIL] Email service not available")
         return
 
-    try:
-        success = send_email(
-            subject="🚨 [FloorEye] Lantai Kotor Terdeteksi!",
-            body=(
-                f"FloorEye mendeteksi lantai kotor.\n\n"
-                f"Confidence: {confidence * 100:.1f}%\n\n"
-                f"Lihat gambar terlampir untuk detail.\n\n"
-                f"Segera lakukan pembersihan.\n\n"
-                f"- FloorEye System"
-            ),
-            to_list=recipients,
-            image_data=image_data,
-            image_filename="lantai_kotor.jpg",
-        )
-        logger.info(f"[BG-EMAIL] Notification sent: success={success}")
+    notifier.submit(source, confidence, image_data, detections)
 
-    except Exception as e:
-        logger.exception(f"[BG-EMAIL] Failed to send notification: {e}")
 
+@router.get("/notifications")
+def notification_stats():
+    return {
+        **notifier.stats(),
+        "attachments": attachment_stats(),
+    }
 
 
-@router.post("/frame")
-async def detect_frame(file: UploadFile = File(...), background_tasks: BackgroundTasks = None):
+def publish_result(source: str, result: dict, row: Optional[dict] = None):
+    """Push a detection event; ``row`` is the saved floor_events row, if any.
+
+    Saved events carry ``id``, ``notes`` and the row's ``created_at``, so
+    the History page can add them without re-fetching GET /history.
+    """
+    event = {
+        "type": "detection",
+        "source": source,
+        "is_dirty": result["is_dirty"],
+        "confidence": round(result["confidence"], 3),
+        "count": result["count"],
+        "new_tracks": result["new_tracks"],
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    if row is not None:
+        event.update(id=row["id"], notes=row["notes"], created_at=row["created_at"].isoformat())
+    broker.publish(event)
+
+
+def dispatch_result(
+    source: str,
+    result: dict,
+    image_bytes: bytes,
+    background_tasks: Optional[BackgroundTasks] = None,
+    persist: bool = True,
+):
+    # With tracking, a dirty frame that only shows spills already reported
+    # is neither saved nor notified again.
+    repeat = result["tracked"] and result["is_dirty"] and not result["new_tracks"]
+
+    tasks = []
+    if persist and not repeat:
+        notes = f"Detections: {result['count']}"
+        if result["tracked"]:
+            notes += f", new tracks: {result['new_tracks']}"
+        tasks.append(partial(
+            save_and_publish,
+            source,
+            result,
+            is_dirty=result["is_dirty"],
+            confidence=result["confidence"],
+            image_data=image_bytes,
+            notes=notes,
+        ))
+    else:
+        publish_result(source, result)
+
+    if result["is_dirty"] and not repeat:
+        tasks.append(partial(
+            bg_send_notification,
+            result["confidence"],
+            image_bytes,
+            source=source,
+            detections=result["detections"],
+        ))
+
+    if background_tasks is not None:
+        for task in tasks:
+            background_tasks.add_task(task)
+        return
+
     try:
-        image_bytes = await file.read()
-        logger.info(f"[DETECT] Received frame: {len(image_bytes)} bytes")
-
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            res = await client.post(
-                YOLO_SERVICE_URL,
-                files={
-                    "file": (
-                        file.filename or "frame.jpg",
-                        image_bytes,
-                        file.content_type or "image/jpeg",
-                    )
-                },
-            )
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
 
-        if res.status_code != 200:
-            logger.error(f"[DETECT] HF returned {res.status_code}: {res.text}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"HF ERROR {res.status_code}: {res.text}",
-            )
+    for task in tasks:
+        if loop is not None:
+            loop.run_in_executor(None, contextvars.copy_context().run, task)
+        else:
+            task()
 
-        data = res.json()
-        detections = data.get("detections", [])
-        count = data.get("count", 0)
 
-        max_conf = max(
-            (d.get("confidence", 0.0) for d in detections),
-            default=0.0,
-        )
+@router.post("/frame")
+async def detect_frame(
+    file: UploadFile = File(...),
+    session: Optional[str] = Form(None),
+    background_tasks: BackgroundTasks = None,
+):
+    try:
+        image_bytes = await file.read()
+        logger.debug("[DETECT] Received frame: %d bytes", len(image_bytes))
 
-        is_dirty = count > 0
-        logger.info(f"[DETECT] Result: is_dirty={is_dirty}, count={count}, conf={max_conf:.2f}")
+        data = await detect_image(
+            image_bytes,
+            file.filename or "frame.jpg",
+            file.content_type or "image/jpeg",
+            session=f"live-{session[:100]}" if session else None,
+        )
+        result = summarize(data)
+        logger.info(
+            "[DETECT] Result: is_dirty=%s, count=%d, conf=%.2f",
+            result["is_dirty"], result["count"], result["confidence"],
+        )
 
         if background_tasks:
-            background_tasks.add_task(
-                bg_save_detection,
-                source="live-camera",
-                is_dirty=is_dirty,
-                confidence=max_conf,
-                image_data=image_bytes,
-                notes=f"Detections: {count}",
-            )
-
-            if is_dirty:
-                background_tasks.add_task(bg_send_notification, max_conf, image_bytes)
+            dispatch_result("live-camera", result, image_bytes, background_tasks)
 
         return {
-            "is_dirty": is_dirty,
-            "confidence": round(max_conf, 3),
-            "count": count,
-            "detections": detections,
+            **result,
+            "confidence": round(result["confidence"], 3),
         }
 
     except HTTPException:
@@ -169,3 +348,270 @@ async def detect_frame(file: UploadFile = File(...), background_tasks: Backgroun
     except Exception as e:
         logger.exception("Detection failed")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def _read_archive(data: bytes, max_bytes: int, max_images: int) -> Optional[List[Tuple[str, bytes]]]:
+    """Images inside a zip/tar upload; None if it is neither.
+
+    Decompressed bytes are counted while extracting and 413 is raised as
+    soon as they pass ``max_bytes``, so a zip bomb never expands in memory.
+    """
+    images: List[Tuple[str, bytes]] = []
+    budget = max_bytes
+
+    def take(name: str, f):
+        nonlocal budget
+        content = f.read(budget + 1)
+        budget -= len(content)
+        if budget < 0:
+            raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_BYTES} bytes")
+        images.append((name, content))
+        if len(images) > max_images:
+            raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_IMAGES} images per batch")
+
+    buf = io.BytesIO(data)
+
+    if zipfile.is_zipfile(buf):
+        with zipfile.ZipFile(buf) as zf:
+            for info in zf.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(_IMAGE_EXTENSIONS):
+                    with zf.open(info) as f:
+                        take(info.filename, f)
+            return images
+
+    buf.seek(0)
+    try:
+        with tarfile.open(fileobj=buf, mode="r:*") as tf:
+            for member in tf:
+                if member.isfile() and member.name.lower().endswith(_IMAGE_EXTENSIONS):
+                    take(member.name, tf.extractfile(member))
+            return images
+    except tarfile.TarError:
+        return None
+
+
+@router.post("/batch")
+async def detect_batch_frames(
+    files: List[UploadFile] = File(...),
+    source: str = Form("batch-upload"),
+    background_tasks: BackgroundTasks = None,
+):
+    images: List[Tuple[str, bytes]] = []
+    total_bytes = 0
+
+    for file in files:
+        data = await file.read()
+        name = file.filename or f"image_{len(images)}.jpg"
+
+        # total_bytes counts image bytes: an archive counts by what it
+        # extracts to, not by its own (compressed) length.
+        if name.lower().endswith(_ARCHIVE_EXTENSIONS):
+            extracted = _read_archive(
+                data,
+                max_bytes=BATCH_MAX_BYTES - total_bytes,
+                max_images=BATCH_MAX_IMAGES - len(images),
+            )
+            if extracted is None:
+                raise HTTPException(status_code=400, detail=f"Unreadable archive: {name}")
+            images.extend(extracted)
+            total_bytes += sum(len(b) for _, b in extracted)
+        else:
+            images.append((name, data))
+            total_bytes += len(data)
+
+        if len(images) > BATCH_MAX_IMAGES:
+            raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_IMAGES} images per batch")
+        if total_bytes > BATCH_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_BYTES} bytes")
+
+    if not images:
+        raise HTTPException(status_code=400, detail="No images in request")
+
+    logger.info(f"[DETECT] Received batch: {len(images)} images, {total_bytes} bytes")
+
+    try:
+        outputs = await detect_batch([data for _, data in images])
+    except HTTPException:
+        raise
+    except httpx.TimeoutException:
+        logger.error("[DETECT] Timeout connecting to ML service")
+        raise HTTPException(status_code=504, detail="ML service timeout")
+    except Exception as e:
+        logger.exception("Batch detection failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    items = []
+    rows = []
+    worst = None
+
+    for (name, data), output in zip(images, outputs):
+        if output.get("error"):
+            items.append({"filename": name, "error": output["error"]})
+            continue
+
+        result = summarize(output)
+        items.append({
+            "filename": name,
+            **result,
+            "confidence": round(result["confidence"], 3),
+        })
+        rows.append({
+            "source": source,
+            "is_dirty": result["is_dirty"],
+            "confidence": result["confidence"],
+            "image_data": data,
+            "notes": f"Batch {name}, detections: {result['count']}",
+            "result": result,
+        })
+        if result["is_dirty"] and (worst is None or result["confidence"] > worst[0]["confidence"]):
+            worst = (result, data)
+
+    dirty = sum(1 for item in items if item.get("is_dirty"))
+    logger.info(f"[DETECT] Batch result: {dirty}/{len(items)} dirty")
+
+    if background_tasks:
+        background_tasks.add_task(save_detections_bulk, rows, publish=True)
+        if worst is not None:
+            result, data = worst
+            background_tasks.add_task(
+                bg_send_notification,
+                result["confidence"],
+                data,
+                source=source,
+                detections=result["detections"],
+            )
+
+    return {
+        "count": len(items),
+        "dirty": dirty,
+        "results": items,
+    }
+
+
+class _StreamSession:
+    """Per-connection state for the streaming detection socket.
+
+    Incoming frames land in a single-slot buffer: if a new frame arrives
+    before a worker picks up the previous one, the older frame is dropped.
+    Up to ``STREAM_MAX_INFLIGHT`` frames are forwarded to the ML service
+    concurrently, and results older than one already sent are discarded.
+    """
+
+    def __init__(self, websocket: WebSocket, source: str):
+        self.websocket = websocket
+        self.source = source
+        self.request_id = request_id_var.get()
+        # One tracking session per connection; the ML service expires it.
+        self.session = f"stream-{uuid.uuid4().hex}"
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.last_seq = -1
+        self.last_sent_seq = -1
+        self.last_persisted = 0.0
+        self._pending = None
+        self._closed = False
+        self._cond = asyncio.Condition()
+        self._send_lock = asyncio.Lock()
+
+    async def run(self):
+        workers = [
+            asyncio.create_task(self._worker())
+            for _ in range(max(1, STREAM_MAX_INFLIGHT))
+        ]
+        try:
+            await self._receive()
+        finally:
+            async with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            logger.info(
+                f"[STREAM] Closed source={self.source} received={self.received} "
+                f"processed={self.processed} dropped={self.dropped}"
+            )
+
+    async def _receive(self):
+        while True:
+            message = await self.websocket.receive_bytes()
+            if len(message) <= STREAM_HEADER.size:
+                await self._send({"error": "Frame must be a 4-byte sequence number followed by JPEG bytes"})
+                continue
+
+            (seq,) = STREAM_HEADER.unpack_from(message)
+            if seq <= self.last_seq:
+                continue
+            self.last_seq = seq
+            self.received += 1
+
+            async with self._cond:
+                if self._pending is not None:
+                    self.dropped += 1
+                self._pending = (seq, message[STREAM_HEADER.size:], time.perf_counter())
+                self._cond.notify()
+
+    async def _worker(self):
+        while True:
+            async with self._cond:
+                await self._cond.wait_for(lambda: self._pending is not None or self._closed)
+                if self._closed:
+                    return
+                seq, image_bytes, received_at = self._pending
+                self._pending = None
+
+            await self._process(seq, image_bytes, received_at)
+
+    async def _process(self, seq: int, image_bytes: bytes, received_at: float):
+        request_id_var.set(f"{self.request_id}-{seq}")
+        try:
+            result = summarize(await detect_image(image_bytes, session=self.session))
+        except httpx.TimeoutException:
+            await self._send({"seq": seq, "error": "ML service timeout"})
+            return
+        except HTTPException as e:
+            await self._send({"seq": seq, "error": e.detail})
+            return
+        except Exception as e:
+            logger.exception("[STREAM] Detection failed")
+            await self._send({"seq": seq, "error": str(e)})
+            return
+
+        self.processed += 1
+        if seq < self.last_sent_seq:
+            self.dropped += 1
+            return
+
+        now = time.monotonic()
+        persist = result["is_dirty"] or now - self.last_persisted >= STREAM_PERSIST_INTERVAL
+        if persist:
+            self.last_persisted = now
+        dispatch_result(self.source, result, image_bytes, persist=persist)
+
+        await self._send({
+            "seq": seq,
+            **result,
+            "confidence": round(result["confidence"], 3),
+            "latency_ms": round((time.perf_counter() - received_at) * 1000, 1),
+            "dropped": self.dropped,
+        })
+
+    async def _send(self, payload: dict):
+        async with self._send_lock:
+            if "seq" in payload and "error" not in payload:
+                if payload["seq"] < self.last_sent_seq:
+                    return
+                self.last_sent_seq = payload["seq"]
+            await self.websocket.send_json(payload)
+
+
+@router.websocket("/stream")
+async def detect_stream(websocket: WebSocket, source: str = "live-camera"):
+    await websocket.accept()
+    logger.info(f"[STREAM] Connected source={source}")
+
+    try:
+        await _StreamSession(websocket, source).run()
+    except WebSocketDisconnect:
+        pass
@@ -1,16 +1,17 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel, EmailStr
 import logging
 
 from sqlalchemy import text
 from app.store.db import get_db_connection
+from app.services.response_cache import recipients_cache
 from app.utils.config import ENABLE_DB
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 try:
-    from app.services.emailer import send_email, SMTP_ENABLED
+    from app.services.emailer import send_email, delivery_worker, SMTP_ENABLED
     EMAIL_AVAILABLE = SMTP_ENABLED
 except Exception as e:
     logger.warning(f"Email service unavailable: {e}")
@@ -34,26 +35,30 @@ def _require_db():
         )
 
 
+def _load_recipients() -> list:
+    with get_db_connection() as conn:
+        result = conn.execute(
+            text("SELECT id, email, active, created_at FROM email_recipients ORDER BY id DESC")
+        )
+        rows = result.fetchall()
+
+        return [
+            {
+                "id": r[0],
+                "email": r[1],
+                "active": bool(r[2]),
+                "created_at": r[3].isoformat() if r[3] else None
+            }
+            for r in rows
+        ]
+
+
 @router.get("")
-def list_recipients():
+def list_recipients(request: Request):
     _require_db()
 
     try:
-        with get_db_connection() as conn:
-            result = conn.execute(
-                text("SELECT id, email, active, created_at FROM email_recipients ORDER BY id DESC")
-            )
-            rows = result.fetchall()
-
-            return [
-                {
-                    "id": r[0],
-                    "email": r[1],
-                    "active": bool(r[2]),
-                    "created_at": r[3].isoformat() if r[3] else None
-                }
-                for r in rows
-            ]
+        return recipients_cache.response(request, "all", _load_recipients)
 
     except Exception as e:
         logger.exception("list_recipients failed")
@@ -85,6 +90,7 @@ def create_recipient(payload: EmailRecipient):
                 {"email": payload.email, "active": int(payload.active)}
             )
             conn.commit()
+            recipients_cache.invalidate()
 
             return {"message": "Recipient added", "email": payload.email}
 
@@ -113,6 +119,7 @@ def patch_recipient(rid: int, payload: EmailRecipientPatch):
                 )
 
             conn.commit()
+            recipients_cache.invalidate()
 
             row = conn.execute(
                 text("SELECT id, email, active, created_at FROM email_recipients WHERE id = :rid"),
@@ -150,6 +157,7 @@ def delete_recipient(rid: int):
                 {"rid": rid}
             )
             conn.commit()
+            recipients_cache.invalidate()
 
             if result.rowcount == 0:
                 raise HTTPException(
@@ -224,5 +232,6 @@ def email_status():
     return {
         "email_available": EMAIL_AVAILABLE,
         "smtp_configured": EMAIL_AVAILABLE,
+        "delivery": delivery_worker.snapshot() if EMAIL_AVAILABLE else None,
         "message": "Email service is ready" if EMAIL_AVAILABLE else "SMTP not configured - check SMTP_USER and SMTP_PASSWORD"
     }
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+import json
+import logging
+
+from app.services.events import broker
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+HEARTBEAT_SECONDS = 15
+
+
+@router.get("")
+async def stream_events(request: Request, source: Optional[str] = None):
+    sub = broker.subscribe(source)
+    logger.info(f"[EVENTS] Subscriber connected (source={source or '*'})")
+
+    async def event_stream():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event.get('type', 'message')}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            broker.unsubscribe(sub)
+            logger.info(f"[EVENTS] Subscriber disconnected (source={source or '*'})")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@router.get("/stats")
+def events_stats():
+    return broker.stats()
@@ -1,8 +1,39 @@
 from fastapi import APIRouter
+from fastapi.responses import Response
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+
+from app.services.frame_normalizer import frame_stats
+from app.services.health import health_monitor
+from app.services.response_cache import cache_stats
+from app.utils.logging import logging_stats
 
 router = APIRouter()
 
 
 @router.get("/health")
 def health():
-    return {"status": "healthy", "service": "backend"}
+    return {
+        "status": "healthy",
+        "service": "backend",
+        "logging": logging_stats(),
+        "frames": frame_stats(),
+        "dependencies": health_monitor.snapshot(),
+        "response_cache": cache_stats(),
+    }
+
+
+@router.get("/ready")
+def ready(response: Response):
+    # Served from the background monitor's cache; never probes directly.
+    snapshot = health_monitor.snapshot()
+    if not snapshot["ready"]:
+        response.status_code = 503
+    return snapshot
+
+
+@router.get("/metrics")
+def metrics():
+    return Response(
+        content=generate_latest(),
+        media_type=CONTENT_TYPE_LATEST,
+    )
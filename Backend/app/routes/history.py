@@ -1,12 +1,14 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from typing import List, Optional
 from pydantic import BaseModel
 from fastapi.responses import Response
+from datetime import date, datetime, timedelta
 import logging
 
 from sqlalchemy import text
 from app.store.db import get_db_connection
-from app.utils.config import ENABLE_DB
+from app.services.response_cache import history_cache
+from app.utils.config import ENABLE_DB, HISTORY_WINDOW_DAYS
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -29,45 +31,76 @@ def _require_db():
         )
 
 
+def _load_history(limit: int, offset: int, since: Optional[date], until: Optional[date]) -> List[HistoryItem]:
+    # Plain range conditions on created_at, so MySQL prunes floor_events
+    # partitions outside [since, until).
+    conditions = []
+    params = {"limit": limit, "offset": offset}
+    if since is not None:
+        conditions.append("created_at >= :since")
+        params["since"] = datetime.combine(since, datetime.min.time())
+    if until is not None:
+        conditions.append("created_at < :until")
+        params["until"] = datetime.combine(until, datetime.min.time())
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    with get_db_connection() as conn:
+        result = conn.execute(
+            text(f"""
+                SELECT
+                    id,
+                    source,
+                    is_dirty,
+                    confidence,
+                    notes,
+                    created_at
+                FROM floor_events
+                {where}
+                ORDER BY created_at DESC
+                LIMIT :limit OFFSET :offset
+            """),
+            params
+        )
+
+        rows = result.fetchall()
+
+        return [
+            HistoryItem(
+                id=r[0],
+                source=r[1],
+                is_dirty=bool(r[2]),
+                confidence=r[3],
+                notes=r[4],
+                created_at=(
+                    r[5].isoformat()
+                    if r[5]
+                    else None
+                ),
+            )
+            for r in rows
+        ]
+
+
 @router.get("", response_model=List[HistoryItem])
-def get_history(limit: int = 50, offset: int = 0):
+def get_history(
+    request: Request,
+    limit: int = 50,
+    offset: int = 0,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+):
+    """Newest events first; ``since`` defaults to HISTORY_WINDOW_DAYS ago when set, ``until`` is exclusive."""
     _require_db()
 
-    try:
-        with get_db_connection() as conn:
-            result = conn.execute(
-                text("""
-                    SELECT
-                        id,
-                        source,
-                        is_dirty,
-                        confidence,
-                        notes,
-                        created_at
-                    FROM floor_events
-                    ORDER BY created_at DESC
-                    LIMIT :limit OFFSET :offset
-                """),
-                {"limit": limit, "offset": offset}
-            )
+    if since is None and HISTORY_WINDOW_DAYS > 0:
+        since = date.today() - timedelta(days=HISTORY_WINDOW_DAYS)
 
-            rows = result.fetchall()
-
-            return [
-                HistoryItem(
-                    id=r[0],
-                    source=r[1],
-                    is_dirty=bool(r[2]),
-                    confidence=r[3],
-                    notes=r[4],
-                    created_at=(
-                        r[5].isoformat()
-                        if r[5]
-                        else None
-                    ),
-                )
-                for r in rows
-            ]
+    try:
+        return history_cache.response(
+            request,
+            ("history", limit, offset, since, until),
+            lambda: _load_history(limit, offset, since, until),
+        )
 
     except HTTPException:
         raise
@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+
+from app.utils.config import ENABLE_MONITOR
+
+router = APIRouter()
+
+
+@router.get("/status")
+def monitor_status():
+    from app.services import monitor
+
+    engine = monitor.engine
+    if engine is None:
+        return {"enabled": ENABLE_MONITOR, "running": False}
+
+    return {
+        "enabled": ENABLE_MONITOR,
+        "running": True,
+        **engine.snapshot(),
+    }
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import FileResponse
+from typing import Optional
+
+from app.utils.config import PROFILE_ENABLED
+from app.utils.profiling import PYINSTRUMENT_AVAILABLE, is_admin, profile_store
+
+router = APIRouter()
+
+
+def _require_admin(token: Optional[str]):
+    if not PROFILE_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling disabled")
+    if not is_admin(token):
+        raise HTTPException(status_code=403, detail="Invalid profile token")
+
+
+@router.get("")
+def list_profiles(x_profile: Optional[str] = Header(None)):
+    _require_admin(x_profile)
+    return {
+        "profiler": "pyinstrument" if PYINSTRUMENT_AVAILABLE else "cProfile",
+        "profiles": profile_store.list(),
+    }
+
+
+@router.get("/{name}")
+def download_profile(name: str, x_profile: Optional[str] = Header(None)):
+    _require_admin(x_profile)
+
+    path = profile_store.path_for(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    media_type = "text/html" if name.endswith(".html") else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=name)
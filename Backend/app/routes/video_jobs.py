@@ -0,0 +1,109 @@
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from typing import Optional
+from urllib.parse import urlsplit
+import os
+import uuid
+import logging
+
+from app.utils.config import VIDEO_JOB_DIR, VIDEO_JOB_MAX_UPLOAD_BYTES, VIDEO_JOB_URL_ALLOWLIST
+from app.services.video_jobs import is_remote, video_jobs
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+_UPLOAD_CHUNK = 1024 * 1024
+
+
+def _resolve_path(path: str) -> str:
+    if is_remote(path):
+        # ffmpeg would fetch any URL from the server's network, so only
+        # hosts the operator listed are accepted.
+        host = (urlsplit(path).hostname or "").lower()
+        if host not in VIDEO_JOB_URL_ALLOWLIST:
+            raise HTTPException(
+                status_code=403,
+                detail="Remote video URLs are only accepted for hosts in VIDEO_JOB_URL_ALLOWLIST",
+            )
+        return path
+
+    root = os.path.realpath(VIDEO_JOB_DIR)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        raise HTTPException(status_code=400, detail=f"Path must be inside {VIDEO_JOB_DIR}")
+    if not os.path.isfile(resolved):
+        raise HTTPException(status_code=404, detail="Video file not found")
+    return resolved
+
+
+async def _store_upload(file: UploadFile) -> str:
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"Video larger than {VIDEO_JOB_MAX_UPLOAD_BYTES} bytes",
+    )
+    if file.size is not None and file.size > VIDEO_JOB_MAX_UPLOAD_BYTES:
+        raise too_large
+
+    os.makedirs(VIDEO_JOB_DIR, exist_ok=True)
+    ext = os.path.splitext(file.filename or "")[1] or ".mp4"
+    dest = os.path.join(VIDEO_JOB_DIR, f"upload_{uuid.uuid4().hex}{ext}")
+
+    written = 0
+    try:
+        with open(dest, "wb") as out:
+            while True:
+                chunk = await file.read(_UPLOAD_CHUNK)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > VIDEO_JOB_MAX_UPLOAD_BYTES:
+                    raise too_large
+                out.write(chunk)
+    except BaseException:
+        os.remove(dest)
+        raise
+
+    return dest
+
+
+@router.post("/video")
+async def create_video_job(
+    file: Optional[UploadFile] = File(None),
+    path: Optional[str] = Form(None),
+    stride: float = Form(1.0),
+    source: Optional[str] = Form(None),
+):
+    if stride <= 0:
+        raise HTTPException(status_code=400, detail="stride must be positive")
+
+    if file is not None:
+        video_path = await _store_upload(file)
+        cleanup = True
+    elif path:
+        video_path = _resolve_path(path)
+        cleanup = False
+    else:
+        raise HTTPException(status_code=400, detail="Provide either a file upload or a path")
+
+    job = video_jobs.submit(video_path, stride, source, cleanup=cleanup)
+    return job.to_dict()
+
+
+@router.get("")
+def list_jobs():
+    return [job.to_dict() for job in video_jobs.list()]
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str):
+    job = video_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@router.post("/{job_id}/cancel")
+def cancel_job(job_id: str):
+    job = video_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
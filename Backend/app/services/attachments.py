@@ -0,0 +1,151 @@
+import io
+import logging
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+
+from app.utils.config import (
+    ATTACHMENT_MAX_BYTES,
+    ATTACHMENT_MAX_DIM,
+    ATTACHMENT_DRAW_BOXES,
+    ML_REFERENCE_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image, ImageDraw
+    PIL_AVAILABLE = True
+except Exception as e:
+    PIL_AVAILABLE = False
+    logger.warning(f"[ATTACH] Pillow not available, attachments sent unmodified: {e}")
+
+_QUALITY_STEPS = (85, 75, 65, 55, 45, 35)
+_CACHE_SIZE = 32
+
+_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_lock = threading.Lock()
+_stats = {"built": 0, "cache_hits": 0, "bytes_in": 0, "bytes_out": 0}
+
+
+def _cache_key(image_data: bytes, detections: Optional[Sequence[dict]]) -> str:
+    h = hashlib.blake2b(image_data, digest_size=16)
+    if detections:
+        for d in detections:
+            h.update(repr(d.get("bbox")).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _draw_boxes(img, detections: Sequence[dict], source_size: int):
+    draw = ImageDraw.Draw(img)
+    sx = img.width / source_size
+    sy = img.height / source_size
+    width = max(2, img.width // 320)
+
+    for d in detections:
+        bbox = d.get("bbox")
+        if not bbox or len(bbox) != 4:
+            continue
+        x1, y1, x2, y2 = bbox
+        draw.rectangle(
+            [x1 * sx, y1 * sy, x2 * sx, y2 * sy],
+            outline=(255, 0, 0),
+            width=width,
+        )
+        conf = d.get("confidence")
+        if conf is not None:
+            draw.text((x1 * sx + width, y1 * sy + width), f"{conf * 100:.0f}%", fill=(255, 0, 0))
+
+
+def _encode(img, max_bytes: int) -> bytes:
+    data = b""
+    while True:
+        for quality in _QUALITY_STEPS:
+            buf = io.BytesIO()
+            img.save(buf, format="JPEG", quality=quality, optimize=True)
+            data = buf.getvalue()
+            if len(data) <= max_bytes:
+                return data
+
+        if min(img.width, img.height) <= 160:
+            return data
+        img = img.resize((img.width // 2, img.height // 2), Image.BILINEAR)
+
+
+def _build(
+    image_data: bytes,
+    detections: Optional[Sequence[dict]],
+    max_bytes: int,
+    max_dim: int,
+    draw_boxes: bool,
+    source_size: int,
+) -> bytes:
+    img = Image.open(io.BytesIO(image_data))
+    img = img.convert("RGB")
+
+    # Boxes come back in the ML service's resized coordinate space, which
+    # maps onto the full frame regardless of aspect ratio, so draw before
+    # shrinking and scale relative to the original size.
+    if draw_boxes and detections:
+        _draw_boxes(img, detections, source_size)
+
+    if max(img.width, img.height) > max_dim:
+        img.thumbnail((max_dim, max_dim), Image.BILINEAR)
+
+    return _encode(img, max_bytes)
+
+
+def prepare_attachment(
+    image_data: Optional[bytes],
+    detections: Optional[List[dict]] = None,
+    max_bytes: int = ATTACHMENT_MAX_BYTES,
+    max_dim: int = ATTACHMENT_MAX_DIM,
+    draw_boxes: bool = ATTACHMENT_DRAW_BOXES,
+    source_size: int = ML_REFERENCE_SIZE,
+) -> Optional[bytes]:
+    if not image_data or not PIL_AVAILABLE:
+        return image_data
+
+    key = _cache_key(image_data, detections if draw_boxes else None)
+
+    with _lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            _stats["cache_hits"] += 1
+            return cached
+
+    try:
+        encoded = _build(image_data, detections, max_bytes, max_dim, draw_boxes, source_size)
+    except Exception as e:
+        logger.warning(f"[ATTACH] Failed to optimise attachment, sending original: {e}")
+        return image_data
+
+    if len(encoded) >= len(image_data) and not (draw_boxes and detections):
+        encoded = image_data
+
+    with _lock:
+        _cache[key] = encoded
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+        _stats["built"] += 1
+        _stats["bytes_in"] += len(image_data)
+        _stats["bytes_out"] += len(encoded)
+
+    logger.info(
+        f"[ATTACH] {len(image_data)} -> {len(encoded)} bytes "
+        f"({100.0 * (1 - len(encoded) / len(image_data)):.1f}% smaller)"
+    )
+    return encoded
+
+
+def attachment_stats() -> dict:
+    with _lock:
+        bytes_in = _stats["bytes_in"]
+        bytes_out = _stats["bytes_out"]
+        return {
+            **_stats,
+            "pil_available": PIL_AVAILABLE,
+            "reduction_pct": round(100.0 * (1 - bytes_out / bytes_in), 1) if bytes_in else 0.0,
+        }
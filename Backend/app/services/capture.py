@@ -0,0 +1,419 @@
+import os
+import time
+import select
+import logging
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.utils.config import (
+    CAPTURE_FFMPEG,
+    CAPTURE_FPS,
+    CAPTURE_STALL_TIMEOUT,
+    CAPTURE_BACKOFF_MIN,
+    CAPTURE_BACKOFF_MAX,
+    MONITOR_DETECT_INTERVAL,
+    MONITOR_MAX_CONCURRENCY,
+    MONITOR_REFRESH_INTERVAL,
+    MONITOR_TICK,
+)
+from app.services.sampling import AdaptiveRate, InferenceBudget
+from app.utils.logging import bind_request_id
+
+logger = logging.getLogger(__name__)
+
+_SOI = b"\xff\xd8"
+_EOI = b"\xff\xd9"
+_MAX_BUFFER = 16 * 1024 * 1024
+
+
+def extract_jpegs(buf: bytearray) -> List[bytes]:
+    """Pop every complete JPEG out of an MJPEG byte buffer, in place."""
+    frames = []
+
+    while True:
+        start = buf.find(_SOI)
+        if start < 0:
+            buf.clear()
+            break
+        end = buf.find(_EOI, start + 2)
+        if end < 0:
+            if start:
+                del buf[:start]
+            break
+        frames.append(bytes(buf[start:end + 2]))
+        del buf[:end + 2]
+
+    if len(buf) > _MAX_BUFFER:
+        buf.clear()
+
+    return frames
+
+
+def stderr_tail(f, limit: int = 300) -> str:
+    """Last ``limit`` characters of an ffmpeg stderr temp file."""
+    f.seek(0, os.SEEK_END)
+    f.seek(max(0, f.tell() - limit * 4))
+    return f.read().decode("utf-8", "replace").strip()[-limit:]
+
+
+def camera_url(camera: Dict) -> Optional[str]:
+    return camera.get("rtsp_url") or camera.get("url") or camera.get("source_url")
+
+
+def camera_source(camera: Dict) -> str:
+    return f"camera-{camera.get('id')}"
+
+
+class CameraReader(threading.Thread):
+    """Keeps the most recent JPEG frame of one camera in memory.
+
+    Decoding is delegated to an ``ffmpeg`` subprocess that emits MJPEG at
+    ``fps`` on stdout, so the backend itself stays free of OpenCV/numpy.
+    Works for RTSP, HTTP(S) streams and local video files; a file that
+    reaches EOF is simply reopened, which makes it a stand-in for a live
+    stream. Any failure reconnects with exponential backoff.
+
+    ffmpeg's stderr goes to a temp file rather than a pipe nobody reads
+    while streaming, so a source that logs a lot of decode errors cannot
+    block it.
+    """
+
+    def __init__(
+        self,
+        camera_id,
+        url: str,
+        fps: float = CAPTURE_FPS,
+        stall_timeout: float = CAPTURE_STALL_TIMEOUT,
+        backoff_min: float = CAPTURE_BACKOFF_MIN,
+        backoff_max: float = CAPTURE_BACKOFF_MAX,
+        ffmpeg: str = CAPTURE_FFMPEG,
+    ):
+        super().__init__(daemon=True, name=f"capture-{camera_id}")
+        self.camera_id = camera_id
+        self.url = url
+        self.fps = fps
+        self.stall_timeout = stall_timeout
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.ffmpeg = ffmpeg
+        self.connected = False
+        self.failures = 0
+        self.frames = 0
+        self.last_error: Optional[str] = None
+        self._frame: Optional[bytes] = None
+        self._frame_at = 0.0
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._proc: Optional[subprocess.Popen] = None
+
+    def latest(self) -> Optional[Tuple[int, bytes, float]]:
+        with self._lock:
+            if self._frame is None:
+                return None
+            return self._seq, self._frame, self._frame_at
+
+    def stop(self):
+        self._stop_event.set()
+        self._kill()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            age = time.monotonic() - self._frame_at if self._frame_at else None
+        return {
+            "camera_id": self.camera_id,
+            "connected": self.connected,
+            "frames": self.frames,
+            "failures": self.failures,
+            "frame_age_seconds": round(age, 2) if age is not None else None,
+            "last_error": self.last_error,
+        }
+
+    def run(self):
+        backoff = self.backoff_min
+
+        while not self._stop_event.is_set():
+            try:
+                produced = self._capture()
+            except Exception as e:
+                produced = False
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.error(f"[CAPTURE] camera={self.camera_id} error: {self.last_error}")
+            finally:
+                self.connected = False
+                self._kill()
+
+            if self._stop_event.is_set():
+                break
+
+            if produced:
+                backoff = self.backoff_min
+            else:
+                self.failures += 1
+                logger.warning(f"[CAPTURE] camera={self.camera_id} reconnecting in {backoff:.0f}s")
+
+            self._stop_event.wait(backoff)
+            if not produced:
+                backoff = min(self.backoff_max, backoff * 2)
+
+        logger.info(f"[CAPTURE] camera={self.camera_id} reader stopped")
+
+    def _command(self) -> List[str]:
+        cmd = [self.ffmpeg, "-hide_banner", "-loglevel", "error", "-nostdin"]
+        if self.url.startswith("rtsp://"):
+            cmd += ["-rtsp_transport", "tcp"]
+        elif os.path.exists(self.url):
+            # Pace local files at their native frame rate, like a live feed.
+            cmd += ["-re"]
+        cmd += [
+            "-i", self.url,
+            "-an",
+            "-vf", f"fps={self.fps}",
+            "-f", "image2pipe",
+            "-vcodec", "mjpeg",
+            "-q:v", "5",
+            "pipe:1",
+        ]
+        return cmd
+
+    def _capture(self) -> bool:
+        with tempfile.TemporaryFile() as stderr:
+            self._proc = subprocess.Popen(
+                self._command(),
+                stdout=subprocess.PIPE,
+                stderr=stderr,
+                bufsize=0,
+            )
+            return self._read_frames(self._proc.stdout, stderr)
+
+    def _read_frames(self, stdout, stderr) -> bool:
+        buf = bytearray()
+        produced = False
+
+        while not self._stop_event.is_set():
+            ready, _, _ = select.select([stdout], [], [], self.stall_timeout)
+            if not ready:
+                self.last_error = f"No data for {self.stall_timeout:.0f}s"
+                logger.warning(f"[CAPTURE] camera={self.camera_id} stalled")
+                return produced
+
+            chunk = stdout.read(65536)
+            if not chunk:
+                try:
+                    self._proc.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    pass
+                error = stderr_tail(stderr)
+                if error:
+                    self.last_error = error
+                return produced
+
+            buf.extend(chunk)
+            for frame in extract_jpegs(buf):
+                self._publish(frame)
+                produced = True
+
+        return produced
+
+    def _publish(self, frame: bytes):
+        with self._lock:
+            self._frame = frame
+            self._frame_at = time.monotonic()
+            self._seq += 1
+        self.frames += 1
+        if not self.connected:
+            self.connected = True
+            self.last_error = None
+            logger.info(f"[CAPTURE] camera={self.camera_id} streaming")
+
+    def _kill(self):
+        proc = self._proc
+        if proc is None or proc.poll() is not None:
+            return
+        try:
+            proc.kill()
+            proc.wait(timeout=5)
+        except Exception:
+            pass
+
+
+class _CameraSlot:
+    __slots__ = (
+        "camera",
+        "reader",
+        "rate",
+        "next_due",
+        "last_seq",
+        "observed_seq",
+        "inflight",
+        "dispatched",
+    )
+
+    def __init__(self, camera: Dict, reader: CameraReader, rate: AdaptiveRate):
+        self.camera = camera
+        self.reader = reader
+        self.rate = rate
+        self.next_due = 0.0
+        self.last_seq = 0
+        self.observed_seq = 0
+        self.inflight = False
+        self.dispatched = 0
+
+
+class CaptureEngine:
+    """Runs one ``CameraReader`` per active camera and schedules detection.
+
+    Each camera has an ``AdaptiveRate``: its interval starts at
+    ``detect_interval`` (column value, falling back to
+    ``MONITOR_DETECT_INTERVAL``), shrinks after a dirty result or a visual
+    change and decays back while the floor stays clean. All cameras share
+    one ``InferenceBudget``; when more are due than the budget allows, the
+    ones furthest behind their own schedule go first.
+    """
+
+    def __init__(
+        self,
+        list_cameras: Callable[[], List[Dict]],
+        detect: Callable[[Dict, bytes], Optional[dict]],
+        max_concurrency: int = MONITOR_MAX_CONCURRENCY,
+        reader_factory: Callable[..., CameraReader] = CameraReader,
+        budget: Optional[InferenceBudget] = None,
+    ):
+        self._list_cameras = list_cameras
+        self._detect = detect
+        self._reader_factory = reader_factory
+        self.budget = budget or InferenceBudget()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_concurrency),
+            thread_name_prefix="monitor-detect",
+        )
+        self._slots: Dict[str, _CameraSlot] = {}
+        self._lock = threading.Lock()
+
+    def run(self, stop_event: threading.Event):
+        next_refresh = 0.0
+
+        try:
+            while not stop_event.is_set():
+                now = time.monotonic()
+                if now >= next_refresh:
+                    self.sync_cameras()
+                    next_refresh = now + MONITOR_REFRESH_INTERVAL
+
+                self.dispatch_due(now)
+                stop_event.wait(MONITOR_TICK)
+        finally:
+            self.shutdown()
+
+    def sync_cameras(self):
+        try:
+            cameras = self._list_cameras()
+        except Exception:
+            logger.exception("[MONITOR] Failed to list cameras")
+            return
+
+        wanted = {}
+        for cam in cameras:
+            url = camera_url(cam)
+            if not url:
+                logger.warning(f"[MONITOR] Camera {cam.get('id')} has no stream URL, skipped")
+                continue
+            wanted[camera_source(cam)] = (cam, url)
+
+        with self._lock:
+            for key in list(self._slots):
+                slot = self._slots[key]
+                if key not in wanted or camera_url(slot.camera) != wanted[key][1]:
+                    logger.info(f"[MONITOR] Stopping reader for {key}")
+                    slot.reader.stop()
+                    del self._slots[key]
+
+            for key, (cam, url) in wanted.items():
+                if key in self._slots:
+                    self._slots[key].camera = cam
+                    continue
+                logger.info(f"[MONITOR] Starting reader for {key}")
+                reader = self._reader_factory(cam.get("id"), url)
+                reader.start()
+                interval = float(cam.get("detect_interval") or MONITOR_DETECT_INTERVAL)
+                self._slots[key] = _CameraSlot(cam, reader, AdaptiveRate(interval))
+
+    def dispatch_due(self, now: float):
+        with self._lock:
+            slots = list(self._slots.values())
+
+        candidates = []
+        for slot in slots:
+            if slot.inflight:
+                continue
+            latest = slot.reader.latest()
+            if latest is None or latest[0] == slot.last_seq:
+                continue
+
+            seq, frame, _ = latest
+            if seq != slot.observed_seq:
+                slot.observed_seq = seq
+                if slot.rate.observe_frame(frame):
+                    slot.next_due = min(slot.next_due, now)
+            if now < slot.next_due:
+                continue
+            lateness = (now - slot.next_due) / slot.rate.interval
+            candidates.append((lateness, slot, seq, frame))
+
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        for _, slot, seq, frame in candidates:
+            if not self.budget.try_acquire(now):
+                break
+            slot.last_seq = seq
+            slot.inflight = True
+            slot.next_due = now + slot.rate.interval
+            slot.dispatched += 1
+            slot.rate.record_dispatch(now)
+            self._executor.submit(self._run_detect, slot, frame)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            slots = list(self._slots.items())
+        return {
+            "budget": self.budget.snapshot(now),
+            "cameras": [
+                {
+                    "source": key,
+                    "interval_seconds": round(slot.rate.interval, 2),
+                    "min_interval_seconds": slot.rate.min_interval,
+                    "max_interval_seconds": slot.rate.max_interval,
+                    "effective_rate_per_minute": round(slot.rate.effective_rate(now) * 60, 2),
+                    "boosts": slot.rate.boosts,
+                    "dispatched": slot.dispatched,
+                    **slot.reader.snapshot(),
+                }
+                for key, slot in slots
+            ],
+        }
+
+    def shutdown(self):
+        with self._lock:
+            slots = list(self._slots.values())
+            self._slots.clear()
+        for slot in slots:
+            slot.reader.stop()
+        for slot in slots:
+            slot.reader.join(timeout=5)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run_detect(self, slot: _CameraSlot, frame: bytes):
+        try:
+            with bind_request_id():
+                result = self._detect(slot.camera, frame)
+            if result is not None:
+                slot.rate.observe_result(bool(result.get("is_dirty")))
+                if result.get("is_dirty"):
+                    slot.next_due = min(slot.next_due, time.monotonic() + slot.rate.interval)
+        except Exception:
+            logger.exception(f"[MONITOR] Detection failed for {camera_source(slot.camera)}")
+        finally:
+            slot.inflight = False
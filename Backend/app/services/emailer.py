@@ -1,14 +1,34 @@
 import os
+import json
+import time
+import uuid
+import asyncio
 import logging
 import base64
-import requests
-from typing import List, Optional
+import threading
+import httpx
+from typing import Dict, List, Optional
+
+from app.utils.logging import bind_request_id, request_id_var
+from app.utils.metrics import EMAIL_SENDS
 
 logger = logging.getLogger(__name__)
 
 RESEND_API_KEY = os.getenv("RESEND_API_KEY")
+RESEND_API_URL = os.getenv("RESEND_API_URL", "https://api.resend.com").rstrip("/")
 EMAIL_FROM = os.getenv("EMAIL_FROM", "FloorEye <onboarding@resend.dev>")
 
+EMAIL_MAX_CONCURRENCY = int(os.getenv("EMAIL_MAX_CONCURRENCY", "4"))
+# Directory with one JSON file per message waiting for a retry.
+EMAIL_RETRY_PATH = os.getenv("EMAIL_RETRY_PATH", "data/email_retry")
+EMAIL_RETRY_INTERVAL = float(os.getenv("EMAIL_RETRY_INTERVAL", "15"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "6"))
+# Seconds shutdown waits for queued and in-flight sends before persisting them.
+EMAIL_DRAIN_TIMEOUT = float(os.getenv("EMAIL_DRAIN_TIMEOUT", "10"))
+
+# Resend accepts up to 100 messages per batch call, without attachments.
+RESEND_BATCH_LIMIT = 100
+
 SMTP_ENABLED = bool(RESEND_API_KEY)
 
 logger.info(f"[EMAILER] RESEND_API_KEY={'SET' if RESEND_API_KEY else 'NOT SET'}")
@@ -19,6 +39,434 @@ if not SMTP_ENABLED:
     logger.warning("[EMAILER] Resend API key not configured - email sending disabled")
 
 
+def _client_options(max_connections: int) -> dict:
+    """Timeouts and pool limits shared by the sync and async Resend clients."""
+    return {
+        "timeout": httpx.Timeout(15.0, connect=5.0),
+        "limits": httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+    }
+
+
+# Sync fallback for sends made while the delivery worker is not running.
+_http = httpx.Client(**_client_options(EMAIL_MAX_CONCURRENCY))
+
+
+def _auth_headers() -> Dict[str, str]:
+    return {
+        "Authorization": f"Bearer {RESEND_API_KEY}",
+        "Content-Type": "application/json",
+    }
+
+
+def _is_success(status_code: Optional[int]) -> bool:
+    return status_code is not None and 200 <= status_code < 300
+
+
+def _is_retryable(status_code: Optional[int]) -> bool:
+    return status_code is None or status_code == 429 or status_code >= 500
+
+
+def build_payload(
+    subject: str,
+    body: str,
+    to_list: List[str],
+    image_data: Optional[bytes] = None,
+    image_filename: str = "detection.jpg",
+) -> dict:
+    payload = {
+        "from": EMAIL_FROM,
+        "to": to_list,
+        "subject": subject,
+        "text": body,
+    }
+
+    if image_data:
+        try:
+            content_b64 = base64.b64encode(image_data).decode("utf-8")
+            payload["attachments"] = [
+                {
+                    "filename": image_filename,
+                    "content": content_b64,
+                }
+            ]
+            logger.info(f"[EMAIL] Attached image: {image_filename} ({len(image_data)} bytes)")
+        except Exception as e:
+            logger.warning(f"[EMAIL] Failed to attach image: {e}")
+
+    return payload
+
+
+class RetryStore:
+    """Directory-backed queue of failed sends, retried with exponential backoff.
+
+    Each entry is its own JSON file, so queueing or taking a message writes
+    or removes only that message, never the whole queue with every other
+    base64 attachment in it. Entries already on disk are read by ``load``,
+    which the delivery worker calls on start.
+    """
+
+    def __init__(
+        self,
+        path: str = EMAIL_RETRY_PATH,
+        max_attempts: int = EMAIL_MAX_ATTEMPTS,
+        base_delay: float = 30.0,
+        max_delay: float = 3600.0,
+        max_entries: int = 500,
+    ):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: List[dict] = []
+        self._loaded = False
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def load(self):
+        """Read pending entries from disk, migrating a legacy queue file. Runs once."""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            entries = self._load()
+            self._entries = entries + self._entries
+
+    def push(self, payload: dict, attempts: int) -> bool:
+        # Also covers the sync fallback, where no worker has loaded the store.
+        self.load()
+        if attempts >= self.max_attempts:
+            logger.error(f"[EMAIL] Giving up after {attempts} attempts: {payload.get('subject')}")
+            EMAIL_SENDS.labels("dropped").inc()
+            return False
+
+        delay = min(self.max_delay, self.base_delay * (2 ** max(0, attempts - 1)))
+        entry = {
+            "id": f"{time.time_ns()}-{uuid.uuid4().hex[:8]}",
+            "payload": payload,
+            "attempts": attempts,
+            "next_at": time.time() + delay,
+        }
+        self._write(entry)
+
+        with self._lock:
+            self._entries.append(entry)
+            dropped = self._entries[:max(0, len(self._entries) - self.max_entries)]
+            self._entries = self._entries[len(dropped):]
+
+        if dropped:
+            logger.warning(f"[EMAIL] Retry queue full, dropped {len(dropped)} oldest message(s)")
+            self._remove(dropped)
+
+        logger.info(f"[EMAIL] Queued for retry in {delay:.0f}s (attempt {attempts})")
+        return True
+
+    def take_due(self, now: Optional[float] = None) -> List[dict]:
+        self.load()
+        now = time.time() if now is None else now
+
+        with self._lock:
+            due = [e for e in self._entries if e["next_at"] <= now]
+            if due:
+                self._entries = [e for e in self._entries if e["next_at"] > now]
+
+        self._remove(due)
+        return due
+
+    def _entry_path(self, entry: dict) -> str:
+        return os.path.join(self.path, f"{entry['id']}.json")
+
+    def _load(self) -> List[dict]:
+        legacy = self._load_legacy()
+        try:
+            names = sorted(n for n in os.listdir(self.path) if n.endswith(".json"))
+        except FileNotFoundError:
+            names = []
+
+        entries = []
+        for name in names:
+            try:
+                with open(os.path.join(self.path, name), "r", encoding="utf-8") as f:
+                    entries.append(json.load(f))
+            except Exception as e:
+                logger.error(f"[EMAIL] Skipping unreadable retry entry {name}: {e}")
+
+        for entry in legacy:
+            entry.setdefault("id", f"{time.time_ns()}-{uuid.uuid4().hex[:8]}")
+            self._write(entry)
+            entries.append(entry)
+
+        if entries:
+            logger.info(f"[EMAIL] Loaded {len(entries)} pending retries from {self.path}")
+        return entries
+
+    def _load_legacy(self) -> List[dict]:
+        # Earlier versions kept the whole queue in one JSON file at this path.
+        if not os.path.isfile(self.path):
+            return []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except Exception as e:
+            logger.error(f"[EMAIL] Failed to load retry queue {self.path}: {e}")
+            entries = []
+        os.replace(self.path, f"{self.path}.migrated")
+        logger.info(f"[EMAIL] Moving {len(entries)} retries from {self.path} to one file per entry")
+        return entries
+
+    def _write(self, entry: dict):
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            path = self._entry_path(entry)
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(f"{path}.tmp", path)
+        except Exception as e:
+            logger.error(f"[EMAIL] Failed to persist retry entry in {self.path}: {e}")
+
+    def _remove(self, entries: List[dict]):
+        for entry in entries:
+            try:
+                os.remove(self._entry_path(entry))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error(f"[EMAIL] Failed to remove retry entry {entry['id']}: {e}")
+
+
+class EmailDeliveryWorker:
+    """Async sender with a pooled HTTP client and bounded concurrency.
+
+    Messages are handed over with ``enqueue`` (safe from any thread) and sent
+    by ``max_concurrency`` consumer tasks. Retryable failures go to the
+    ``RetryStore``; due retries without attachments are grouped into Resend
+    batch calls. Store file I/O runs in a thread, off the event loop.
+
+    ``stop`` waits up to ``drain_timeout`` for queued and in-flight sends;
+    whatever is still unsent after that is written to the store.
+    """
+
+    def __init__(
+        self,
+        store: RetryStore,
+        max_concurrency: int = EMAIL_MAX_CONCURRENCY,
+        retry_interval: float = EMAIL_RETRY_INTERVAL,
+        drain_timeout: float = EMAIL_DRAIN_TIMEOUT,
+    ):
+        self.store = store
+        self.max_concurrency = max(1, max_concurrency)
+        self.retry_interval = retry_interval
+        self.drain_timeout = drain_timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._tasks: List[asyncio.Task] = []
+        self._retry_task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        # Payloads being sent, with their attempt count, keyed by id().
+        self._inflight: Dict[int, tuple] = {}
+        self.stats = {"sent": 0, "failed": 0, "retried": 0, "batched": 0}
+
+    def _count(self, outcome: str, n: int = 1):
+        self.stats[outcome] += n
+        EMAIL_SENDS.labels(outcome).inc(n)
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    async def start(self):
+        if self._loop is not None:
+            return
+
+        await asyncio.to_thread(self.store.load)
+
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._stopping = asyncio.Event()
+        self._client = httpx.AsyncClient(
+            base_url=RESEND_API_URL,
+            headers=_auth_headers(),
+            **_client_options(self.max_concurrency),
+        )
+        self._tasks = [
+            asyncio.create_task(self._consume())
+            for _ in range(self.max_concurrency)
+        ]
+        self._retry_task = asyncio.create_task(self._retry_loop())
+        logger.info(f"[EMAIL] Delivery worker started (concurrency={self.max_concurrency})")
+
+    async def stop(self):
+        if self._loop is None:
+            return
+
+        self._stopping.set()
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(self._queue.join(), self._retry_task),
+                timeout=self.drain_timeout,
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"[EMAIL] {self._queue.qsize() + len(self._inflight)} message(s) unsent after "
+                f"{self.drain_timeout:.0f}s, keeping them for retry"
+            )
+
+        for task in (self._retry_task, *self._tasks):
+            task.cancel()
+        await asyncio.gather(self._retry_task, *self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._retry_task = None
+
+        unsent = list(self._inflight.values())
+        self._inflight.clear()
+        while not self._queue.empty():
+            payload, _ = self._queue.get_nowait()
+            unsent.append((payload, 0))
+        for payload, attempts in unsent:
+            await asyncio.to_thread(self.store.push, payload, attempts)
+
+        await self._client.aclose()
+        self._client = None
+        self._queue = None
+        self._loop = None
+        logger.info("[EMAIL] Delivery worker stopped")
+
+    def enqueue(self, payload: dict) -> bool:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return False
+        loop.call_soon_threadsafe(self._queue.put_nowait, (payload, request_id_var.get()))
+        return True
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "retry_pending": len(self.store),
+        }
+
+    async def _consume(self):
+        while True:
+            payload, request_id = await self._queue.get()
+            try:
+                with bind_request_id(request_id):
+                    await self._deliver(payload, 0)
+            except Exception:
+                logger.exception("[EMAIL] Unexpected delivery error")
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, payload: dict, attempts: int):
+        self._inflight[id(payload)] = (payload, attempts)
+        status = await self._post("/emails", payload)
+        # Not reached when cancelled mid-send: stop() persists what is left.
+        self._inflight.pop(id(payload), None)
+
+        if _is_success(status):
+            self._count("sent", 1)
+            return
+
+        self._count("failed", 1)
+        if _is_retryable(status) and await asyncio.to_thread(self.store.push, payload, attempts + 1):
+            self._count("retried", 1)
+
+    async def _post(self, path: str, body) -> Optional[int]:
+        try:
+            response = await self._client.post(path, json=body)
+        except Exception as e:
+            logger.error(f"[EMAIL] Resend request failed: {type(e).__name__}: {e}")
+            return None
+
+        if not _is_success(response.status_code):
+            logger.error(f"[EMAIL] Resend API error: {response.status_code} - {response.text}")
+        return response.status_code
+
+    async def _retry_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.retry_interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self._flush_retries()
+            except Exception:
+                logger.exception("[EMAIL] Retry flush failed")
+
+    async def _flush_retries(self):
+        due = await asyncio.to_thread(self.store.take_due)
+        if not due:
+            return
+
+        # Until each entry is resent or re-queued, stop() can save it again.
+        for entry in due:
+            self._inflight[id(entry["payload"])] = (entry["payload"], entry["attempts"])
+
+        plain = [e for e in due if not e["payload"].get("attachments")]
+        single = [e for e in due if e["payload"].get("attachments")]
+
+        for i in range(0, len(plain), RESEND_BATCH_LIMIT):
+            chunk = plain[i:i + RESEND_BATCH_LIMIT]
+            if len(chunk) == 1:
+                single.extend(chunk)
+                continue
+
+            status = await self._post("/emails/batch", [e["payload"] for e in chunk])
+            for entry in chunk:
+                self._inflight.pop(id(entry["payload"]), None)
+            if _is_success(status):
+                self._count("sent", len(chunk))
+                self._count("batched", 1)
+                continue
+
+            self._count("failed", len(chunk))
+            for entry in chunk:
+                if _is_retryable(status) and await asyncio.to_thread(
+                    self.store.push, entry["payload"], entry["attempts"] + 1
+                ):
+                    self._count("retried", 1)
+
+        for i in range(0, len(single), self.max_concurrency):
+            await asyncio.gather(*(
+                self._deliver(e["payload"], e["attempts"])
+                for e in single[i:i + self.max_concurrency]
+            ))
+
+
+retry_store = RetryStore()
+delivery_worker = EmailDeliveryWorker(retry_store)
+
+
+def _send_payload(payload: dict) -> Optional[int]:
+    try:
+        response = _http.post(
+            f"{RESEND_API_URL}/emails",
+            headers=_auth_headers(),
+            json=payload,
+        )
+    except Exception as e:
+        logger.error(f"[EMAIL] Email sending failed: {type(e).__name__}: {e}")
+        EMAIL_SENDS.labels("failed").inc()
+        return None
+
+    if _is_success(response.status_code):
+        result = response.json()
+        logger.info(f"[EMAIL] Email sent successfully! ID: {result.get('id')}")
+        EMAIL_SENDS.labels("sent").inc()
+    else:
+        logger.error(f"[EMAIL] Resend API error: {response.status_code} - {response.text}")
+        EMAIL_SENDS.labels("failed").inc()
+    return response.status_code
+
+
 def send_email(
     subject: str,
     body: str,
@@ -34,47 +482,35 @@ def send_email(
         logger.error("[EMAIL] No email recipients provided")
         return False
 
-    logger.info(f"[EMAIL] Attempting to send email to {to_list}")
+    logger.info(f"[EMAIL] Attempting to send email to {len(to_list)} recipient(s)")
 
-    try:
-        payload = {
-            "from": EMAIL_FROM,
-            "to": to_list,
-            "subject": subject,
-            "text": body,
-        }
+    payload = build_payload(subject, body, to_list, image_data, image_filename)
+    return _is_success(_send_payload(payload))
 
-        if image_data:
-            try:
-                content_b64 = base64.b64encode(image_data).decode("utf-8")
-                payload["attachments"] = [
-                    {
-                        "filename": image_filename,
-                        "content": content_b64,
-                    }
-                ]
-                logger.info(f"[EMAIL] Attached image: {image_filename} ({len(image_data)} bytes)")
-            except Exception as e:
-                logger.warning(f"[EMAIL] Failed to attach image: {e}")
-
-        response = requests.post(
-            "https://api.resend.com/emails",
-            headers={
-                "Authorization": f"Bearer {RESEND_API_KEY}",
-                "Content-Type": "application/json",
-            },
-            json=payload,
-            timeout=30,
-        )
 
-        if response.status_code == 200:
-            result = response.json()
-            logger.info(f"[EMAIL] Email sent successfully! ID: {result.get('id')}")
-            return True
-        else:
-            logger.error(f"[EMAIL] Resend API error: {response.status_code} - {response.text}")
-            return False
+def queue_email(
+    subject: str,
+    body: str,
+    to_list: List[str],
+    image_data: Optional[bytes] = None,
+    image_filename: str = "detection.jpg",
+) -> bool:
+    if not SMTP_ENABLED:
+        logger.error("[EMAIL] Resend API key missing")
+        return False
 
-    except Exception as e:
-        logger.error(f"[EMAIL] Email sending failed: {type(e).__name__}: {e}")
+    if not to_list:
+        logger.error("[EMAIL] No email recipients provided")
         return False
+
+    payload = build_payload(subject, body, to_list, image_data, image_filename)
+
+    if delivery_worker.enqueue(payload):
+        return True
+
+    status = _send_payload(payload)
+    if _is_success(status):
+        return True
+    if _is_retryable(status):
+        return retry_store.push(payload, 1)
+    return False
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import threading
+from typing import Optional, Set
+
+from app.utils.config import EVENTS_SUBSCRIBER_BUFFER
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    __slots__ = ("source", "queue", "loop", "dropped")
+
+    def __init__(self, source: Optional[str], maxsize: int, loop: asyncio.AbstractEventLoop):
+        self.source = source
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.loop = loop
+        self.dropped = 0
+
+    def offer(self, event: dict):
+        # Slow consumers lose their oldest events rather than stalling the
+        # publisher or growing without bound.
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(event)
+
+
+class EventBroker:
+    """In-process fan-out of detection events to push subscribers."""
+
+    def __init__(self, buffer_size: int = EVENTS_SUBSCRIBER_BUFFER):
+        self.buffer_size = max(1, buffer_size)
+        self._subscribers: Set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._published = 0
+
+    def subscribe(self, source: Optional[str] = None) -> Subscription:
+        sub = Subscription(source, self.buffer_size, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def publish(self, event: dict):
+        with self._lock:
+            self._published += 1
+            targets = [
+                s for s in self._subscribers
+                if s.source is None or s.source == event.get("source")
+            ]
+
+        if not targets:
+            return
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        for sub in targets:
+            if sub.loop is running:
+                sub.offer(event)
+            elif not sub.loop.is_closed():
+                sub.loop.call_soon_threadsafe(sub.offer, event)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "published": self._published,
+                "dropped": sum(s.dropped for s in self._subscribers),
+                "buffer_size": self.buffer_size,
+            }
+
+
+broker = EventBroker()
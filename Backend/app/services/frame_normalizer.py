@@ -0,0 +1,135 @@
+import io
+import math
+import time
+import logging
+import threading
+from typing import Optional, Tuple
+
+from app.utils.config import (
+    FRAME_NORMALIZE,
+    FRAME_MAX_SIDE,
+    FRAME_FORMAT,
+    FRAME_QUALITY,
+)
+from app.utils.metrics import ML_UPLOAD_BYTES
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except Exception as e:
+    PIL_AVAILABLE = False
+    logger.warning(f"[FRAME] Pillow not available, frames forwarded unmodified: {e}")
+
+_CONTENT_TYPES = {"jpeg": "image/jpeg", "webp": "image/webp"}
+if FRAME_FORMAT not in _CONTENT_TYPES:
+    raise ValueError(f"FRAME_FORMAT must be one of {sorted(_CONTENT_TYPES)}, got {FRAME_FORMAT!r}")
+
+_lock = threading.Lock()
+_stats = {"frames": 0, "normalized": 0, "skipped": 0, "failed": 0, "bytes_in": 0, "bytes_out": 0, "seconds": 0.0}
+
+
+def target_size(width: int, height: int, profile: Optional[dict], max_side: int) -> Tuple[int, int]:
+    """Smallest size that still gives the ML service ``max_side`` pixels per axis.
+
+    The ML service resizes each axis to its input size independently, so
+    each axis is capped on its own. With a ROI/crop only that region is
+    fed to the model, so the full frame is kept proportionally larger.
+    """
+    side = (profile or {}).get("input_size") or max_side
+    region_w = region_h = 1.0
+
+    points = None
+    if profile and profile.get("roi"):
+        points = profile["roi"]
+    elif profile and profile.get("crop"):
+        x1, y1, x2, y2 = profile["crop"]
+        points = [(x1, y1), (x2, y2)]
+    if points:
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        region_w = max(max(xs) - min(xs), 1e-3)
+        region_h = max(max(ys) - min(ys), 1e-3)
+
+    return (
+        min(width, math.ceil(side / region_w)),
+        min(height, math.ceil(side / region_h)),
+    )
+
+
+def _encode(image_bytes: bytes, profile: Optional[dict], max_side: int, fmt: str, quality: int) -> Optional[bytes]:
+    img = Image.open(io.BytesIO(image_bytes))
+    width, height = img.size
+    size = target_size(width, height, profile, max_side)
+
+    # Let the JPEG decoder skip detail we are about to throw away.
+    img.draft("RGB", size)
+    img = img.convert("RGB")
+    if img.size != size:
+        img = img.resize(size, Image.BILINEAR)
+
+    buf = io.BytesIO()
+    img.save(buf, format=fmt.upper(), quality=quality)
+    return buf.getvalue()
+
+
+def normalize_frame(
+    image_bytes: bytes,
+    filename: str = "frame.jpg",
+    content_type: str = "image/jpeg",
+    profile: Optional[dict] = None,
+    enabled: bool = FRAME_NORMALIZE,
+    max_side: int = FRAME_MAX_SIDE,
+    fmt: str = FRAME_FORMAT,
+    quality: int = FRAME_QUALITY,
+) -> Tuple[str, bytes, str]:
+    """Downscale and re-encode a frame before it is uploaded to the ML service.
+
+    Returns the multipart ``(filename, bytes, content_type)`` to send. The
+    caller's original bytes are untouched, so storage and attachments still
+    use the full-quality frame. Tiled profiles are sent as-is because the
+    ML service needs the full resolution to tile.
+    """
+    out = None
+    elapsed = 0.0
+    if enabled and PIL_AVAILABLE and image_bytes and not (profile or {}).get("tile"):
+        start = time.perf_counter()
+        try:
+            out = _encode(image_bytes, profile, max_side, fmt, quality)
+        except Exception as e:
+            logger.warning(f"[FRAME] Normalisation failed, sending original: {e}")
+            with _lock:
+                _stats["failed"] += 1
+        elapsed = time.perf_counter() - start
+
+    if out is not None and len(out) < len(image_bytes):
+        result = (f"{filename.rsplit('.', 1)[0]}.{fmt}", out, _CONTENT_TYPES[fmt])
+        key = "normalized"
+    else:
+        result = (filename, image_bytes, content_type)
+        key = "skipped"
+
+    with _lock:
+        _stats["frames"] += 1
+        _stats[key] += 1
+        _stats["bytes_in"] += len(image_bytes)
+        _stats["bytes_out"] += len(result[1])
+        _stats["seconds"] += elapsed
+    ML_UPLOAD_BYTES.labels("original").inc(len(image_bytes))
+    ML_UPLOAD_BYTES.labels("sent").inc(len(result[1]))
+    return result
+
+
+def frame_stats() -> dict:
+    with _lock:
+        stats = dict(_stats)
+    frames = stats["frames"]
+    return {
+        **stats,
+        "enabled": FRAME_NORMALIZE and PIL_AVAILABLE,
+        "seconds": round(stats["seconds"], 3),
+        "avg_bytes_in": round(stats["bytes_in"] / frames) if frames else 0,
+        "avg_bytes_out": round(stats["bytes_out"] / frames) if frames else 0,
+        "avg_ms": round(1000 * stats["seconds"] / stats["normalized"], 2) if stats["normalized"] else 0.0,
+    }
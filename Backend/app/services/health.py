@@ -0,0 +1,178 @@
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from app.utils.config import (
+    ENABLE_DB,
+    ML_HEALTH_URL,
+    HEALTH_INTERVAL,
+    HEALTH_TIMEOUT,
+    HEALTH_STALE_AFTER,
+    HEALTH_EMAIL_INTERVAL,
+)
+from app.utils.metrics import DEPENDENCY_UP, DEPENDENCY_PROBE_DURATION
+
+logger = logging.getLogger(__name__)
+
+
+def _probe_db() -> dict:
+    from sqlalchemy import text
+    from app.store.db import get_db_connection
+
+    # Goes through the engine's pool, so a probe reuses a pooled connection.
+    with get_db_connection() as conn:
+        conn.execute(text("SELECT 1"))
+    return {}
+
+
+class HealthMonitor:
+    """Probes the backend's dependencies in the background.
+
+    Each dependency is probed by its own task, every ``interval`` seconds
+    unless it was registered with a longer one; ``/ready``, ``/health``
+    and ``/db-test`` only read the cached results, so however often they
+    are polled they never touch a dependency. ``critical`` dependencies
+    decide readiness; the others are reported but a failure only marks
+    the service ``degraded``. A result older than ``stale_after`` (default
+    three of its intervals) is reported as ``stale``.
+    """
+
+    def __init__(
+        self,
+        interval: float = HEALTH_INTERVAL,
+        timeout: float = HEALTH_TIMEOUT,
+        stale_after: float = HEALTH_STALE_AFTER,
+    ):
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self._probes: Dict[str, Callable[[], Awaitable[dict]]] = {}
+        self._critical: Dict[str, bool] = {}
+        self._intervals: Dict[str, float] = {}
+        self._results: Dict[str, dict] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def register(
+        self,
+        name: str,
+        probe: Callable[[], Awaitable[dict]],
+        critical: bool = True,
+        interval: Optional[float] = None,
+    ):
+        self._probes[name] = probe
+        self._critical[name] = critical
+        self._intervals[name] = interval or self.interval
+        self._results[name] = {"status": "unknown", "critical": critical}
+
+    async def start(self):
+        if self._task is not None:
+            return
+
+        self._client = httpx.AsyncClient(timeout=self.timeout)
+        self._setup()
+        self._task = asyncio.create_task(self._loop())
+        logger.info(f"[HEALTH] Monitor started ({', '.join(self._probes)} every {self.interval}s)")
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self._client.aclose()
+        self._client = None
+
+    def _setup(self):
+        if ENABLE_DB:
+            self.register("db", lambda: asyncio.to_thread(_probe_db))
+        if ML_HEALTH_URL:
+            self.register("ml", self._probe_ml)
+
+        from app.services.emailer import SMTP_ENABLED
+        if SMTP_ENABLED and HEALTH_EMAIL_INTERVAL > 0:
+            self.register("email", self._probe_email, critical=False, interval=HEALTH_EMAIL_INTERVAL)
+        elif SMTP_ENABLED:
+            self.register("email", self._check_email_configured, critical=False)
+
+    async def _probe_ml(self) -> dict:
+        res = await self._client.get(ML_HEALTH_URL)
+        if res.status_code != 200:
+            raise RuntimeError(f"HTTP {res.status_code}")
+        version = res.json().get("version") if "json" in res.headers.get("content-type", "") else None
+        return {"model_version": version} if version else {}
+
+    async def _probe_email(self) -> dict:
+        from app.services.emailer import RESEND_API_URL, _auth_headers
+
+        # Sending-only API keys get 401/403 here; that still shows the
+        # provider is reachable and answering.
+        res = await self._client.get(f"{RESEND_API_URL}/domains", headers=_auth_headers())
+        if res.status_code >= 500 or res.status_code == 429:
+            raise RuntimeError(f"HTTP {res.status_code}")
+        return {"http_status": res.status_code}
+
+    async def _check_email_configured(self) -> dict:
+        return {"probe": "config"}
+
+    async def _loop(self):
+        await asyncio.gather(*(self._probe_loop(name) for name in self._probes))
+
+    async def _probe_loop(self, name: str):
+        while True:
+            await self._check(name)
+            await asyncio.sleep(self._intervals[name])
+
+    async def _check(self, name: str):
+        previous = self._results[name]
+        start = time.perf_counter()
+        try:
+            detail = await asyncio.wait_for(self._probes[name](), self.timeout)
+            result = {"status": "up", **detail, "last_success": time.time(), "error": None}
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            result = {"status": "down", "last_success": previous.get("last_success"), "error": error}
+            if previous["status"] != "down":
+                logger.warning(f"[HEALTH] {name} is down: {error}")
+        latency = time.perf_counter() - start
+
+        if previous["status"] == "down" and result["status"] == "up":
+            logger.info(f"[HEALTH] {name} recovered")
+
+        self._results[name] = {
+            **result,
+            "critical": self._critical[name],
+            "interval": self._intervals[name],
+            "latency_ms": round(latency * 1000, 1),
+            "checked_at": time.time(),
+        }
+        DEPENDENCY_UP.labels(name).set(1 if result["status"] == "up" else 0)
+        DEPENDENCY_PROBE_DURATION.labels(name).observe(latency)
+
+    def dependency(self, name: str) -> Optional[dict]:
+        result = self._results.get(name)
+        if result is None:
+            return None
+        stale_after = self.stale_after or 3 * self._intervals[name]
+        if result["status"] == "up" and time.time() - result["checked_at"] > stale_after:
+            return {**result, "status": "stale"}
+        return dict(result)
+
+    def snapshot(self) -> dict:
+        dependencies = {name: self.dependency(name) for name in self._results}
+        critical_up = all(d["status"] == "up" for d in dependencies.values() if d["critical"])
+        all_up = all(d["status"] == "up" for d in dependencies.values())
+
+        return {
+            "status": "ok" if all_up else "degraded" if critical_up else "unavailable",
+            "ready": critical_up and self._task is not None,
+            "interval": self.interval,
+            "dependencies": dependencies,
+        }
+
+
+health_monitor = HealthMonitor()
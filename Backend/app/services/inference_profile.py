@@ -0,0 +1,47 @@
+import json
+import logging
+from functools import lru_cache
+from typing import Dict, Optional
+
+from app.utils.config import CONF_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+# Keys understood by the ML service; see ml_service/inference_profile.py.
+PROFILE_FIELDS = ("roi", "crop", "input_size", "conf", "iou", "max_det", "classes", "tile")
+
+
+@lru_cache(maxsize=256)
+def _parse(raw: str) -> Optional[dict]:
+    # Cached per column value, so a broken profile is logged once rather
+    # than on every frame.
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        logger.warning(f"[PROFILE] Ignoring invalid inference_profile JSON: {e}")
+        return None
+
+    if not isinstance(data, dict):
+        logger.warning("[PROFILE] Ignoring inference_profile that is not a JSON object")
+        return None
+
+    unknown = set(data) - set(PROFILE_FIELDS)
+    if unknown:
+        logger.warning(f"[PROFILE] Ignoring unknown inference_profile fields: {sorted(unknown)}")
+    return {k: v for k, v in data.items() if k in PROFILE_FIELDS and v is not None}
+
+
+def camera_profile(camera: Optional[Dict] = None) -> dict:
+    """Inference options sent to the ML service for ``camera``.
+
+    Starts from the global ``CONF_THRESHOLD`` and applies the camera's
+    ``inference_profile`` column (a JSON object) on top.
+    """
+    profile = {"conf": CONF_THRESHOLD}
+
+    raw = camera.get("inference_profile") if camera else None
+    if isinstance(raw, dict):
+        raw = json.dumps(raw, sort_keys=True)
+    if raw:
+        profile.update(_parse(raw) or {})
+    return profile
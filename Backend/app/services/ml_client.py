@@ -0,0 +1,227 @@
+import json
+import time
+import asyncio
+import logging
+from typing import List, Optional
+
+import httpx
+from fastapi import HTTPException
+
+from app.utils.config import YOLO_SERVICE_URL, YOLO_BATCH_URL, ML_BATCH_SIZE, FRAME_NORMALIZE, TRACKING_ENABLED
+from app.services.inference_profile import camera_profile
+from app.services.frame_normalizer import normalize_frame
+from app.utils.logging import request_id_var
+from app.utils.metrics import ML_REQUEST_DURATION
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+_sync_client: Optional[httpx.Client] = None
+
+
+def get_ml_client() -> httpx.AsyncClient:
+    global _client
+
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _client
+
+
+def get_sync_ml_client() -> httpx.Client:
+    global _sync_client
+
+    if _sync_client is None or _sync_client.is_closed:
+        _sync_client = httpx.Client(
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=10),
+        )
+    return _sync_client
+
+
+async def close_ml_client():
+    global _client, _sync_client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
+
+
+def _failure_label(exc: Exception) -> str:
+    return "timeout" if isinstance(exc, httpx.TimeoutException) else "error"
+
+
+def _trace_headers() -> dict:
+    request_id = request_id_var.get()
+    return {"X-Request-ID": request_id} if request_id != "-" else {}
+
+
+def _profile_form(profile: Optional[dict], session: Optional[str] = None) -> dict:
+    # Always sent, so CONF_THRESHOLD applies even without a camera profile.
+    form = {"profile": json.dumps(profile if profile is not None else camera_profile())}
+    if session and TRACKING_ENABLED:
+        form["session"] = session
+    return form
+
+
+async def _off_loop(fn, *args):
+    # Re-encoding a large frame takes milliseconds; keep it off the loop.
+    if FRAME_NORMALIZE:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+
+async def _post(endpoint: str, url: str, files, data: dict) -> httpx.Response:
+    start = time.perf_counter()
+    status = "error"
+    try:
+        res = await get_ml_client().post(url, files=files, data=data, headers=_trace_headers())
+        status = str(res.status_code)
+        return res
+    except Exception as e:
+        status = _failure_label(e)
+        raise
+    finally:
+        ML_REQUEST_DURATION.labels(endpoint, status).observe(time.perf_counter() - start)
+
+
+def _post_sync(endpoint: str, url: str, files, data: dict) -> httpx.Response:
+    start = time.perf_counter()
+    status = "error"
+    try:
+        res = get_sync_ml_client().post(url, files=files, data=data, headers=_trace_headers())
+        status = str(res.status_code)
+        return res
+    except Exception as e:
+        status = _failure_label(e)
+        raise
+    finally:
+        ML_REQUEST_DURATION.labels(endpoint, status).observe(time.perf_counter() - start)
+
+
+def _check_response(res: httpx.Response) -> dict:
+    if res.status_code != 200:
+        logger.error(f"[DETECT] HF returned {res.status_code}: {res.text}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"HF ERROR {res.status_code}: {res.text}",
+        )
+
+    return res.json()
+
+
+async def detect_image(
+    image_bytes: bytes,
+    filename: str = "frame.jpg",
+    content_type: str = "image/jpeg",
+    profile: Optional[dict] = None,
+    session: Optional[str] = None,
+) -> dict:
+    res = await _post(
+        "frame",
+        YOLO_SERVICE_URL,
+        {"file": await _off_loop(normalize_frame, image_bytes, filename, content_type, profile)},
+        _profile_form(profile, session),
+    )
+    return _check_response(res)
+
+
+def detect_image_sync(
+    image_bytes: bytes,
+    filename: str = "frame.jpg",
+    content_type: str = "image/jpeg",
+    profile: Optional[dict] = None,
+    session: Optional[str] = None,
+) -> dict:
+    res = _post_sync(
+        "frame",
+        YOLO_SERVICE_URL,
+        {"file": normalize_frame(image_bytes, filename, content_type, profile)},
+        _profile_form(profile, session),
+    )
+    return _check_response(res)
+
+
+def _batch_files(frames: List[bytes], profile: Optional[dict]) -> list:
+    return [
+        ("files", normalize_frame(frame, f"frame_{i}.jpg", "image/jpeg", profile))
+        for i, frame in enumerate(frames)
+    ]
+
+
+def _batch_supported(res: httpx.Response) -> bool:
+    return res.status_code not in (404, 405)
+
+
+async def detect_batch(
+    frames: List[bytes], profile: Optional[dict] = None, session: Optional[str] = None
+) -> List[dict]:
+    """Detect on many frames, in groups of ``ML_BATCH_SIZE`` per request.
+
+    Falls back to one request per frame when the ML service has no batch
+    endpoint. Results keep the input order; a frame the ML service could
+    not decode comes back as ``{"error": ...}``. With a ``session`` the
+    frames are tracked as consecutive frames of that stream.
+    """
+    results: List[dict] = []
+    form = _profile_form(profile, session)
+
+    for start in range(0, len(frames), ML_BATCH_SIZE):
+        chunk = frames[start:start + ML_BATCH_SIZE]
+        if YOLO_BATCH_URL:
+            files = await _off_loop(_batch_files, chunk, profile)
+            res = await _post("batch", YOLO_BATCH_URL, files, form)
+            if _batch_supported(res):
+                results.extend(_check_response(res)["results"])
+                continue
+        for frame in chunk:
+            results.append(await detect_image(frame, profile=profile, session=session))
+
+    return results
+
+
+def detect_batch_sync(
+    frames: List[bytes], profile: Optional[dict] = None, session: Optional[str] = None
+) -> List[dict]:
+    results: List[dict] = []
+    form = _profile_form(profile, session)
+
+    for start in range(0, len(frames), ML_BATCH_SIZE):
+        chunk = frames[start:start + ML_BATCH_SIZE]
+        if YOLO_BATCH_URL:
+            res = _post_sync("batch", YOLO_BATCH_URL, _batch_files(chunk, profile), form)
+            if _batch_supported(res):
+                results.extend(_check_response(res)["results"])
+                continue
+        for frame in chunk:
+            results.append(detect_image_sync(frame, profile=profile, session=session))
+
+    return results
+
+
+def summarize(data: dict) -> dict:
+    detections = data.get("detections", [])
+    count = data.get("count", 0)
+
+    max_conf = max(
+        (d.get("confidence", 0.0) for d in detections),
+        default=0.0,
+    )
+
+    return {
+        "is_dirty": count > 0,
+        "confidence": max_conf,
+        "count": count,
+        "detections": detections,
+        "stage": data.get("stage", "detector"),
+        "model_version": data.get("model_version"),
+        # Set when the ML service tracked the frame (see ml_service/tracking.py).
+        "tracked": "tracks" in data,
+        "new_tracks": (data.get("tracks") or {}).get("new", 0),
+        "ended_tracks": (data.get("tracks") or {}).get("ended", 0),
+    }
@@ -1,11 +1,13 @@
-import time
 import logging
 from threading import Event
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from sqlalchemy import text
-from app.utils.config import ENABLE_DB
+from app.utils.config import ENABLE_DB, YOLO_SERVICE_URL
 from app.store.db import get_db_connection
+from app.services.capture import CaptureEngine, camera_source
+from app.services.inference_profile import camera_profile
+from app.services.ml_client import detect_image_sync, summarize
 
 logger = logging.getLogger(__name__)
 
@@ -46,13 +48,31 @@ def get_active_email_recipients() -> List[str]:
         return []
 
 
-def monitor_loop(stop_event: Event):
-    logger.warning(
-        "[MONITOR] Background monitoring running in IDLE mode. "
-        "RTSP capture is disabled by design."
+def detect_camera_frame(camera: Dict, frame: bytes):
+    from app.routes.detection import dispatch_result
+
+    source = camera_source(camera)
+    result = summarize(detect_image_sync(frame, profile=camera_profile(camera), session=source))
+    logger.info(
+        "[MONITOR] %s: is_dirty=%s, count=%d, conf=%.2f",
+        source, result["is_dirty"], result["count"], result["confidence"],
     )
+    dispatch_result(source, result, frame)
+    return result
+
+
+engine: Optional[CaptureEngine] = None
+
+
+def monitor_loop(stop_event: Event):
+    global engine
+
+    if not YOLO_SERVICE_URL:
+        logger.error("[MONITOR] YOLO_SERVICE_URL not configured, monitor disabled")
+        return
 
-    while not stop_event.is_set():
-        time.sleep(30)
+    logger.info("[MONITOR] Starting server-side capture engine")
+    engine = CaptureEngine(get_cameras, detect_camera_frame)
+    engine.run(stop_event)
 
     logger.info("[MONITOR] Stopped gracefully")
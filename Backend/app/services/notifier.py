@@ -0,0 +1,240 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from app.utils.config import NOTIFY_INTERVAL, NOTIFY_MAX_PER_HOUR, NOTIFY_MAX_SOURCES
+from app.utils.logging import bind_request_id, request_id_var
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Digest:
+    source: str
+    count: int
+    best_confidence: float
+    best_image: Optional[bytes]
+    first_at: float
+    last_at: float
+    best_detections: Optional[List[dict]] = None
+    request_id: Optional[str] = None
+
+
+class _SourceState:
+    __slots__ = ("last_sent", "pending", "timer")
+
+    def __init__(self):
+        self.last_sent = 0.0
+        self.pending: Optional[Digest] = None
+        self.timer: Optional[threading.Timer] = None
+
+
+class NotificationScheduler:
+    """Folds dirty detections into at most one email per source per cooldown.
+
+    The first detection for a source is delivered immediately; anything that
+    arrives during the cooldown is merged into a pending digest (count plus
+    the highest-confidence image) that is flushed when the cooldown expires.
+    A global token bucket caps deliveries across all sources.
+
+    Sources come from request fields, so their state is bounded: a source
+    is forgotten once its cooldown has passed with nothing pending, and
+    beyond ``max_sources`` the least recently seen one is evicted (its
+    pending digest, if any, is dropped and counted).
+    """
+
+    def __init__(
+        self,
+        deliver: Callable[[Digest], bool],
+        cooldown: float = NOTIFY_INTERVAL,
+        max_per_hour: int = NOTIFY_MAX_PER_HOUR,
+        max_sources: int = NOTIFY_MAX_SOURCES,
+    ):
+        self._deliver = deliver
+        self._cooldown = max(0.0, float(cooldown))
+        self._capacity = max(1, int(max_per_hour))
+        self._refill_rate = self._capacity / 3600.0
+        self._tokens = float(self._capacity)
+        self._refilled_at = time.monotonic()
+        self._max_sources = max(1, int(max_sources))
+        self._sources: "OrderedDict[str, _SourceState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "received": 0,
+            "sent": 0,
+            "failed": 0,
+            "suppressed": 0,
+            "rate_limited": 0,
+            "evicted": 0,
+            "dropped": 0,
+        }
+
+    def submit(
+        self,
+        source: str,
+        confidence: float,
+        image_data: Optional[bytes] = None,
+        detections: Optional[List[dict]] = None,
+    ):
+        now = time.monotonic()
+
+        with self._lock:
+            self._stats["received"] += 1
+            state = self._sources.get(source)
+            if state is None:
+                self._evict(now)
+                state = self._sources[source] = _SourceState()
+            else:
+                self._sources.move_to_end(source)
+
+            digest = state.pending
+            if digest is None:
+                digest = Digest(
+                    source=source,
+                    count=0,
+                    best_confidence=0.0,
+                    best_image=None,
+                    first_at=time.time(),
+                    last_at=time.time(),
+                    request_id=request_id_var.get(),
+                )
+                state.pending = digest
+
+            digest.count += 1
+            digest.last_at = time.time()
+            if image_data is not None and (digest.best_image is None or confidence >= digest.best_confidence):
+                digest.best_image = image_data
+                digest.best_detections = detections
+            digest.best_confidence = max(digest.best_confidence, confidence)
+
+            ready = None
+            wait = self._cooldown_remaining(state, now)
+            if wait > 0:
+                self._stats["suppressed"] += 1
+                self._schedule(source, state, wait)
+            elif self._take_token(now):
+                ready = self._pop(state, now)
+            else:
+                self._stats["rate_limited"] += 1
+                self._schedule(source, state, self._token_wait(now))
+
+        if ready is not None:
+            self._send(ready)
+
+    def flush(self, source: str, expected: Optional[_SourceState] = None):
+        now = time.monotonic()
+
+        with self._lock:
+            state = self._sources.get(source)
+            # A timer of an evicted source must not touch its successor.
+            if state is None or (expected is not None and state is not expected):
+                return
+            state.timer = None
+            if state.pending is None:
+                return
+
+            wait = self._cooldown_remaining(state, now)
+            if wait > 0:
+                self._schedule(source, state, wait)
+                return
+            if not self._take_token(now):
+                self._stats["rate_limited"] += 1
+                self._schedule(source, state, self._token_wait(now))
+                return
+
+            ready = self._pop(state, now)
+
+        self._send(ready)
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                **self._stats,
+                "pending": sum(1 for s in self._sources.values() if s.pending),
+                "sources": len(self._sources),
+                "tokens": round(self._tokens, 2),
+                "cooldown_seconds": self._cooldown,
+                "max_per_hour": self._capacity,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            for state in self._sources.values():
+                if state.timer:
+                    state.timer.cancel()
+                    state.timer = None
+
+    def _idle(self, state: _SourceState, now: float) -> bool:
+        return state.pending is None and state.timer is None and self._cooldown_remaining(state, now) <= 0
+
+    def _evict(self, now: float):
+        """Make room for one more source; called with the lock held."""
+        # Least recently seen first: forget idle sources, they carry no state
+        # that would change the next decision.
+        for source in [s for s, state in self._sources.items() if self._idle(state, now)]:
+            del self._sources[source]
+            self._stats["evicted"] += 1
+
+        while len(self._sources) >= self._max_sources:
+            source, state = self._sources.popitem(last=False)
+            self._stats["evicted"] += 1
+            if state.timer is not None:
+                state.timer.cancel()
+            if state.pending is not None:
+                self._stats["dropped"] += 1
+                logger.warning(
+                    f"[NOTIFY] Dropped pending digest for source={source} "
+                    f"({state.pending.count} detections): more than {self._max_sources} sources"
+                )
+
+    def _pop(self, state: _SourceState, now: float) -> Digest:
+        digest = state.pending
+        state.pending = None
+        state.last_sent = now
+        return digest
+
+    def _send(self, digest: Digest):
+        try:
+            with bind_request_id(digest.request_id):
+                ok = bool(self._deliver(digest))
+        except Exception:
+            logger.exception(f"[NOTIFY] Delivery failed for source={digest.source}")
+            ok = False
+
+        with self._lock:
+            self._stats["sent" if ok else "failed"] += 1
+
+    def _schedule(self, source: str, state: _SourceState, delay: float):
+        if state.timer is not None:
+            return
+        timer = threading.Timer(max(delay, 0.01), self.flush, args=(source, state))
+        timer.daemon = True
+        state.timer = timer
+        timer.start()
+
+    def _cooldown_remaining(self, state: _SourceState, now: float) -> float:
+        if not state.last_sent:
+            return 0.0
+        return state.last_sent + self._cooldown - now
+
+    def _refill(self, now: float):
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        self._tokens = min(self._capacity, self._tokens + elapsed * self._refill_rate)
+
+    def _take_token(self, now: float) -> bool:
+        self._refill(now)
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+    def _token_wait(self, now: float) -> float:
+        self._refill(now)
+        if self._tokens >= 1.0:
+            return 0.0
+        return (1.0 - self._tokens) / self._refill_rate
@@ -0,0 +1,126 @@
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+from app.utils.config import (
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_TTL_HISTORY,
+    RESPONSE_CACHE_TTL_RECIPIENTS,
+)
+from app.utils.metrics import RESPONSE_CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+def _encode(payload: Any) -> Tuple[bytes, str]:
+    # Same encoding as FastAPI's JSONResponse.
+    body = json.dumps(
+        jsonable_encoder(payload),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    return body, f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+class ResponseCache:
+    """Read-through cache of encoded JSON responses for one resource.
+
+    Entries live for ``ttl`` seconds and at most ``max_entries`` are kept
+    (least recently used first out). Write paths call ``invalidate()``;
+    a load that started before an invalidation is returned but not stored,
+    so it cannot put stale rows back. Invalidation is per process, so with
+    several replicas the TTL bounds how stale another replica can be.
+    """
+
+    def __init__(self, name: str, ttl: float, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, bytes, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.stats_counts = {"hits": 0, "misses": 0, "not_modified": 0, "invalidations": 0}
+
+    def _count(self, outcome: str):
+        self.stats_counts[outcome] += 1
+        RESPONSE_CACHE_REQUESTS.labels(self.name, outcome).inc()
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Tuple[bytes, str]:
+        """Encoded body and ETag for ``key``, calling ``loader`` on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._count("hits")
+                return entry[1], entry[2]
+            generation = self._generation
+
+        body, etag = _encode(loader())
+
+        with self._lock:
+            self._count("misses")
+            if self.ttl > 0 and generation == self._generation:
+                self._entries[key] = (now + self.ttl, body, etag)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return body, etag
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self.stats_counts["invalidations"] += 1
+
+    def response(self, request: Request, key: Hashable, loader: Callable[[], Any]) -> Response:
+        """JSON response for ``key`` with an ETag; 304 when the client already has it."""
+        body, etag = self.get(key, loader)
+        # no-cache: clients may keep the body but must revalidate each time.
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        tags = _parse_if_none_match(request.headers.get("if-none-match"))
+        if etag in tags or "*" in tags:
+            with self._lock:
+                self._count("not_modified")
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.stats_counts)
+            entries = len(self._entries)
+        lookups = counts["hits"] + counts["misses"]
+        return {
+            **counts,
+            "entries": entries,
+            "ttl": self.ttl,
+            # Every hit is a query the database did not have to run.
+            "db_queries_avoided": counts["hits"],
+            "hit_rate": round(counts["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
+def _parse_if_none_match(value: Optional[str]) -> set:
+    if not value:
+        return set()
+    # Weak validators compare equal for If-None-Match (RFC 9110 13.1.2).
+    return {tag.strip().removeprefix("W/") for tag in value.split(",")}
+
+
+history_cache = ResponseCache("history", RESPONSE_CACHE_TTL_HISTORY)
+recipients_cache = ResponseCache("email_recipients", RESPONSE_CACHE_TTL_RECIPIENTS)
+
+
+def cache_stats() -> Dict[str, dict]:
+    return {cache.name: cache.stats() for cache in (history_cache, recipients_cache)}
@@ -0,0 +1,161 @@
+import io
+import time
+import logging
+import threading
+from collections import deque
+from typing import Optional, Tuple
+
+from app.utils.config import (
+    MONITOR_MIN_INTERVAL,
+    MONITOR_DECAY_FACTOR,
+    MONITOR_CHANGE_THRESHOLD,
+    MONITOR_INFERENCE_BUDGET,
+)
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except Exception:
+    PIL_AVAILABLE = False
+
+_SIGNATURE_SIZE = (32, 18)
+_RATE_WINDOW = 60.0
+
+
+def frame_signature(frame: bytes) -> Tuple[int, Optional[bytes]]:
+    """Cheap fingerprint used to spot visual change between frames.
+
+    With Pillow the JPEG is decoded in draft mode (DCT-scaled, so only a
+    fraction of the pixels are materialised) down to a tiny grayscale
+    thumbnail. Without Pillow only the encoded size is available, which
+    still tracks scene complexity reasonably well for JPEG.
+    """
+    if not PIL_AVAILABLE:
+        return len(frame), None
+
+    try:
+        img = Image.open(io.BytesIO(frame))
+        img.draft("L", (_SIGNATURE_SIZE[0] * 4, _SIGNATURE_SIZE[1] * 4))
+        thumb = img.convert("L").resize(_SIGNATURE_SIZE, Image.BILINEAR)
+        return len(frame), thumb.tobytes()
+    except Exception:
+        return len(frame), None
+
+
+def signature_change(prev: Tuple[int, Optional[bytes]], cur: Tuple[int, Optional[bytes]]) -> float:
+    """Return visual change in [0, 1] between two frame signatures."""
+    prev_size, prev_px = prev
+    cur_size, cur_px = cur
+
+    if prev_px is not None and cur_px is not None and len(prev_px) == len(cur_px):
+        return sum(abs(a - b) for a, b in zip(prev_px, cur_px)) / (255.0 * len(cur_px))
+
+    if not prev_size:
+        return 0.0
+    return min(1.0, abs(cur_size - prev_size) / prev_size)
+
+
+class AdaptiveRate:
+    """Per-camera detection interval that reacts to results.
+
+    A dirty result or a visual change snaps the interval down to
+    ``min_interval``; each clean result stretches it by ``decay`` until it
+    is back at ``max_interval``.
+    """
+
+    def __init__(
+        self,
+        max_interval: float,
+        min_interval: float = MONITOR_MIN_INTERVAL,
+        decay: float = MONITOR_DECAY_FACTOR,
+        change_threshold: float = MONITOR_CHANGE_THRESHOLD,
+    ):
+        self.max_interval = max(max_interval, min_interval)
+        self.min_interval = min(min_interval, self.max_interval)
+        self.decay = max(1.0, decay)
+        self.change_threshold = change_threshold
+        self.interval = self.max_interval
+        self.signature: Optional[Tuple[int, Optional[bytes]]] = None
+        self.boosts = 0
+        self._dispatches = deque()
+
+    def observe_frame(self, frame: bytes) -> bool:
+        sig = frame_signature(frame)
+        prev = self.signature
+        self.signature = sig
+
+        if prev is None:
+            return False
+        if signature_change(prev, sig) >= self.change_threshold:
+            self._boost()
+            return True
+        return False
+
+    def observe_result(self, is_dirty: bool):
+        if is_dirty:
+            self._boost()
+        else:
+            self.interval = min(self.max_interval, self.interval * self.decay)
+
+    def record_dispatch(self, now: float):
+        self._dispatches.append(now)
+        cutoff = now - _RATE_WINDOW
+        while self._dispatches and self._dispatches[0] < cutoff:
+            self._dispatches.popleft()
+
+    def effective_rate(self, now: float) -> float:
+        cutoff = now - _RATE_WINDOW
+        recent = sum(1 for t in self._dispatches if t >= cutoff)
+        return recent / _RATE_WINDOW
+
+    def _boost(self):
+        if self.interval > self.min_interval:
+            self.boosts += 1
+        self.interval = self.min_interval
+
+
+class InferenceBudget:
+    """Global token bucket capping detections per second across cameras."""
+
+    def __init__(self, rate: float = MONITOR_INFERENCE_BUDGET):
+        self.rate = max(0.01, rate)
+        self.capacity = max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._refilled_at = time.monotonic()
+        self._used = deque()
+        self._denied = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self, now: float) -> bool:
+        with self._lock:
+            self._refill(now)
+            if self._tokens < 1.0:
+                self._denied += 1
+                return False
+            self._tokens -= 1.0
+            self._used.append(now)
+            while self._used[0] < now - _RATE_WINDOW:
+                self._used.popleft()
+            return True
+
+    def snapshot(self, now: float) -> dict:
+        with self._lock:
+            self._refill(now)
+            cutoff = now - _RATE_WINDOW
+            while self._used and self._used[0] < cutoff:
+                self._used.popleft()
+            used_rate = len(self._used) / _RATE_WINDOW
+            return {
+                "budget_per_second": self.rate,
+                "used_per_second": round(used_rate, 3),
+                "utilisation": round(used_rate / self.rate, 3),
+                "tokens": round(self._tokens, 2),
+                "deferred": self._denied,
+            }
+
+    def _refill(self, now: float):
+        elapsed = max(0.0, now - self._refilled_at)
+        self._refilled_at = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
@@ -0,0 +1,326 @@
+import os
+import re
+import time
+import uuid
+import logging
+import tempfile
+import threading
+import subprocess
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from app.utils.config import (
+    CAPTURE_FFMPEG,
+    ML_BATCH_SIZE,
+    VIDEO_JOB_CONCURRENCY,
+    VIDEO_JOB_HISTORY,
+    VIDEO_JOB_SAVE_CLEAN,
+    VIDEO_JOB_TIMEOUT,
+)
+from app.services.capture import extract_jpegs, stderr_tail
+from app.services.ml_client import detect_batch_sync, summarize
+from app.utils.logging import bind_request_id
+
+logger = logging.getLogger(__name__)
+
+_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+_REMOTE_PREFIXES = ("http://", "https://", "rtsp://")
+# Container demuxers allowed for uploaded/local files. Playlist and
+# reference formats (hls, concat, ...) are excluded so a crafted file
+# cannot make ffmpeg open other local files or URLs.
+_LOCAL_FORMATS = "mov,mp4,m4a,3gp,3g2,mj2,matroska,webm,avi,mpegts,flv,asf,mpeg,mjpeg"
+
+
+def is_remote(path: str) -> bool:
+    return path.startswith(_REMOTE_PREFIXES)
+
+
+def input_args(path: str) -> List[str]:
+    if is_remote(path):
+        return ["-i", path]
+    return ["-protocol_whitelist", "file", "-format_whitelist", _LOCAL_FORMATS, "-i", path]
+
+
+def probe_duration(path: str) -> Optional[float]:
+    try:
+        proc = subprocess.run(
+            [CAPTURE_FFMPEG, "-hide_banner", "-nostdin", *input_args(path)],
+            capture_output=True,
+            timeout=min(30, VIDEO_JOB_TIMEOUT or 30),
+        )
+    except Exception as e:
+        logger.warning(f"[VIDEO] Could not probe {path}: {e}")
+        return None
+
+    match = _DURATION_RE.search(proc.stderr.decode("utf-8", "replace"))
+    if not match:
+        return None
+    h, m, s = match.groups()
+    return int(h) * 3600 + int(m) * 60 + float(s)
+
+
+class VideoJob:
+    def __init__(self, path: str, stride: float, source: Optional[str], cleanup: bool):
+        self.id = uuid.uuid4().hex[:12]
+        self.path = path
+        self.stride = stride
+        self.source = source or f"video-{self.id}"
+        self.cleanup = cleanup
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.duration: Optional[float] = None
+        self.frames = 0
+        self.failed_frames = 0
+        self.dirty_frames = 0
+        self.saved = 0
+        self.max_confidence = 0.0
+        self._cancel = threading.Event()
+        self._timed_out = False
+        self._proc: Optional[subprocess.Popen] = None
+
+    @property
+    def progress(self) -> Optional[float]:
+        if self.status == "completed":
+            return 1.0
+        if not self.duration:
+            return None
+        return round(min(1.0, self.frames * self.stride / self.duration), 3)
+
+    def cancel(self):
+        self._cancel.set()
+        self._kill()
+
+    def expire(self):
+        self._timed_out = True
+        self._kill()
+
+    def _kill(self):
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            proc.kill()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "source": self.source,
+            "stride_seconds": self.stride,
+            "duration_seconds": self.duration,
+            "progress": self.progress,
+            "frames": self.frames,
+            "failed_frames": self.failed_frames,
+            "dirty_frames": self.dirty_frames,
+            "saved": self.saved,
+            "max_confidence": round(self.max_confidence, 3),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class VideoJobManager:
+    """Queue of offline video analyses run on a small thread pool.
+
+    Frames are stream-decoded by ffmpeg at one frame per ``stride`` seconds,
+    sent to the ML service ``ML_BATCH_SIZE`` at a time and written to
+    ``floor_events`` with one bulk insert per batch, so memory stays flat
+    regardless of video length. A job running longer than
+    ``VIDEO_JOB_TIMEOUT`` has its ffmpeg killed and is marked failed.
+    """
+
+    def __init__(self, concurrency: int = VIDEO_JOB_CONCURRENCY, history: int = VIDEO_JOB_HISTORY):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, concurrency),
+            thread_name_prefix="video-job",
+        )
+        self._history = max(1, history)
+        self._jobs: "OrderedDict[str, VideoJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, path: str, stride: float, source: Optional[str] = None, cleanup: bool = False) -> VideoJob:
+        job = VideoJob(path, stride, source, cleanup)
+
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+
+        self._executor.submit(self._run, job)
+        logger.info(f"[VIDEO] Job {job.id} queued (stride={stride}s)")
+        return job
+
+    def get(self, job_id: str) -> Optional[VideoJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[VideoJob]:
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id: str) -> Optional[VideoJob]:
+        job = self.get(job_id)
+        if job is not None and job.status in ("queued", "running"):
+            job.cancel()
+            if job.status == "queued":
+                job.status = "cancelled"
+        return job
+
+    def shutdown(self):
+        for job in self.list():
+            if job.status in ("queued", "running"):
+                job.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _evict(self):
+        finished = [
+            jid for jid, j in self._jobs.items()
+            if j.status in ("completed", "failed", "cancelled")
+        ]
+        while len(self._jobs) > self._history and finished:
+            del self._jobs[finished.pop(0)]
+
+    def _run(self, job: VideoJob):
+        with bind_request_id(f"job-{job.id}"):
+            try:
+                if job._cancel.is_set():
+                    job.status = "cancelled"
+                    return
+
+                job.status = "running"
+                job.started_at = time.time()
+                job.duration = probe_duration(job.path)
+                self._process(job)
+
+                if job._cancel.is_set():
+                    job.status = "cancelled"
+                elif job.error:
+                    job.status = "failed"
+                else:
+                    job.status = "completed"
+
+            except Exception as e:
+                logger.exception(f"[VIDEO] Job {job.id} failed")
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                job.finished_at = time.time()
+                job._proc = None
+                if job.cleanup:
+                    try:
+                        os.remove(job.path)
+                    except OSError:
+                        pass
+                logger.info(
+                    f"[VIDEO] Job {job.id} {job.status}: frames={job.frames}, "
+                    f"dirty={job.dirty_frames}, saved={job.saved}"
+                )
+
+    def _process(self, job: VideoJob):
+        timer = None
+        if VIDEO_JOB_TIMEOUT > 0:
+            timer = threading.Timer(VIDEO_JOB_TIMEOUT, job.expire)
+            timer.daemon = True
+            timer.start()
+
+        # stderr goes to a temp file: a pipe would fill up with decode errors
+        # of a corrupt video while only stdout is read, and block ffmpeg.
+        with tempfile.TemporaryFile() as stderr:
+            job._proc = subprocess.Popen(
+                [
+                    CAPTURE_FFMPEG, "-hide_banner", "-loglevel", "error", "-nostdin",
+                    *input_args(job.path),
+                    "-an",
+                    "-vf", f"fps=1/{job.stride}",
+                    "-f", "image2pipe",
+                    "-vcodec", "mjpeg",
+                    "-q:v", "5",
+                    "pipe:1",
+                ],
+                stdout=subprocess.PIPE,
+                stderr=stderr,
+                bufsize=0,
+            )
+            try:
+                self._read_frames(job)
+            except BaseException:
+                # Don't leave ffmpeg running (and holding the upload open)
+                # when saving a batch fails.
+                job._kill()
+                job._proc.wait()
+                raise
+            finally:
+                if timer is not None:
+                    timer.cancel()
+
+            returncode = job._proc.wait()
+            if job._timed_out:
+                job.error = f"Timed out after {VIDEO_JOB_TIMEOUT:.0f}s"
+            elif returncode != 0 and not job._cancel.is_set():
+                job.error = stderr_tail(stderr) or f"ffmpeg exited with {returncode}"
+
+    def _read_frames(self, job: VideoJob):
+        stdout = job._proc.stdout
+        buf = bytearray()
+        batch: List[bytes] = []
+
+        while not job._cancel.is_set():
+            chunk = stdout.read(65536)
+            if not chunk:
+                break
+            buf.extend(chunk)
+            for frame in extract_jpegs(buf):
+                batch.append(frame)
+                if len(batch) >= ML_BATCH_SIZE:
+                    self._flush(job, batch)
+                    batch = []
+
+        if batch and not job._cancel.is_set():
+            self._flush(job, batch)
+
+    def _flush(self, job: VideoJob, batch: List[bytes]):
+        from app.routes.detection import save_detections_bulk
+
+        try:
+            results = detect_batch_sync(batch, session=f"video-{job.id}")
+        except Exception as e:
+            # One failed ML call only loses its own frames, like a per-item error.
+            logger.warning(f"[VIDEO] Job {job.id}: batch of {len(batch)} frames failed: {e}")
+            job.failed_frames += len(batch)
+            job.frames += len(batch)
+            return
+
+        rows = []
+
+        for i, (frame, data) in enumerate(zip(batch, results)):
+            offset = (job.frames + i) * job.stride
+            if data.get("error"):
+                job.failed_frames += 1
+                continue
+
+            result = summarize(data)
+            job.max_confidence = max(job.max_confidence, result["confidence"])
+            if result["is_dirty"]:
+                job.dirty_frames += 1
+                # With tracking, only frames where a new spill appears are kept.
+                if result["tracked"] and not result["new_tracks"]:
+                    continue
+            elif not VIDEO_JOB_SAVE_CLEAN:
+                continue
+
+            rows.append({
+                "source": job.source,
+                "is_dirty": result["is_dirty"],
+                "confidence": result["confidence"],
+                "image_data": frame if result["is_dirty"] else None,
+                "notes": f"Video t={offset:.1f}s, detections: {result['count']}",
+            })
+
+        job.frames += len(batch)
+        job.saved += save_detections_bulk(rows)
+
+
+video_jobs = VideoJobManager()
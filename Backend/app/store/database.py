@@ -1,7 +1,8 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from typing import Generator
 import logging
+import sqlite3
 
 from app.utils.config import (
     DB_HOST,
@@ -9,8 +10,10 @@ from app.utils.config import (
     DB_USER,
     DB_PASSWORD,
     DB_NAME,
+    DATABASE_URL,
     ENABLE_DB,
 )
+from app.utils.metrics import instrument_engine
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +22,8 @@ _SessionLocal = None
 
 
 def get_database_url() -> str:
+    if DATABASE_URL:
+        return DATABASE_URL
     return f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
 
@@ -32,15 +37,24 @@ def init_engine():
     if _engine is not None:
         return _engine
 
+    url = get_database_url()
+    connect_args = {}
+    if url.startswith("sqlite"):
+        # Worker threads share pooled connections; TIMESTAMP columns come back as datetime like with MySQL.
+        connect_args = {"check_same_thread": False, "detect_types": sqlite3.PARSE_DECLTYPES}
+
     try:
         _engine = create_engine(
-            get_database_url(),
+            url,
+            connect_args=connect_args,
             pool_pre_ping=True,
             pool_recycle=300,
             pool_size=5,
             max_overflow=10,
         )
 
+        instrument_engine(_engine)
+
         _SessionLocal = sessionmaker(
             autocommit=False,
             autoflush=False,
@@ -73,17 +87,3 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
-
-
-def test_connection() -> bool:
-    if not ENABLE_DB:
-        return False
-
-    try:
-        engine = get_engine()
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-        return True
-    except Exception as e:
-        logger.error(f"DB test failed: {e}")
-        return False
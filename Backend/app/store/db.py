@@ -71,16 +71,3 @@ def execute_update(query: str, params: tuple) -> int:
         result = conn.execute(text(named_query), named_params)
         conn.commit()
         return result.rowcount
-
-
-def is_db_available() -> bool:
-    if not ENABLE_DB:
-        return False
-
-    try:
-        with get_db_connection() as conn:
-            conn.execute(text("SELECT 1"))
-        return True
-    except Exception as e:
-        logger.error(f"DB availability check failed: {e}")
-        return False
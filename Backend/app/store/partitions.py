@@ -0,0 +1,165 @@
+import logging
+from datetime import date, datetime, timedelta
+from threading import Event
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.store.db import get_db_connection
+from app.utils.config import (
+    FLOOR_EVENTS_PARTITION,
+    FLOOR_EVENTS_PARTITIONS_AHEAD,
+    FLOOR_EVENTS_RETENTION_DAYS,
+    PARTITION_MAINTENANCE_INTERVAL,
+)
+
+logger = logging.getLogger(__name__)
+
+TABLE = "floor_events"
+# Catch-all partition above the newest boundary, so an insert never fails
+# if maintenance falls behind. New partitions are split off it while empty.
+MAXVALUE_PARTITION = "pmax"
+
+if FLOOR_EVENTS_PARTITION not in ("month", "day"):
+    raise ValueError(f"FLOOR_EVENTS_PARTITION must be month or day, got {FLOOR_EVENTS_PARTITION!r}")
+
+
+def period_start(day: date, granularity: str = FLOOR_EVENTS_PARTITION) -> date:
+    return day.replace(day=1) if granularity == "month" else day
+
+
+def next_period(start: date, granularity: str = FLOOR_EVENTS_PARTITION) -> date:
+    if granularity == "day":
+        return start + timedelta(days=1)
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def partition_name(start: date, granularity: str = FLOOR_EVENTS_PARTITION) -> str:
+    return start.strftime("p%Y%m" if granularity == "month" else "p%Y%m%d")
+
+
+def partition_clause(name: str, boundary: Optional[date]) -> str:
+    """One partition definition; ``boundary`` is the exclusive upper bound, None for MAXVALUE."""
+    if boundary is None:
+        return f"PARTITION {name} VALUES LESS THAN MAXVALUE"
+    # created_at is a TIMESTAMP, for which UNIX_TIMESTAMP() is the only
+    # partitioning function MySQL allows (and still prunes on).
+    return f"PARTITION {name} VALUES LESS THAN (UNIX_TIMESTAMP('{boundary.isoformat()} 00:00:00'))"
+
+
+def plan_partitions(
+    existing: List[Tuple[str, Optional[date]]],
+    today: date,
+    granularity: str = FLOOR_EVENTS_PARTITION,
+    ahead: int = FLOOR_EVENTS_PARTITIONS_AHEAD,
+    retention_days: int = FLOOR_EVENTS_RETENTION_DAYS,
+) -> Tuple[List[Tuple[str, date]], List[str]]:
+    """Partitions to split off ``pmax`` and partitions to drop.
+
+    ``existing`` is (name, upper boundary) in partition order, with None for
+    MAXVALUE. New partitions cover the current period plus ``ahead`` more.
+    A partition is dropped once its whole range is older than
+    ``retention_days``; the newest bounded partition is always kept.
+    """
+    bounded = [(name, boundary) for name, boundary in existing if boundary is not None]
+    last = bounded[-1][1] if bounded else None
+
+    create = []
+    start = period_start(today, granularity)
+    for _ in range(ahead + 1):
+        end = next_period(start, granularity)
+        if last is None or end > last:
+            create.append((partition_name(start, granularity), end))
+        start = end
+
+    drop = []
+    if retention_days > 0:
+        cutoff = today - timedelta(days=retention_days)
+        drop = [name for name, boundary in bounded[:-1] if boundary <= cutoff]
+    return create, drop
+
+
+def existing_partitions(conn: Connection) -> List[Tuple[str, Optional[date]]]:
+    # FROM_UNIXTIME in SQL, so boundaries are read in the same session time
+    # zone UNIX_TIMESTAMP() used to write them.
+    rows = conn.execute(
+        text("""
+            SELECT
+                PARTITION_NAME,
+                CASE WHEN PARTITION_DESCRIPTION = 'MAXVALUE' THEN NULL
+                     ELSE FROM_UNIXTIME(PARTITION_DESCRIPTION) END
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table
+                AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION
+        """),
+        {"table": TABLE},
+    ).fetchall()
+    return [(r[0], r[1].date() if isinstance(r[1], datetime) else r[1]) for r in rows]
+
+
+def maintain_partitions() -> dict:
+    """Create upcoming floor_events partitions and drop expired ones.
+
+    Splitting empty future ranges off ``pmax`` and DROP PARTITION are both
+    metadata operations, so this never rewrites or deletes rows one by one.
+    """
+    with get_db_connection() as conn:
+        if conn.dialect.name != "mysql":
+            return {"status": "skipped", "reason": f"{conn.dialect.name} has no partitioning"}
+
+        existing = existing_partitions(conn)
+        if not existing:
+            return {"status": "skipped", "reason": f"{TABLE} is not partitioned, run migrate_floor_events.py"}
+        if existing[-1] != (MAXVALUE_PARTITION, None):
+            return {"status": "skipped", "reason": f"last partition must be {MAXVALUE_PARTITION} VALUES LESS THAN MAXVALUE"}
+
+        today = conn.execute(text("SELECT CURDATE()")).scalar()
+        create, drop = plan_partitions(existing, today)
+
+        if create:
+            clauses = [partition_clause(name, boundary) for name, boundary in create]
+            clauses.append(partition_clause(MAXVALUE_PARTITION, None))
+            conn.execute(text(
+                f"ALTER TABLE {TABLE} REORGANIZE PARTITION {MAXVALUE_PARTITION} INTO ({', '.join(clauses)})"
+            ))
+            logger.info(f"[PARTITION] Created {', '.join(name for name, _ in create)}")
+
+        if drop:
+            conn.execute(text(f"ALTER TABLE {TABLE} DROP PARTITION {', '.join(drop)}"))
+            logger.info(f"[PARTITION] Dropped expired {', '.join(drop)}")
+
+            from app.services.response_cache import history_cache
+            history_cache.invalidate()
+
+        return {
+            "status": "ok",
+            "created": [name for name, _ in create],
+            "dropped": drop,
+            "partitions": len(existing) + len(create) - len(drop),
+        }
+
+
+def partition_maintenance_loop(stop_event: Event):
+    """Run ``maintain_partitions`` every interval until ``stop_event`` is set.
+
+    A skipped run (e.g. floor_events not migrated yet) is retried on the
+    next interval, so partitions start being managed as soon as
+    migrate_floor_events.py has run, without a restart.
+    """
+    logger.info(f"[PARTITION] Maintenance every {PARTITION_MAINTENANCE_INTERVAL}s")
+    skipped = None
+
+    while not stop_event.is_set():
+        try:
+            result = maintain_partitions()
+            reason = result.get("reason") if result["status"] == "skipped" else None
+            if reason and reason != skipped:
+                logger.warning(f"[PARTITION] Maintenance skipped: {reason}")
+            elif skipped and not reason:
+                logger.info("[PARTITION] Maintenance resumed")
+            skipped = reason
+        except Exception:
+            logger.exception("[PARTITION] Maintenance failed")
+        stop_event.wait(PARTITION_MAINTENANCE_INTERVAL)
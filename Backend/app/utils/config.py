@@ -14,13 +14,54 @@ DB_PORT = int(os.getenv("DB_PORT", "3306"))
 DB_USER = os.getenv("DB_USER", "")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "")
 DB_NAME = os.getenv("DB_NAME", "")
+# Full SQLAlchemy URL, overrides DB_*; used for local stand-ins such as sqlite:///data/load.db
+DATABASE_URL = os.getenv("DATABASE_URL", "")
 
 ENABLE_MONITOR = os.getenv("ENABLE_MONITOR", "0").lower() in {"1", "true", "yes", "on"}
-ENABLE_DB = bool(DB_HOST and DB_USER and DB_NAME)
+ENABLE_DB = bool(DATABASE_URL or (DB_HOST and DB_USER and DB_NAME))
 
 YOLO_SERVICE_URL = os.getenv("YOLO_SERVICE_URL")
+YOLO_BATCH_URL = os.getenv("YOLO_BATCH_URL") or (
+    YOLO_SERVICE_URL[:-len("/frame")] + "/batch"
+    if YOLO_SERVICE_URL and YOLO_SERVICE_URL.endswith("/detect/frame")
+    else None
+)
+ML_HEALTH_URL = os.getenv("ML_HEALTH_URL") or (
+    YOLO_SERVICE_URL[:-len("/detect/frame")] + "/ready"
+    if YOLO_SERVICE_URL and YOLO_SERVICE_URL.endswith("/detect/frame")
+    else None
+)
+ML_BATCH_SIZE = int(os.getenv("ML_BATCH_SIZE", "8"))
+# Ask the ML service to track detections across frames of a camera/stream
+# and only save and notify when a new spill (track) appears.
+TRACKING_ENABLED = os.getenv("TRACKING_ENABLED", "0").lower() in {"1", "true", "yes", "on"}
+BATCH_MAX_IMAGES = int(os.getenv("BATCH_MAX_IMAGES", "200"))
+BATCH_MAX_BYTES = int(os.getenv("BATCH_MAX_BYTES", str(200 * 1024 * 1024)))
 
 NOTIFY_INTERVAL = int(os.getenv("NOTIFY_INTERVAL", "60"))
+NOTIFY_MAX_PER_HOUR = int(os.getenv("NOTIFY_MAX_PER_HOUR", "30"))
+# Sources tracked for cooldowns; idle ones are forgotten, the oldest evicted beyond this.
+NOTIFY_MAX_SOURCES = int(os.getenv("NOTIFY_MAX_SOURCES", "1000"))
+
+EVENTS_SUBSCRIBER_BUFFER = int(os.getenv("EVENTS_SUBSCRIBER_BUFFER", "100"))
+
+STREAM_MAX_INFLIGHT = int(os.getenv("STREAM_MAX_INFLIGHT", "2"))
+STREAM_PERSIST_INTERVAL = float(os.getenv("STREAM_PERSIST_INTERVAL", "60"))
+
+MONITOR_DETECT_INTERVAL = float(os.getenv("MONITOR_DETECT_INTERVAL", "10"))
+MONITOR_MIN_INTERVAL = float(os.getenv("MONITOR_MIN_INTERVAL", "2"))
+MONITOR_DECAY_FACTOR = float(os.getenv("MONITOR_DECAY_FACTOR", "1.5"))
+MONITOR_CHANGE_THRESHOLD = float(os.getenv("MONITOR_CHANGE_THRESHOLD", "0.08"))
+MONITOR_INFERENCE_BUDGET = float(os.getenv("MONITOR_INFERENCE_BUDGET", "1.0"))
+MONITOR_MAX_CONCURRENCY = int(os.getenv("MONITOR_MAX_CONCURRENCY", "4"))
+MONITOR_REFRESH_INTERVAL = float(os.getenv("MONITOR_REFRESH_INTERVAL", "60"))
+MONITOR_TICK = float(os.getenv("MONITOR_TICK", "0.5"))
+
+CAPTURE_FFMPEG = os.getenv("CAPTURE_FFMPEG", "ffmpeg")
+CAPTURE_FPS = float(os.getenv("CAPTURE_FPS", "2"))
+CAPTURE_STALL_TIMEOUT = float(os.getenv("CAPTURE_STALL_TIMEOUT", "15"))
+CAPTURE_BACKOFF_MIN = float(os.getenv("CAPTURE_BACKOFF_MIN", "1"))
+CAPTURE_BACKOFF_MAX = float(os.getenv("CAPTURE_BACKOFF_MAX", "60"))
 
 SMTP_HOST = os.getenv("SMTP_HOST", "")
 SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
@@ -29,3 +70,62 @@ SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
 SMTP_FROM_EMAIL = os.getenv("SMTP_FROM_EMAIL", "")
 
 CONF_THRESHOLD = float(os.getenv("CONF_THRESHOLD", "0.25"))
+ML_INPUT_SIZE = int(os.getenv("ML_INPUT_SIZE", "640"))
+# ml_service reports boxes in this fixed coordinate space (its REFERENCE_SIZE),
+# whatever input size the model runs at.
+ML_REFERENCE_SIZE = 640
+
+# Downscale/re-encode frames before uploading them to the ML service.
+FRAME_NORMALIZE = os.getenv("FRAME_NORMALIZE", "0").lower() in {"1", "true", "yes", "on"}
+FRAME_MAX_SIDE = int(os.getenv("FRAME_MAX_SIDE", str(ML_INPUT_SIZE)))
+FRAME_FORMAT = os.getenv("FRAME_FORMAT", "jpeg").lower()
+FRAME_QUALITY = int(os.getenv("FRAME_QUALITY", "85"))
+
+ATTACHMENT_MAX_BYTES = int(os.getenv("ATTACHMENT_MAX_BYTES", "150000"))
+ATTACHMENT_MAX_DIM = int(os.getenv("ATTACHMENT_MAX_DIM", "1280"))
+ATTACHMENT_DRAW_BOXES = os.getenv("ATTACHMENT_DRAW_BOXES", "1").lower() in {"1", "true", "yes", "on"}
+
+VIDEO_JOB_CONCURRENCY = int(os.getenv("VIDEO_JOB_CONCURRENCY", "1"))
+VIDEO_JOB_DIR = os.getenv("VIDEO_JOB_DIR", "data/video_jobs")
+VIDEO_JOB_HISTORY = int(os.getenv("VIDEO_JOB_HISTORY", "50"))
+VIDEO_JOB_SAVE_CLEAN = os.getenv("VIDEO_JOB_SAVE_CLEAN", "0").lower() in {"1", "true", "yes", "on"}
+VIDEO_JOB_MAX_UPLOAD_BYTES = int(os.getenv("VIDEO_JOB_MAX_UPLOAD_BYTES", str(1024 * 1024 * 1024)))
+# Wall-clock limit per job in seconds, after which ffmpeg is killed; 0 = none.
+VIDEO_JOB_TIMEOUT = float(os.getenv("VIDEO_JOB_TIMEOUT", "3600"))
+# Hosts whose http(s)/rtsp URLs may be passed as `path`; empty = uploads and VIDEO_JOB_DIR only.
+VIDEO_JOB_URL_ALLOWLIST = {h.strip().lower() for h in os.getenv("VIDEO_JOB_URL_ALLOWLIST", "").split(",") if h.strip()}
+
+# Seconds a cached GET /history or /email-recipients response is served;
+# writes in this process invalidate it immediately. 0 = no caching.
+RESPONSE_CACHE_TTL_HISTORY = float(os.getenv("RESPONSE_CACHE_TTL_HISTORY", "5"))
+RESPONSE_CACHE_TTL_RECIPIENTS = float(os.getenv("RESPONSE_CACHE_TTL_RECIPIENTS", "60"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+
+# floor_events range partitioning on created_at: "month" or "day"
+FLOOR_EVENTS_PARTITION = os.getenv("FLOOR_EVENTS_PARTITION", "month").lower()
+FLOOR_EVENTS_PARTITIONS_AHEAD = int(os.getenv("FLOOR_EVENTS_PARTITIONS_AHEAD", "3"))
+# Partitions entirely older than this are dropped; 0 = keep everything.
+FLOOR_EVENTS_RETENTION_DAYS = int(os.getenv("FLOOR_EVENTS_RETENTION_DAYS", "0"))
+PARTITION_MAINTENANCE_INTERVAL = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL", "3600"))
+# Default look-back of GET /history, so only recent partitions are scanned; 0 = all.
+HISTORY_WINDOW_DAYS = int(os.getenv("HISTORY_WINDOW_DAYS", "0"))
+
+HEALTH_INTERVAL = float(os.getenv("HEALTH_INTERVAL", "10"))
+HEALTH_TIMEOUT = float(os.getenv("HEALTH_TIMEOUT", "3"))
+HEALTH_STALE_AFTER = float(os.getenv("HEALTH_STALE_AFTER", "0"))
+# Resend is a metered third-party API, so it is probed far less often;
+# 0 = never call it, only check that RESEND_API_KEY is set.
+HEALTH_EMAIL_INTERVAL = float(os.getenv("HEALTH_EMAIL_INTERVAL", "900"))
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Opt-in INFO sampling per [TAG], e.g. "DETECT=0.1"; empty = log everything.
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "0").lower() in {"1", "true", "yes", "on"}
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_PATHS = [p.strip() for p in os.getenv("PROFILE_PATHS", "").split(",") if p.strip()]
+PROFILE_DIR = os.getenv("PROFILE_DIR", "data/profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
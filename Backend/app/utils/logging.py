@@ -1,14 +1,216 @@
-import logging
+import re
 import sys
+import json
+import uuid
+import queue
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from app.utils.config import LOG_FORMAT, LOG_LEVEL, LOG_QUEUE_SIZE, LOG_SAMPLE_RATES
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+_TAG_RE = re.compile(r"^\[([A-Z-]+)\]")
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Attributes every LogRecord has; anything else came in through ``extra``.
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+@contextmanager
+def bind_request_id(value: Optional[str] = None):
+    token = request_id_var.set(value or new_request_id())
+    try:
+        yield
+    finally:
+        request_id_var.reset(token)
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for item in spec.split(","):
+        tag, _, rate = item.partition("=")
+        tag = tag.strip().strip("[]").upper()
+        if not tag or not rate:
+            continue
+        try:
+            rates[tag] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps one in every ``1/rate`` records per ``[TAG]`` prefix.
+
+    Only records below WARNING are sampled. The tag is read from the
+    unformatted message template, so dropped records are never formatted.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+
+        match = _TAG_RE.match(record.msg) if isinstance(record.msg, str) else None
+        rate = self.rates.get(match.group(1)) if match else None
+        if rate is None or rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+
+        every = round(1 / rate)
+        with self._lock:
+            seen = self._counters.get(match.group(1), 0)
+            self._counters[match.group(1)] = seen + 1
+        if seen % every:
+            return False
+
+        record.sample_rate = rate
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the listener thread without formatting them.
+
+    The stock ``QueueHandler.prepare`` renders the message in the calling
+    thread; here that work is left to the listener. When the queue is full
+    the record is dropped and counted instead of blocking the caller.
+    """
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class RequestIdMiddleware:
+    """Binds ``X-Request-ID`` (or a fresh id) to the request context.
+
+    Background tasks started from the request inherit the id, and it is
+    echoed back in the response headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                incoming = value.decode("latin-1")
+                break
+        if incoming is None or not _REQUEST_ID_RE.match(incoming):
+            incoming = new_request_id()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-request-id", incoming.encode("latin-1"))
+                ]
+            await send(message)
+
+        token = request_id_var.set(incoming)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
 
 def setup_logging():
-    logging.basicConfig(
-        level=logging.INFO,
-        format="[%(asctime)s] %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-        handlers=[logging.StreamHandler(sys.stdout)],
-    )
+    global _listener
+
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter(
+            "[%(asctime)s] %(levelname)s %(request_id)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        ))
+
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=max(0, LOG_QUEUE_SIZE)))
+    handler.addFilter(SamplingFilter(parse_sample_rates(LOG_SAMPLE_RATES)))
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+
+    _listener = QueueListener(handler.queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_stop_listener)
+
+
+def logging_stats() -> dict:
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, NonBlockingQueueHandler):
+            return {"queued": handler.queue.qsize(), "dropped": handler.dropped}
+    return {}
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -0,0 +1,130 @@
+import time
+import functools
+from typing import Callable
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import event
+
+# Every label below takes values from a small fixed set (route templates,
+# HTTP status codes, SQL verbs, task names), keeping cardinality bounded.
+
+HTTP_REQUEST_DURATION = Histogram(
+    "flooreye_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+
+ML_REQUEST_DURATION = Histogram(
+    "flooreye_ml_request_duration_seconds",
+    "Latency of calls to the ML service",
+    ["endpoint", "status"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0),
+)
+
+BACKGROUND_TASK_DURATION = Histogram(
+    "flooreye_background_task_duration_seconds",
+    "Duration of background tasks",
+    ["task", "outcome"],
+)
+
+DB_QUERY_DURATION = Histogram(
+    "flooreye_db_query_duration_seconds",
+    "Database statement latency by SQL verb",
+    ["operation"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+EMAIL_SENDS = Counter(
+    "flooreye_email_sends_total",
+    "Email delivery outcomes",
+    ["outcome"],
+)
+
+ML_UPLOAD_BYTES = Counter(
+    "flooreye_ml_upload_bytes_total",
+    "Frame bytes before and after normalisation for ML uploads",
+    ["kind"],
+)
+
+RESPONSE_CACHE_REQUESTS = Counter(
+    "flooreye_response_cache_requests_total",
+    "Cached read endpoint lookups by outcome",
+    ["cache", "outcome"],
+)
+
+DEPENDENCY_UP = Gauge(
+    "flooreye_dependency_up",
+    "Whether the last background probe of a dependency succeeded",
+    ["dependency"],
+)
+
+DEPENDENCY_PROBE_DURATION = Histogram(
+    "flooreye_dependency_probe_duration_seconds",
+    "Latency of background dependency probes",
+    ["dependency"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+_SQL_VERBS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                str(status_holder[0]),
+            ).observe(time.perf_counter() - start)
+
+
+def timed_task(name: str) -> Callable:
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                result = fn(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                BACKGROUND_TASK_DURATION.labels(name, outcome).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def instrument_engine(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if not starts:
+            return
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+        DB_QUERY_DURATION.labels(verb if verb in _SQL_VERBS else "OTHER").observe(
+            time.perf_counter() - starts.pop()
+        )
@@ -0,0 +1,166 @@
+import os
+import re
+import hmac
+import time
+import random
+import asyncio
+import cProfile
+import logging
+import threading
+from typing import List, Optional
+
+try:
+    from pyinstrument import Profiler
+    PYINSTRUMENT_AVAILABLE = True
+except ImportError:
+    Profiler = None
+    PYINSTRUMENT_AVAILABLE = False
+
+from app.utils.config import (
+    PROFILE_DIR,
+    PROFILE_MAX_FILES,
+    PROFILE_PATHS,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_TOKEN,
+)
+from app.utils.logging import request_id_var
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_RE = re.compile(r"[^A-Za-z0-9._-]+")
+PROFILE_NAME_RE = re.compile(r"^[A-Za-z0-9._-]+\.(prof|html)$")
+
+
+class ProfileStore:
+    """Directory of profile files capped at ``max_files``, oldest removed first."""
+
+    def __init__(self, directory: str = PROFILE_DIR, max_files: int = PROFILE_MAX_FILES):
+        self.directory = directory
+        self.max_files = max(1, max_files)
+        self._lock = threading.Lock()
+
+    def new_name(self, method: str, path: str, ext: str) -> str:
+        slug = _UNSAFE_RE.sub("_", path.strip("/")) or "root"
+        return f"{int(time.time() * 1000)}-{method}-{slug[:60]}-{request_id_var.get()}.{ext}"
+
+    def path_for(self, name: str) -> Optional[str]:
+        if not PROFILE_NAME_RE.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+    def save(self, name: str, profiler):
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, name)
+            if isinstance(profiler, cProfile.Profile):
+                profiler.dump_stats(path)
+            else:
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(profiler.output_html())
+            self._prune()
+        logger.info(f"[PROFILE] Saved {name}")
+
+    def list(self) -> List[dict]:
+        try:
+            entries = [e for e in os.scandir(self.directory) if PROFILE_NAME_RE.match(e.name)]
+        except FileNotFoundError:
+            return []
+
+        entries.sort(key=lambda e: e.name, reverse=True)
+        return [
+            {"name": e.name, "size": e.stat().st_size, "created_at": e.stat().st_mtime}
+            for e in entries
+        ]
+
+    def _prune(self):
+        names = sorted(n for n in os.listdir(self.directory) if PROFILE_NAME_RE.match(n))
+        for name in names[:max(0, len(names) - self.max_files)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+def is_admin(token: Optional[str]) -> bool:
+    return bool(PROFILE_TOKEN) and token is not None and hmac.compare_digest(token, PROFILE_TOKEN)
+
+
+class ProfilingMiddleware:
+    """Profiles single requests chosen by ``X-Profile`` header or sampling.
+
+    Only installed when ``PROFILE_ENABLED`` is set, so a disabled profiler
+    costs nothing. One request is profiled at a time; pyinstrument is used
+    when installed (async-aware HTML), otherwise cProfile (``.prof`` for
+    pstats/snakeviz). cProfile only sees the event loop thread, so sync
+    endpoints running in the threadpool show up as waits.
+    """
+
+    def __init__(self, app, store: ProfileStore, sample_rate: float = PROFILE_SAMPLE_RATE, paths: List[str] = PROFILE_PATHS):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.paths = paths
+        self._busy = threading.Lock()
+
+    def _wanted(self, scope) -> bool:
+        path = scope["path"]
+        if path.startswith("/debug/profiles"):
+            return False
+
+        for name, value in scope.get("headers", []):
+            if name == b"x-profile":
+                return is_admin(value.decode("latin-1"))
+
+        if self.paths and not any(path.startswith(p) for p in self.paths):
+            return False
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wanted(scope) or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        if PYINSTRUMENT_AVAILABLE:
+            profiler = Profiler(async_mode="enabled")
+            name = self.store.new_name(scope["method"], scope["path"], "html")
+        else:
+            profiler = cProfile.Profile()
+            name = self.store.new_name(scope["method"], scope["path"], "prof")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", name.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            _start(profiler)
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                _stop(profiler)
+                try:
+                    await asyncio.to_thread(self.store.save, name, profiler)
+                except Exception as e:
+                    logger.error(f"[PROFILE] Failed to save {name}: {e}")
+        finally:
+            self._busy.release()
+
+
+def _start(profiler):
+    if isinstance(profiler, cProfile.Profile):
+        profiler.enable()
+    else:
+        profiler.start()
+
+
+def _stop(profiler):
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+    else:
+        profiler.stop()
+
+
+profile_store = ProfileStore()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Measure the per-request cost of the Prometheus instrumentation.
+
+Drives a minimal FastAPI app directly through ASGI (no sockets) with and
+without ``MetricsMiddleware`` and reports the mean time per request, plus
+the raw cost of a single labelled ``Histogram.observe`` and of the
+``timed_task`` decorator, as JSON.
+
+    python benchmarks/metrics_overhead.py --requests 20000
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+from fastapi import FastAPI
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.metrics import HTTP_REQUEST_DURATION, MetricsMiddleware, timed_task  # noqa: E402
+
+
+def build_app(instrumented):
+    app = FastAPI()
+
+    @app.get("/history/{item_id}")
+    def item(item_id: int):
+        return {"id": item_id}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def drive(app, requests):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/history/1",
+        "raw_path": b"/history/1",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(200):
+        await app(dict(scope), receive, send)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def bench_observe(iterations):
+    child = HTTP_REQUEST_DURATION.labels("GET", "/bench", "200")
+    start = time.perf_counter()
+    for _ in range(iterations):
+        HTTP_REQUEST_DURATION.labels("GET", "/bench", "200").observe(0.01)
+    labelled = (time.perf_counter() - start) / iterations * 1e6
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        child.observe(0.01)
+    cached = (time.perf_counter() - start) / iterations * 1e6
+    return labelled, cached
+
+
+def bench_timed_task(iterations):
+    def plain():
+        return None
+
+    wrapped = timed_task("bench")(plain)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        plain()
+    base = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        wrapped()
+    return (time.perf_counter() - start - base) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    baseline = asyncio.run(drive(build_app(False), args.requests))
+    instrumented = asyncio.run(drive(build_app(True), args.requests))
+    labelled, cached = bench_observe(args.iterations)
+
+    report = {
+        "requests": args.requests,
+        "request_us": {
+            "baseline": round(baseline, 2),
+            "instrumented": round(instrumented, 2),
+            "overhead": round(instrumented - baseline, 2),
+            "overhead_pct": round((instrumented - baseline) / baseline * 100, 2),
+        },
+        "observe_us": {
+            "labels_and_observe": round(labelled, 3),
+            "cached_child": round(cached, 3),
+        },
+        "timed_task_overhead_us": round(bench_timed_task(args.iterations), 3),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Compare the multipart /detect/frame route with the /detect/stream WebSocket.
+
+Sends the same frame repeatedly through both paths and reports frames/sec
+and end-to-end latency percentiles as JSON.
+
+Against a running backend:
+    python benchmarks/stream_vs_multipart.py --backend http://localhost:8000
+
+Self-contained (starts a stub ML service and the backend in-process):
+    python benchmarks/stream_vs_multipart.py --self-host --ml-latency 0.05
+"""
+
+import os
+import sys
+import json
+import time
+import struct
+import asyncio
+import argparse
+import threading
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return round(ordered[k], 2)
+
+
+def summarize(name, latencies, elapsed, sent, errors=0, dropped=0):
+    return {
+        "mode": name,
+        "frames_sent": sent,
+        "results": len(latencies),
+        "dropped": dropped,
+        "errors": errors,
+        "fps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+        },
+    }
+
+
+async def run_multipart(backend, frame, frames, concurrency):
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for _ in range(frames):
+        queue.put_nowait(None)
+
+    async with httpx.AsyncClient(base_url=backend, timeout=60.0) as client:
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                queue.get_nowait()
+                # A fresh connection per request mirrors the browser's
+                # axios call through a load balancer.
+                t0 = time.perf_counter()
+                res = await client.post(
+                    "/detect/frame",
+                    files={"file": ("frame.jpg", frame, "image/jpeg")},
+                    headers={"Connection": "close"},
+                )
+                if res.status_code == 200:
+                    latencies.append((time.perf_counter() - t0) * 1000)
+                else:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return summarize("multipart", latencies, elapsed, frames, errors=errors)
+
+
+async def run_stream(backend, frame, frames, fps):
+    import websockets
+
+    url = backend.replace("http://", "ws://").replace("https://", "wss://") + "/detect/stream?source=bench"
+    sent_at = {}
+    latencies = []
+    errors = 0
+    dropped = 0
+    interval = 1.0 / fps if fps > 0 else 0.0
+
+    async with websockets.connect(url, max_size=None) as ws:
+        async def sender():
+            for seq in range(frames):
+                sent_at[seq] = time.perf_counter()
+                await ws.send(struct.pack(">I", seq) + frame)
+                await asyncio.sleep(interval)
+
+        async def receiver():
+            nonlocal errors, dropped
+            last = -1
+            while last < frames - 1:
+                try:
+                    msg = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
+                except asyncio.TimeoutError:
+                    break
+                if "error" in msg:
+                    errors += 1
+                    continue
+                last = msg["seq"]
+                dropped = msg.get("dropped", dropped)
+                latencies.append((time.perf_counter() - sent_at[msg["seq"]]) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(sender(), receiver())
+        elapsed = time.perf_counter() - start
+
+    return summarize("websocket", latencies, elapsed, frames, errors=errors, dropped=dropped)
+
+
+def start_self_hosted(ml_latency):
+    import uvicorn
+    from fastapi import FastAPI, UploadFile, File
+
+    stub = FastAPI()
+
+    @stub.post("/detect/frame")
+    async def stub_detect(file: UploadFile = File(...)):
+        await file.read()
+        await asyncio.sleep(ml_latency)
+        return {"detections": [], "count": 0}
+
+    def serve(app, port):
+        config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+        server = uvicorn.Server(config)
+        threading.Thread(target=server.run, daemon=True).start()
+        while not server.started:
+            time.sleep(0.05)
+
+    serve(stub, 8911)
+    os.environ["YOLO_SERVICE_URL"] = "http://127.0.0.1:8911/detect/frame"
+
+    from app.main import app
+    serve(app, 8910)
+    return "http://127.0.0.1:8910"
+
+
+def load_frame(path):
+    if path:
+        return Path(path).read_bytes()
+    # Roughly the size of a 1280x720 q0.9 canvas capture.
+    return b"\xff\xd8" + os.urandom(180_000) + b"\xff\xd9"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="http://127.0.0.1:8000")
+    parser.add_argument("--self-host", action="store_true")
+    parser.add_argument("--ml-latency", type=float, default=0.05)
+    parser.add_argument("--image")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--fps", type=float, default=0, help="WebSocket send rate, 0 = as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=1, help="Parallel multipart clients")
+    args = parser.parse_args()
+
+    backend = start_self_hosted(args.ml_latency) if args.self_host else args.backend
+    frame = load_frame(args.image)
+
+    report = {
+        "frame_bytes": len(frame),
+        "runs": [
+            asyncio.run(run_multipart(backend, frame, args.frames, args.concurrency)),
+            asyncio.run(run_stream(backend, frame, args.frames, args.fps)),
+        ],
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Migrate an existing, unpartitioned floor_events table to the partitioned
+layout in schema.sql, without stopping the backend.
+
+    python migrate_floor_events.py --dry-run
+    python migrate_floor_events.py --batch 5000
+    python migrate_floor_events.py --drop-old
+
+Steps:
+  1. create floor_events_new with PRIMARY KEY (id, created_at) and one
+     partition per period from the oldest row up to FLOOR_EVENTS_PARTITIONS_AHEAD
+     periods ahead, plus pmax,
+  2. copy rows in id batches (rows written meanwhile are caught up),
+  3. swap the tables with one atomic RENAME TABLE and copy the rows that
+     landed in the old table during the last catch-up.
+
+The old table is kept as floor_events_old unless --drop-old is given.
+Uses the same DATABASE_URL / DB_* settings as the backend.
+"""
+
+import sys
+import time
+import argparse
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from sqlalchemy import text  # noqa: E402
+
+from app.store.db import get_db_connection  # noqa: E402
+from app.store.partitions import (  # noqa: E402
+    MAXVALUE_PARTITION,
+    TABLE,
+    next_period,
+    partition_clause,
+    partition_name,
+    period_start,
+)
+from app.utils.config import FLOOR_EVENTS_PARTITIONS_AHEAD  # noqa: E402
+
+NEW_TABLE = f"{TABLE}_new"
+OLD_TABLE = f"{TABLE}_old"
+COLUMNS = "id, source, is_dirty, confidence, notes, image_data, created_at"
+# Room for ids handed out by the old table between the last catch-up and
+# the rename, so they cannot collide with new inserts.
+ID_HEADROOM = 100000
+
+
+def partition_ddl(first: date, today: date, ahead: int = FLOOR_EVENTS_PARTITIONS_AHEAD) -> str:
+    start = period_start(first)
+    stop = period_start(today)
+    for _ in range(ahead):
+        stop = next_period(stop)
+
+    clauses = []
+    while start <= stop:
+        end = next_period(start)
+        clauses.append(partition_clause(partition_name(start), end))
+        start = end
+    clauses.append(partition_clause(MAXVALUE_PARTITION, None))
+    return "PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (\n    " + ",\n    ".join(clauses) + "\n)"
+
+
+def create_statements(first: date, today: date) -> list:
+    return [
+        f"CREATE TABLE {NEW_TABLE} LIKE {TABLE}",
+        f"ALTER TABLE {NEW_TABLE} MODIFY created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP",
+        f"ALTER TABLE {NEW_TABLE} DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)",
+        f"ALTER TABLE {NEW_TABLE} {partition_ddl(first, today)}",
+    ]
+
+
+def copy_rows(conn, source: str, target: str, after_id: int, batch: int) -> int:
+    """Copy rows with id > ``after_id`` from ``source`` to ``target``; returns the last id copied."""
+    while True:
+        last = conn.execute(
+            text(f"SELECT MAX(id) FROM (SELECT id FROM {source} WHERE id > :after ORDER BY id LIMIT :batch) b"),
+            {"after": after_id, "batch": batch},
+        ).scalar()
+        if last is None:
+            return after_id
+
+        # Rows without created_at go to the oldest partition.
+        conn.execute(
+            text(f"""
+                INSERT INTO {target} ({COLUMNS})
+                SELECT id, source, is_dirty, confidence, notes, image_data,
+                    COALESCE(created_at, FROM_UNIXTIME(1))
+                FROM {source}
+                WHERE id > :after AND id <= :last
+            """),
+            {"after": after_id, "last": last},
+        )
+        conn.commit()
+        after_id = last
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=2000, help="rows per copy statement")
+    parser.add_argument("--drop-old", action="store_true", help="drop floor_events_old after the swap")
+    parser.add_argument("--dry-run", action="store_true", help="print the DDL only")
+    args = parser.parse_args()
+
+    with get_db_connection() as conn:
+        if conn.dialect.name != "mysql":
+            sys.exit(f"Partitioning needs MySQL, not {conn.dialect.name}")
+
+        partitioned = conn.execute(
+            text("""
+                SELECT COUNT(*) FROM information_schema.PARTITIONS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL
+            """),
+            {"table": TABLE},
+        ).scalar()
+        if partitioned:
+            print(f"{TABLE} is already partitioned")
+            return
+
+        today = conn.execute(text("SELECT CURDATE()")).scalar()
+        first = conn.execute(text(f"SELECT DATE(MIN(created_at)) FROM {TABLE}")).scalar() or today
+        statements = create_statements(first, today)
+        if args.dry_run:
+            print(";\n".join(statements) + ";")
+            return
+
+        started = time.perf_counter()
+        conn.execute(text(f"DROP TABLE IF EXISTS {NEW_TABLE}"))
+        for stmt in statements:
+            conn.execute(text(stmt))
+        conn.commit()
+
+        last = copy_rows(conn, TABLE, NEW_TABLE, 0, args.batch)
+        # Catch up on rows written while copying, until a pass is quick.
+        while True:
+            pass_started = time.perf_counter()
+            last = copy_rows(conn, TABLE, NEW_TABLE, last, args.batch)
+            if time.perf_counter() - pass_started < 1:
+                break
+        print(f"Copied up to id {last} in {time.perf_counter() - started:.1f}s")
+
+        next_id = conn.execute(text(f"SELECT COALESCE(MAX(id), 0) FROM {TABLE}")).scalar() + ID_HEADROOM
+        conn.execute(text(f"ALTER TABLE {NEW_TABLE} AUTO_INCREMENT = {next_id}"))
+        conn.execute(text(f"RENAME TABLE {TABLE} TO {OLD_TABLE}, {NEW_TABLE} TO {TABLE}"))
+        conn.commit()
+
+        last = copy_rows(conn, OLD_TABLE, TABLE, last, args.batch)
+        print(f"Swapped tables; {TABLE} is partitioned, last copied id {last}")
+
+        if args.drop_old:
+            conn.execute(text(f"DROP TABLE {OLD_TABLE}"))
+            conn.commit()
+            print(f"Dropped {OLD_TABLE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,13 +9,31 @@ CREATE TABLE IF NOT EXISTS email_recipients (
 );
 
 CREATE TABLE IF NOT EXISTS floor_events (
-    id INT AUTO_INCREMENT PRIMARY KEY,
+    id INT AUTO_INCREMENT,
     source VARCHAR(255) NOT NULL,
     is_dirty TINYINT(1) NOT NULL,
     confidence FLOAT,
     notes TEXT,
     image_data LONGBLOB,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at)
+)
+-- Ranged on created_at; app/store/partitions.py splits upcoming periods off
+-- pmax and drops expired ones (FLOOR_EVENTS_PARTITION, FLOOR_EVENTS_RETENTION_DAYS).
+PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+    PARTITION pmax VALUES LESS THAN MAXVALUE
+);
+-- Existing databases: python migrate_floor_events.py
+
+CREATE TABLE IF NOT EXISTS cameras (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    nama VARCHAR(255) NOT NULL,
+    rtsp_url VARCHAR(1024) NOT NULL,
+    aktif TINYINT(1) DEFAULT 1,
+    detect_interval FLOAT NULL,
+    inference_profile TEXT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+-- Existing databases: ALTER TABLE cameras ADD COLUMN inference_profile TEXT NULL;
 CREATE INDEX idx_email_recipients_active ON email_recipients(active);
 CREATE INDEX idx_floor_events_created_at ON floor_events(created_at);
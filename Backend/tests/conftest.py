@@ -0,0 +1,113 @@
+import sys
+import json
+import time
+import shutil
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class StubServer:
+    """Local HTTP stand-in for an external API.
+
+    Records every request as (method, path, json body) and answers with
+    ``status`` after ``delay`` seconds.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.status = 200
+        self.body = {"id": "stub"}
+        self.delay = 0.0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                stub.requests.append((self.command, self.path, json.loads(raw) if raw else None))
+                if stub.delay:
+                    time.sleep(stub.delay)
+                payload = json.dumps(stub.body).encode()
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def paths(self):
+        return [path for _, path, _ in self.requests]
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+def wait_for(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.fixture(scope="session")
+def ffmpeg():
+    path = shutil.which("ffmpeg")
+    if path is None:
+        try:
+            import imageio_ffmpeg
+            path = imageio_ffmpeg.get_ffmpeg_exe()
+        except Exception:
+            pytest.skip("ffmpeg not available")
+    return path
+
+
+@pytest.fixture(scope="session")
+def clip(ffmpeg, tmp_path_factory):
+    """Two seconds of test pattern at 10 fps."""
+    path = tmp_path_factory.mktemp("video") / "clip.avi"
+    subprocess.run(
+        [
+            ffmpeg, "-hide_banner", "-loglevel", "error", "-nostdin",
+            "-f", "lavfi", "-i", "testsrc=size=160x120:rate=10",
+            "-t", "2", "-c:v", "mjpeg", "-q:v", "5", str(path),
+        ],
+        check=True,
+    )
+    return str(path)
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path):
+    """Writes an executable shell script standing in for ffmpeg."""
+    def make(body, name="ffmpeg"):
+        path = tmp_path / name
+        path.write_text("#!/bin/sh\n" + body)
+        path.chmod(0o755)
+        return str(path)
+    return make
@@ -0,0 +1,64 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+from fastapi import HTTPException
+
+from app.routes.detection import _read_archive
+
+
+def make_zip(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members:
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+def make_tar(members):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tf:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("make", [make_zip, make_tar])
+def test_extracts_images_only(make):
+    data = make([("a.jpg", b"aaa"), ("notes.txt", b"skip"), ("dir/b.png", b"bb")])
+
+    assert _read_archive(data, max_bytes=100, max_images=10) == [("a.jpg", b"aaa"), ("dir/b.png", b"bb")]
+
+
+@pytest.mark.parametrize("make", [make_zip, make_tar])
+def test_stops_once_decompressed_bytes_pass_budget(make):
+    # 64 MB of zeros compresses to well under 1 MB.
+    bomb = make([(f"{i}.jpg", bytes(16 * 1024 * 1024)) for i in range(4)])
+    assert len(bomb) < 1024 * 1024
+
+    with pytest.raises(HTTPException) as exc:
+        _read_archive(bomb, max_bytes=1024 * 1024, max_images=10)
+    assert exc.value.status_code == 413
+
+
+def test_budget_is_shared_across_members():
+    data = make_zip([("a.jpg", b"x" * 60), ("b.jpg", b"x" * 60)])
+
+    assert len(_read_archive(data, max_bytes=120, max_images=10)) == 2
+    with pytest.raises(HTTPException):
+        _read_archive(data, max_bytes=100, max_images=10)
+
+
+def test_too_many_images():
+    data = make_zip([(f"{i}.jpg", b"x") for i in range(5)])
+
+    with pytest.raises(HTTPException) as exc:
+        _read_archive(data, max_bytes=100, max_images=4)
+    assert exc.value.status_code == 413
+
+
+def test_not_an_archive():
+    assert _read_archive(b"plain bytes", max_bytes=100, max_images=10) is None
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from app.services.capture import CameraReader
+from conftest import wait_for
+
+
+@pytest.fixture
+def readers():
+    started = []
+    yield started
+    for reader in started:
+        reader.stop()
+        reader.join(timeout=5)
+
+
+def start(readers, *args, **kwargs):
+    reader = CameraReader(*args, **kwargs)
+    readers.append(reader)
+    reader.start()
+    return reader
+
+
+def test_reads_local_file_and_reopens_it_at_eof(ffmpeg, clip, readers):
+    reader = start(readers, 1, clip, fps=5, backoff_min=0.1, ffmpeg=ffmpeg)
+
+    # One pass of the 2 s clip at 5 fps is about 10 frames.
+    assert wait_for(lambda: reader.frames >= 15, timeout=15), reader.snapshot()
+    seq, frame, _ = reader.latest()
+    assert frame.startswith(b"\xff\xd8") and frame.endswith(b"\xff\xd9")
+    assert seq == reader.frames
+    assert reader.failures == 0
+    assert reader.connected
+
+
+def test_stall_restarts_with_backoff_then_recovers(ffmpeg, clip, fake_ffmpeg, tmp_path, readers):
+    log = tmp_path / "starts.log"
+    # Hangs without output on the first three starts, then streams the clip.
+    wrapper = fake_ffmpeg(f"""
+date +%s.%N >> "{log}"
+if [ "$(wc -l < "{log}")" -le 3 ]; then
+    exec sleep 30
+fi
+exec "{ffmpeg}" "$@"
+""")
+    reader = start(
+        readers, 2, clip, fps=5,
+        stall_timeout=0.3, backoff_min=0.2, backoff_max=0.4, ffmpeg=wrapper,
+    )
+
+    assert wait_for(lambda: reader.frames > 0, timeout=15), reader.snapshot()
+    assert reader.failures == 3
+    assert reader.connected
+    assert reader.last_error is None
+
+    starts = [float(line) for line in log.read_text().split()]
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    # Each gap is the stall timeout plus a backoff of 0.2, 0.4, then capped at 0.4.
+    assert gaps[0] == pytest.approx(0.5, abs=0.15)
+    assert gaps[1] == pytest.approx(0.7, abs=0.15)
+    assert gaps[2] == pytest.approx(0.7, abs=0.15)
+
+
+def test_stalled_source_reports_error(fake_ffmpeg, readers):
+    wrapper = fake_ffmpeg("exec sleep 30\n")
+    reader = start(readers, 3, "rtsp://camera.invalid/stream", stall_timeout=0.2, backoff_min=0.1, ffmpeg=wrapper)
+
+    assert wait_for(lambda: reader.failures >= 2, timeout=5)
+    assert reader.frames == 0
+    assert not reader.connected
+    assert reader.last_error.startswith("No data")
+
+
+def test_verbose_stderr_does_not_block_ffmpeg(ffmpeg, clip, fake_ffmpeg, readers):
+    # Far more than a pipe buffer of error output before the first frame.
+    wrapper = fake_ffmpeg(f"""
+head -c 262144 /dev/zero | tr '\\0' 'x' >&2
+exec "{ffmpeg}" "$@"
+""")
+    reader = start(readers, 4, clip, fps=5, stall_timeout=5, ffmpeg=wrapper)
+
+    assert wait_for(lambda: reader.frames > 0, timeout=10), reader.snapshot()
+    assert reader.failures == 0
+
+
+def test_missing_file_keeps_ffmpeg_error(ffmpeg, tmp_path, readers):
+    missing = os.path.join(str(tmp_path), "missing.mp4")
+    reader = start(readers, 5, missing, backoff_min=0.1, ffmpeg=ffmpeg)
+
+    assert wait_for(lambda: reader.failures >= 2, timeout=10)
+    assert "No such file" in reader.last_error
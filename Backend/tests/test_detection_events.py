@@ -0,0 +1,108 @@
+import asyncio
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.routes import detection
+from app.services.events import broker
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'events.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE floor_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source VARCHAR(255) NOT NULL,
+                is_dirty TINYINT(1) NOT NULL,
+                confidence FLOAT,
+                notes TEXT,
+                image_data BLOB,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+
+    @contextmanager
+    def get_db_connection():
+        conn = engine.connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    monkeypatch.setattr(detection, "ENABLE_DB", True)
+    monkeypatch.setattr(detection, "get_db_connection", get_db_connection)
+    monkeypatch.setattr(detection, "bg_send_notification", lambda *a, **kw: None)
+    yield engine
+    engine.dispose()
+
+
+def result(is_dirty=False, confidence=0.0, tracked=False, new_tracks=0):
+    return {
+        "is_dirty": is_dirty,
+        "confidence": confidence,
+        "count": int(is_dirty),
+        "detections": [],
+        "tracked": tracked,
+        "new_tracks": new_tracks,
+    }
+
+
+def collect(action, count):
+    async def scenario():
+        sub = broker.subscribe()
+        try:
+            action()
+            return [await asyncio.wait_for(sub.queue.get(), 5) for _ in range(count)]
+        finally:
+            broker.unsubscribe(sub)
+
+    return asyncio.run(scenario())
+
+
+def history_rows(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT id, source, notes, created_at FROM floor_events ORDER BY id")).fetchall()
+
+
+def test_saved_detection_is_published_with_its_history_row(db):
+    (event,) = collect(lambda: detection.dispatch_result("cam-1", result(True, 0.91), b"jpeg"), 1)
+
+    (row,) = history_rows(db)
+    assert event["id"] == row.id
+    assert event["source"] == "cam-1"
+    assert event["notes"] == row.notes == "Detections: 1"
+    assert event["confidence"] == 0.91
+    assert event["created_at"].replace("T", " ") == str(row.created_at)
+
+
+def test_unsaved_detection_is_published_without_id(db):
+    (event,) = collect(lambda: detection.dispatch_result("cam-1", result(), b"jpeg", persist=False), 1)
+
+    assert "id" not in event
+    assert history_rows(db) == []
+
+
+def test_batch_publishes_each_saved_row(db):
+    rows = [
+        {"source": "upload", "is_dirty": dirty, "confidence": 0.5, "notes": f"Batch {i}.jpg", "result": result(dirty, 0.5)}
+        for i, dirty in enumerate([True, False, True])
+    ]
+
+    events = collect(lambda: detection.save_detections_bulk(rows, publish=True), 3)
+
+    assert [e["id"] for e in events] == [r.id for r in history_rows(db)]
+    assert [e["notes"] for e in events] == ["Batch 0.jpg", "Batch 1.jpg", "Batch 2.jpg"]
+    assert [e["is_dirty"] for e in events] == [True, False, True]
+
+
+def test_failed_insert_still_publishes(db):
+    with db.begin() as conn:
+        conn.execute(text("DROP TABLE floor_events"))
+
+    (event,) = collect(lambda: detection.save_and_publish("cam-1", result(True, 0.8), is_dirty=True, confidence=0.8), 1)
+
+    assert "id" not in event
+    assert event["is_dirty"]
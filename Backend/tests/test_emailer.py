@@ -0,0 +1,200 @@
+import json
+import asyncio
+
+import pytest
+
+from app.services import emailer
+from app.services.emailer import EmailDeliveryWorker, RetryStore
+
+
+@pytest.fixture
+def resend(stub_server, monkeypatch):
+    monkeypatch.setattr(emailer, "RESEND_API_URL", stub_server.url)
+    monkeypatch.setattr(emailer, "RESEND_API_KEY", "re_test")
+    monkeypatch.setattr(emailer, "SMTP_ENABLED", True)
+    return stub_server
+
+
+def payload(subject="Spill", attachment=False):
+    image = b"\xff\xd8jpeg" if attachment else None
+    return emailer.build_payload(subject, "body", ["ops@example.com"], image)
+
+
+def entry_files(path):
+    return sorted(p.name for p in path.iterdir() if p.suffix == ".json")
+
+
+def test_retry_store_persists_one_file_per_entry(tmp_path):
+    store = RetryStore(str(tmp_path / "retry"), base_delay=0)
+    store.push(payload("a"), 1)
+    store.push(payload("b", attachment=True), 1)
+
+    files = entry_files(tmp_path / "retry")
+    assert len(files) == 2
+    with open(tmp_path / "retry" / files[0]) as f:
+        assert json.load(f)["payload"]["subject"] == "a"
+
+    reloaded = RetryStore(str(tmp_path / "retry"))
+    assert len(reloaded) == 0
+    reloaded.load()
+    assert len(reloaded) == 2
+
+    due = store.take_due()
+    assert [e["payload"]["subject"] for e in due] == ["a", "b"]
+    assert entry_files(tmp_path / "retry") == []
+    assert len(store) == 0
+
+
+def test_retry_store_keeps_entries_not_yet_due(tmp_path):
+    store = RetryStore(str(tmp_path / "retry"), base_delay=3600)
+    store.push(payload(), 1)
+
+    assert store.take_due() == []
+    assert len(entry_files(tmp_path / "retry")) == 1
+
+
+def test_retry_store_drops_oldest_beyond_max_entries(tmp_path):
+    store = RetryStore(str(tmp_path / "retry"), max_entries=2)
+    for subject in ("a", "b", "c"):
+        store.push(payload(subject), 1)
+
+    assert len(store) == 2
+    assert len(entry_files(tmp_path / "retry")) == 2
+    reloaded = RetryStore(str(tmp_path / "retry"), base_delay=0)
+    assert sorted(e["payload"]["subject"] for e in reloaded.take_due(now=float("inf"))) == ["b", "c"]
+
+
+def test_retry_store_migrates_single_file_queue(tmp_path):
+    legacy = tmp_path / "email_retry.json"
+    legacy.write_text(json.dumps([{"payload": payload("old"), "attempts": 2, "next_at": 0}]))
+
+    store = RetryStore(str(legacy))
+    assert legacy.is_file()
+
+    store.load()
+
+    assert legacy.is_dir()
+    assert (tmp_path / "email_retry.json.migrated").is_file()
+    assert len(entry_files(legacy)) == 1
+    assert [e["payload"]["subject"] for e in store.take_due()] == ["old"]
+
+
+def test_worker_start_loads_store(resend, tmp_path):
+    legacy = tmp_path / "email_retry.json"
+    legacy.write_text(json.dumps([{"payload": payload("old"), "attempts": 1, "next_at": 0}]))
+    store = RetryStore(str(legacy))
+
+    async def scenario():
+        worker = EmailDeliveryWorker(store, retry_interval=3600)
+        await worker.start()
+        pending = worker.snapshot()["retry_pending"]
+        await worker.stop()
+        return pending
+
+    assert asyncio.run(scenario()) == 1
+    assert legacy.is_dir()
+
+
+def test_send_email_accepts_any_2xx(resend):
+    resend.status = 202
+    assert emailer.send_email("Spill", "body", ["ops@example.com"])
+    assert resend.paths() == ["/emails"]
+
+    resend.status = 422
+    assert not emailer.send_email("Spill", "body", ["ops@example.com"])
+
+
+def test_queue_email_without_worker_stores_retryable_failure(resend, tmp_path, monkeypatch):
+    store = RetryStore(str(tmp_path / "retry"))
+    monkeypatch.setattr(emailer, "retry_store", store)
+    resend.status = 503
+
+    assert emailer.queue_email("Spill", "body", ["ops@example.com"])
+    assert len(store) == 1
+
+
+def test_worker_sends_and_queues_failures(resend, tmp_path):
+    store = RetryStore(str(tmp_path / "retry"), base_delay=0)
+
+    async def scenario():
+        worker = EmailDeliveryWorker(store, max_concurrency=2, retry_interval=3600)
+        await worker.start()
+        resend.status = 202
+        assert worker.enqueue(payload("ok"))
+        await asyncio.sleep(0)
+        await worker._queue.join()
+
+        resend.status = 500
+        worker.enqueue(payload("fails"))
+        await asyncio.sleep(0)
+        await worker._queue.join()
+        await worker.stop()
+        return worker.stats
+
+    stats = asyncio.run(scenario())
+    assert stats["sent"] == 1
+    assert stats["failed"] == 1
+    assert stats["retried"] == 1
+    assert [e["payload"]["subject"] for e in store.take_due()] == ["fails"]
+
+
+def test_worker_batches_due_retries(resend, tmp_path):
+    store = RetryStore(str(tmp_path / "retry"), base_delay=0)
+    for subject in ("a", "b", "c"):
+        store.push(payload(subject), 1)
+    store.push(payload("image", attachment=True), 1)
+
+    async def scenario():
+        worker = EmailDeliveryWorker(store, retry_interval=0.05)
+        await worker.start()
+        resend.status = 200
+        for _ in range(100):
+            if len(resend.requests) >= 2:
+                break
+            await asyncio.sleep(0.05)
+        await worker.stop()
+        return worker.stats
+
+    stats = asyncio.run(scenario())
+    assert sorted(resend.paths()) == ["/emails", "/emails/batch"]
+    batch = next(body for _, path, body in resend.requests if path == "/emails/batch")
+    assert [p["subject"] for p in batch] == ["a", "b", "c"]
+    assert stats["sent"] == 4
+    assert stats["batched"] == 1
+    assert len(store) == 0
+
+
+def test_stop_waits_for_inflight_send(resend, tmp_path):
+    store = RetryStore(str(tmp_path / "retry"))
+    resend.delay = 0.3
+
+    async def scenario():
+        worker = EmailDeliveryWorker(store, drain_timeout=5)
+        await worker.start()
+        worker.enqueue(payload("slow"))
+        await asyncio.sleep(0.05)
+        await worker.stop()
+        return worker.stats
+
+    assert asyncio.run(scenario())["sent"] == 1
+    assert len(store) == 0
+
+
+def test_stop_persists_sends_it_cannot_finish(resend, tmp_path):
+    store = RetryStore(str(tmp_path / "retry"))
+    resend.delay = 1.0
+
+    async def scenario():
+        worker = EmailDeliveryWorker(store, max_concurrency=1, drain_timeout=0.2)
+        await worker.start()
+        worker.enqueue(payload("inflight"))
+        worker.enqueue(payload("queued"))
+        await asyncio.sleep(0.05)
+        await worker.stop()
+        return worker.stats
+
+    stats = asyncio.run(scenario())
+    assert stats["sent"] == 0
+    subjects = sorted(e["payload"]["subject"] for e in store.take_due(now=float("inf")))
+    assert subjects == ["inflight", "queued"]
+    assert len(entry_files(tmp_path / "retry")) == 0
@@ -0,0 +1,180 @@
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes import video_jobs as video_routes
+from app.services import video_jobs
+from app.services.video_jobs import VideoJobManager
+from conftest import wait_for
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    frames = []
+    monkeypatch.setattr(VideoJobManager, "_flush", lambda self, job, batch: (
+        frames.extend(batch), setattr(job, "frames", job.frames + len(batch))
+    ))
+    jobs = VideoJobManager(concurrency=1)
+    jobs.flushed = frames
+    yield jobs
+    jobs.shutdown()
+
+
+def run(manager, path, **kwargs):
+    job = manager.submit(path, stride=0.5, **kwargs)
+    assert wait_for(lambda: job.status in ("completed", "failed", "cancelled"), timeout=15), job.to_dict()
+    return job
+
+
+def test_job_decodes_local_video(ffmpeg, clip, manager, monkeypatch):
+    monkeypatch.setattr(video_jobs, "CAPTURE_FFMPEG", ffmpeg)
+
+    job = run(manager, clip)
+
+    assert job.status == "completed", job.error
+    assert job.frames == 4
+    assert all(f.startswith(b"\xff\xd8") for f in manager.flushed)
+
+
+def test_verbose_stderr_does_not_block_job(ffmpeg, clip, fake_ffmpeg, manager, monkeypatch):
+    wrapper = fake_ffmpeg(f"""
+head -c 262144 /dev/zero | tr '\\0' 'x' >&2
+exec "{ffmpeg}" "$@"
+""")
+    monkeypatch.setattr(video_jobs, "CAPTURE_FFMPEG", wrapper)
+
+    job = run(manager, clip)
+
+    assert job.status == "completed", job.error
+    assert job.frames == 4
+
+
+def test_hung_ffmpeg_times_out(clip, fake_ffmpeg, manager, monkeypatch):
+    monkeypatch.setattr(video_jobs, "CAPTURE_FFMPEG", fake_ffmpeg("exec sleep 30\n"))
+    monkeypatch.setattr(video_jobs, "VIDEO_JOB_TIMEOUT", 0.5)
+
+    job = run(manager, clip)
+
+    assert job.status == "failed"
+    assert job.error.startswith("Timed out")
+
+
+def test_failed_ml_batch_counts_frames_and_job_continues(ffmpeg, clip, monkeypatch):
+    monkeypatch.setattr(video_jobs, "CAPTURE_FFMPEG", ffmpeg)
+    monkeypatch.setattr(video_jobs, "ML_BATCH_SIZE", 2)
+    calls = []
+
+    def detect(batch, session=None):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise RuntimeError("ML service timed out")
+        return [{"count": 0, "detections": []} for _ in batch]
+
+    monkeypatch.setattr(video_jobs, "detect_batch_sync", detect)
+    monkeypatch.setattr("app.routes.detection.save_detections_bulk", lambda rows: len(rows))
+    jobs = VideoJobManager(concurrency=1)
+    try:
+        job = run(jobs, clip)
+    finally:
+        jobs.shutdown()
+
+    assert job.status == "completed", job.error
+    assert calls == [2, 2]
+    assert job.frames == 4
+    assert job.failed_frames == 2
+
+
+def test_failed_flush_stops_ffmpeg_and_removes_upload(ffmpeg, clip, fake_ffmpeg, tmp_path, monkeypatch):
+    pidfile = tmp_path / "ffmpeg.pid"
+    # -re streams the clip in real time, so ffmpeg is still running at the first flush.
+    monkeypatch.setattr(video_jobs, "CAPTURE_FFMPEG", fake_ffmpeg(f"""
+echo $$ > "{pidfile}"
+exec "{ffmpeg}" -re "$@"
+"""))
+    monkeypatch.setattr(video_jobs, "ML_BATCH_SIZE", 1)
+
+    def flush(self, job, batch):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(VideoJobManager, "_flush", flush)
+    upload = tmp_path / "upload.avi"
+    upload.write_bytes(open(clip, "rb").read())
+    jobs = VideoJobManager(concurrency=1)
+    try:
+        job = run(jobs, str(upload), cleanup=True)
+    finally:
+        jobs.shutdown()
+
+    assert job.status == "failed"
+    assert job.error == "database unavailable"
+    assert not upload.exists()
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pidfile.read_text()), 0)
+
+
+def test_local_inputs_cannot_use_playlist_demuxers():
+    args = video_jobs.input_args("/data/video_jobs/upload.mp4")
+
+    formats = args[args.index("-format_whitelist") + 1].split(",")
+    assert args[args.index("-protocol_whitelist") + 1] == "file"
+    assert "hls" not in formats and "concat" not in formats
+    assert video_jobs.input_args("rtsp://cam.local/stream") == ["-i", "rtsp://cam.local/stream"]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    submitted = []
+
+    class Jobs:
+        def submit(self, path, stride, source=None, cleanup=False):
+            submitted.append(path)
+            return type("Job", (), {"to_dict": lambda self: {"path": path}})()
+
+    monkeypatch.setattr(video_routes, "video_jobs", Jobs())
+    monkeypatch.setattr(video_routes, "VIDEO_JOB_DIR", str(tmp_path))
+    app = FastAPI()
+    app.include_router(video_routes.router, prefix="/jobs")
+    client = TestClient(app)
+    client.submitted = submitted
+    return client
+
+
+@pytest.mark.parametrize("url", [
+    "http://169.254.169.254/latest/meta-data",
+    "https://internal.example/video.mp4",
+    "rtsp://10.0.0.5/stream",
+])
+def test_remote_paths_need_allowlisted_host(client, url):
+    response = client.post("/jobs/video", data={"path": url})
+
+    assert response.status_code == 403
+    assert client.submitted == []
+
+
+def test_allowlisted_remote_path_is_accepted(client, monkeypatch):
+    monkeypatch.setattr(video_routes, "VIDEO_JOB_URL_ALLOWLIST", {"cams.example.com"})
+
+    response = client.post("/jobs/video", data={"path": "https://cams.example.com/a.mp4"})
+
+    assert response.status_code == 200
+    assert client.submitted == ["https://cams.example.com/a.mp4"]
+
+
+def test_local_path_must_stay_inside_job_dir(client, tmp_path):
+    (tmp_path / "clip.mp4").write_bytes(b"video")
+
+    assert client.post("/jobs/video", data={"path": "../../etc/passwd"}).status_code == 400
+    assert client.post("/jobs/video", data={"path": "clip.mp4"}).status_code == 200
+    assert client.submitted == [os.path.realpath(tmp_path / "clip.mp4")]
+
+
+def test_upload_over_limit_is_rejected_and_removed(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(video_routes, "VIDEO_JOB_MAX_UPLOAD_BYTES", 1024)
+
+    response = client.post("/jobs/video", files={"file": ("big.mp4", b"x" * 4096, "video/mp4")})
+
+    assert response.status_code == 413
+    assert client.submitted == []
+    assert os.listdir(tmp_path) == []
@@ -1,7 +1,11 @@
 import { useEffect, useState } from "react";
 import api from "../services/api";
+import { subscribeDetections } from "../services/events.service";
 import HistoryItem from "../components/HistoryItem";
 
+// Same page size as GET /history's default limit.
+const HISTORY_LIMIT = 50;
+
 interface HistoryType {
   id: number;
   source: string;
@@ -61,8 +65,28 @@ export default function HistoryPage() {
 
     loadHistory();
 
+    // Saved detections arrive with their history row, so they are added
+    // in place instead of re-fetching the list.
+    const unsubscribe = subscribeDetections((event) => {
+      if (typeof event.id !== "number") return;
+      const item: HistoryType = {
+        id: event.id,
+        source: event.source,
+        is_dirty: event.is_dirty,
+        confidence: event.confidence,
+        notes: event.notes ?? null,
+        created_at: event.created_at,
+      };
+      setHistory((prev) =>
+        prev.some((h) => h.id === item.id)
+          ? prev
+          : [item, ...prev].slice(0, HISTORY_LIMIT)
+      );
+    });
+
     return () => {
       cancelled = true;
+      unsubscribe();
     };
   }, []);
 
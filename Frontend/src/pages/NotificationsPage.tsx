@@ -6,6 +6,12 @@ import {
   toggleEmailRecipient,
   type EmailRecipient,
 } from "../services/email.service";
+import {
+  subscribeDetections,
+  type DetectionEvent,
+} from "../services/events.service";
+
+const RECENT_ALERTS = 5;
 
 export default function NotificationsPage() {
   const [list, setList] = useState<EmailRecipient[]>([]);
@@ -13,6 +19,7 @@ export default function NotificationsPage() {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [togglingId, setTogglingId] = useState<number | null>(null);
+  const [alerts, setAlerts] = useState<DetectionEvent[]>([]);
 
   const fetch = async () => {
     setLoading(true);
@@ -34,6 +41,16 @@ export default function NotificationsPage() {
     fetch();
   }, []);
 
+  // Live feed of dirty detections, i.e. what recipients are being alerted about.
+  useEffect(
+    () =>
+      subscribeDetections((event) => {
+        if (!event.is_dirty) return;
+        setAlerts((prev) => [event, ...prev].slice(0, RECENT_ALERTS));
+      }),
+    []
+  );
+
   const handleAdd = async () => {
     if (!email) return;
     try {
@@ -90,6 +107,19 @@ export default function NotificationsPage() {
         </button>
       </div>
 
+      {alerts.length > 0 && (
+        <div className="p-3 bg-amber-50 border border-amber-200 rounded space-y-1">
+          <div className="font-semibold text-amber-800">Deteksi kotor terbaru</div>
+          {alerts.map((a) => (
+            <div key={`${a.source}-${a.created_at}`} className="text-sm text-amber-900">
+              {new Date(a.created_at).toLocaleTimeString("id-ID")} · {a.source} ·{" "}
+              {(a.confidence * 100).toFixed(0)}%
+              {a.new_tracks > 0 && ` · ${a.new_tracks} tumpahan baru`}
+            </div>
+          ))}
+        </div>
+      )}
+
       {loading && <p>Memuat...</p>}
 
       {error && (
@@ -0,0 +1,33 @@
+import { API_BASE } from "./api";
+
+export interface DetectionEvent {
+  type: "detection";
+  source: string;
+  is_dirty: boolean;
+  confidence: number;
+  count: number;
+  // Spills first seen in this frame; 0 when tracking is off or nothing is new.
+  new_tracks: number;
+  created_at: string;
+  // Set once the detection is saved; created_at is then the row's own.
+  id?: number;
+  notes?: string | null;
+}
+
+export const subscribeDetections = (
+  onEvent: (event: DetectionEvent) => void,
+  source?: string
+): (() => void) => {
+  const query = source ? `?source=${encodeURIComponent(source)}` : "";
+  const es = new EventSource(`${API_BASE}/events${query}`);
+
+  es.addEventListener("detection", (e) => {
+    try {
+      onEvent(JSON.parse((e as MessageEvent).data) as DetectionEvent);
+    } catch (err) {
+      console.error("[EVENTS] Invalid event payload:", err);
+    }
+  });
+
+  return () => es.close();
+};
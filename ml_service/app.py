@@ -1,70 +1,427 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Header, Response
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from dataclasses import asdict, replace
+import os
+import hmac
+import asyncio
 import cv2
 import numpy as np
-from ultralytics import YOLO
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 import logging
 
+from inference_profile import InferenceProfile, ProfileError, model_kwargs, parse_profile
+from metrics import MetricsMiddleware, count_decisions, observe_batch, stage
+from model_manager import MODEL_WATCH_INTERVAL, RELOAD_TOKEN, ModelManager, load_state, warm_up
+from settings import REFERENCE_SIZE, InferenceSettings, apply_threading, load_settings, resolve_precision
+from tracking import TrackerStore
+from tiling import (
+    TILE_MERGE_IOU,
+    TILE_MIN_SIDE,
+    TILE_OVERLAP,
+    TILE_SIZE,
+    make_tiles,
+    merge_detections,
+    should_tile,
+)
+from workers import process_memory
+from profiling import (
+    PROFILE_ENABLED,
+    PYINSTRUMENT_AVAILABLE,
+    ProfilingMiddleware,
+    is_admin,
+    profile_store,
+)
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("flooreye-ml")
 
-app = FastAPI(title="FloorEye ML Service")
+settings = resolve_precision(load_settings())
+apply_threading(settings)
 
-try:
-    logger.info("Loading YOLO model...")
-    model = YOLO("models/best.pt")
-    model.to("cpu")
-    logger.info("YOLO model loaded")
-except Exception as e:
-    logger.error(f"YOLO load failed: {e}")
-    raise RuntimeError(e)
+manager = ModelManager(settings)
 
+# Set by serve.py when running with WORKERS > 1; None means inference runs in
+# this process.
+pool = None
 
-@app.get("/")
-def root():
-    return {"status": "ml_service running"}
+# Cross-frame tracking runs here, in the HTTP process, so one session's
+# frames see the same tracker whichever worker ran them.
+trackers = TrackerStore()
 
 
-@app.post("/detect/frame")
-async def detect_frame(file: UploadFile = File(...)):
-    try:
-        image_bytes = await file.read()
-        if not image_bytes:
-            raise HTTPException(400, "Empty image")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # serve.py loads the model before forking workers. Otherwise load it in
+    # the background so /ready can answer while the model warms up.
+    if not manager.ready:
+        manager.load_in_background()
+
+    watcher = None
+    if MODEL_WATCH_INTERVAL > 0:
+        watcher = asyncio.create_task(manager.watch(pool, reload_worker))
+
+    yield
+
+    if watcher is not None:
+        watcher.cancel()
+
+
+app = FastAPI(title="FloorEye ML Service", lifespan=lifespan)
+if PROFILE_ENABLED:
+    app.add_middleware(ProfilingMiddleware, store=profile_store)
+app.add_middleware(MetricsMiddleware)
+
+
+def decode_image(image_bytes: bytes) -> np.ndarray:
+    if not image_bytes:
+        raise HTTPException(400, "Empty image")
 
+    with stage("decode"):
         img = cv2.imdecode(
             np.frombuffer(image_bytes, np.uint8),
             cv2.IMREAD_COLOR
         )
 
-        if img is None:
-            raise HTTPException(400, "Invalid image data")
+    if img is None:
+        raise HTTPException(400, "Invalid image data")
+
+    h, w, _ = img.shape
+    if h < 50 or w < 50:
+        raise HTTPException(400, "Image too small")
+
+    return img
+
+
+def input_size_for(profile: Optional[InferenceProfile], current: InferenceSettings) -> int:
+    # Exported models (onnx/openvino/int8) have a fixed input shape.
+    if profile is not None and profile.input_size and current.backend == "pytorch":
+        return profile.input_size
+    return current.input_size
+
+
+def prepare_image(img: np.ndarray, profile: Optional[InferenceProfile], size: int) -> List[tuple]:
+    """Crop to the profile ROI, split into tiles if needed and resize.
+
+    Returns one (model input, transform) pair per tile (a single pair when
+    not tiled). The transform (dx, dy, kx, ky) maps model-input pixels back
+    to the full frame in REFERENCE_SIZE coordinates.
+    """
+    h, w = img.shape[:2]
+    offset = (0, 0)
+    if profile is not None:
+        with stage("roi"):
+            img, offset = profile.apply(img)
+
+    ch, cw = img.shape[:2]
+    tile = profile.tile if profile is not None and profile.tile is not None else should_tile(ch, cw)
+    if tile:
+        parts = make_tiles(img)
+    else:
+        parts = [(img, (0, 0))]
+
+    sx, sy = REFERENCE_SIZE / w, REFERENCE_SIZE / h
+    prepared = []
+    with stage("resize"):
+        for part, (tx, ty) in parts:
+            ph, pw = part.shape[:2]
+            prepared.append((
+                cv2.resize(part, (size, size)),
+                ((offset[0] + tx) * sx, (offset[1] + ty) * sy, pw / size * sx, ph / size * sy),
+            ))
+    return prepared
+
+
+def to_detections(result, transform) -> List[dict]:
+    detections = []
+    boxes = result.boxes
+    dx, dy, kx, ky = transform
+
+    if boxes is not None:
+        for box in boxes:
+            x1, y1, x2, y2 = (float(v) for v in box.xyxy[0])
+            detections.append({
+                "class_id": int(box.cls[0]),
+                "confidence": float(box.conf[0]),
+                "bbox": [dx + x1 * kx, dy + y1 * ky, dx + x2 * kx, dy + y2 * ky]
+            })
+
+    return detections
+
+
+@app.get("/")
+def root():
+    state = manager.active
+    return {
+        "status": "ml_service running" if state is not None else "ml_service loading",
+        "settings": asdict(manager.settings),
+        "model": state.describe() if state is not None else None,
+        "tiling": {"tile_size": TILE_SIZE, "overlap": TILE_OVERLAP, "min_side": TILE_MIN_SIDE},
+        "cascade": state.gate.describe() if state is not None and state.gate is not None else None,
+        "tracking": trackers.stats(),
+    }
+
+
+@app.get("/ready")
+def ready(response: Response):
+    state = manager.active
+    if state is None:
+        response.status_code = 503
+        return {"ready": False, "error": manager.error}
+    return {"ready": True, **state.describe(), "reload": manager.reload_status}
+
+
+class ReloadRequest(BaseModel):
+    model_path: Optional[str] = None
+    backend: Optional[str] = None
+    precision: Optional[str] = None
+    input_size: Optional[int] = None
+    conf: Optional[float] = None
+
+
+def require_reload_admin(token: Optional[str]):
+    if not RELOAD_TOKEN:
+        raise HTTPException(404, "Reload disabled")
+    if not hmac.compare_digest((token or "").encode(), RELOAD_TOKEN.encode()):
+        raise HTTPException(403, "Invalid reload token")
+
+
+def reload_worker(values: dict) -> dict:
+    """Runs inside a pool worker: load and warm up the new model, then swap."""
+    state = load_state(InferenceSettings(**values))
+    return {**state.describe(), "pid": os.getpid(), "swap_ms": round(manager.swap(state), 4)}
+
+
+def warm_worker() -> dict:
+    warm_up(manager.active)
+    return {**manager.active.describe(), "pid": os.getpid()}
+
+
+@app.post("/admin/reload", status_code=202)
+async def reload_model(body: Optional[ReloadRequest] = None, x_reload_token: Optional[str] = Header(None)):
+    require_reload_admin(x_reload_token)
+    if not manager.ready:
+        raise HTTPException(409, "Initial model load still running")
+    if manager.reloading:
+        raise HTTPException(409, "Reload already in progress")
+
+    changes = body.model_dump(exclude_none=True) if body is not None else {}
+    try:
+        target = resolve_precision(replace(manager.settings, **changes))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if not os.path.exists(target.model_path):
+        raise HTTPException(400, f"{target.model_path} not found")
+
+    asyncio.create_task(manager.reload(target, pool, reload_worker))
+    return {"state": "loading", "target": asdict(target)}
+
 
-        h, w, _ = img.shape
-        if h < 50 or w < 50:
-            raise HTTPException(400, "Image too small")
+@app.get("/admin/reload")
+def reload_status(x_reload_token: Optional[str] = Header(None)):
+    require_reload_admin(x_reload_token)
+    return manager.reload_status
 
-        img = cv2.resize(img, (640, 640))
 
-        results = model(img, conf=0.25)
+@app.get("/metrics")
+def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
-        detections = []
-        boxes = results[0].boxes
 
-        if boxes is not None:
-            for box in boxes:
-                detections.append({
-                    "class_id": int(box.cls[0]),
-                    "confidence": float(box.conf[0]),
-                    "bbox": [float(x) for x in box.xyxy[0]]
-                })
+def require_profile_admin(token: Optional[str]):
+    if not PROFILE_ENABLED:
+        raise HTTPException(404, "Profiling disabled")
+    if not is_admin(token):
+        raise HTTPException(403, "Invalid profile token")
+
+
+@app.get("/debug/profiles")
+def list_profiles(x_profile: Optional[str] = Header(None)):
+    require_profile_admin(x_profile)
+    return {
+        "profiler": "pyinstrument" if PYINSTRUMENT_AVAILABLE else "cProfile",
+        "profiles": profile_store.list(),
+    }
+
+
+@app.get("/debug/profiles/{name}")
+def download_profile(name: str, x_profile: Optional[str] = Header(None)):
+    require_profile_admin(x_profile)
+
+    path = profile_store.path_for(name)
+    if path is None:
+        raise HTTPException(404, "Profile not found")
+
+    media_type = "text/html" if name.endswith(".html") else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=name)
+
+
+@app.get("/tracking")
+def tracking():
+    return trackers.stats()
+
+
+@app.delete("/tracking/{session}")
+def end_session(session: str):
+    return {"session": session, "dropped": trackers.drop(session)}
+
+
+@app.get("/workers")
+def workers():
+    if pool is None:
+        return {"mode": "single", "parent": {"pid": os.getpid(), **process_memory(os.getpid())}}
+    return {"mode": "pool", **pool.stats()}
+
+
+def run_gate(gate, prepared: List[tuple], tiled: set, max_batch: int) -> dict:
+    """Gate score per image index for every untiled image."""
+    candidates = [(img, i) for img, _, i in prepared if i not in tiled]
+    scores = {}
+    for start in range(0, len(candidates), max_batch):
+        chunk = candidates[start:start + max_batch]
+        with stage("gate"):
+            values = gate.clean_scores([img for img, _ in chunk])
+        scores.update((i, score) for (_, i), score in zip(chunk, values))
+    return scores
+
+
+def run_inference(images: List[bytes], profile: Optional[InferenceProfile] = None) -> List[dict]:
+    # One state for the whole call, so a concurrent reload cannot mix models.
+    state = manager.active
+    if state is None:
+        raise RuntimeError("Model not loaded")
+    current = state.settings
+    max_batch = current.max_batch
+
+    size = input_size_for(profile, current)
+    conf = profile.conf if profile is not None and profile.conf is not None else current.conf
+    extra = model_kwargs(profile)
+
+    results: List[dict] = [None] * len(images)
+    detections: List[Optional[list]] = [None] * len(images)
+    tiled = set()
+    # Flat list of (model input, transform, image index); tiles of every
+    # frame share the same model calls.
+    prepared = []
+
+    for i, image_bytes in enumerate(images):
+        try:
+            parts = prepare_image(decode_image(image_bytes), profile, size)
+        except HTTPException as e:
+            results[i] = {"error": e.detail, "detections": [], "count": 0}
+            continue
+        detections[i] = []
+        if len(parts) > 1:
+            tiled.add(i)
+        prepared.extend((img, transform, i) for img, transform in parts)
+
+    # Tiled frames skip the gate: downscaling them would hide the small
+    # objects tiling is there to find.
+    gate = state.gate
+    gate_scores = run_gate(gate, prepared, tiled, max_batch) if gate is not None else {}
+    gated = {i for i, score in gate_scores.items() if score >= gate.threshold}
+    if gated:
+        prepared = [item for item in prepared if item[2] not in gated]
+    count_decisions("gate", len(gated))
+    count_decisions("detector", sum(1 for d in detections if d is not None) - len(gated))
+
+    for start in range(0, len(prepared), max_batch):
+        chunk = prepared[start:start + max_batch]
+        observe_batch(len(chunk))
+        with stage("inference"):
+            outputs = state.model([img for img, _, _ in chunk], conf=conf, imgsz=size, verbose=False, **extra)
+        with stage("postprocess"):
+            for (_, transform, i), output in zip(chunk, outputs):
+                detections[i].extend(to_detections(output, transform))
+
+    with stage("postprocess"):
+        for i, found in enumerate(detections):
+            if found is None:
+                continue
+            if i in tiled:
+                found = merge_detections(found, iou=extra.get("iou", TILE_MERGE_IOU))
+                if "max_det" in extra:
+                    found = found[:extra["max_det"]]
+            results[i] = {
+                "detections": found,
+                "count": len(found),
+                "stage": "gate" if i in gated else "detector",
+                "model_version": state.version,
+            }
+            if i in gate_scores:
+                results[i]["gate_score"] = round(gate_scores[i], 4)
+
+    return results
+
+
+async def infer(images: List[bytes], profile: Optional[InferenceProfile] = None) -> List[dict]:
+    if not manager.ready:
+        raise HTTPException(503, "Model is loading")
+    if pool is not None:
+        return await pool.submit(images, profile=profile)
+    return run_inference(images, profile)
+
+
+def read_profile(raw: Optional[str]) -> Optional[InferenceProfile]:
+    try:
+        return parse_profile(raw)
+    except ProfileError as e:
+        raise HTTPException(400, str(e))
+
+
+def read_session(session: Optional[str]) -> Optional[str]:
+    if session is not None and not 0 < len(session) <= 128:
+        raise HTTPException(400, "session must be 1-128 characters")
+    return session
+
+
+@app.post("/detect/frame")
+async def detect_frame(
+    file: UploadFile = File(...),
+    profile: Optional[str] = Form(None),
+    session: Optional[str] = Form(None),
+):
+    inference_profile = read_profile(profile)
+    session = read_session(session)
+    try:
+        result = (await infer([await file.read()], inference_profile))[0]
+        if "error" in result:
+            raise HTTPException(400, result["error"])
+
+        if session is not None:
+            trackers.track(session, [result])
+        return result
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Detection error")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/detect/batch")
+async def detect_batch(
+    files: List[UploadFile] = File(...),
+    profile: Optional[str] = Form(None),
+    session: Optional[str] = Form(None),
+):
+    inference_profile = read_profile(profile)
+    session = read_session(session)
+    try:
+        results = await infer([await file.read() for file in files], inference_profile)
+        # Files are treated as consecutive frames of the session.
+        if session is not None:
+            trackers.track(session, results)
 
         return {
-            "detections": detections,
-            "count": len(detections)
+            "results": results,
+            "count": len(results)
         }
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.exception("Detection error")
+        logger.exception("Batch detection error")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,681 @@
+#!/usr/bin/env python3
+"""
+Benchmark and autotune inference settings for this host.
+
+Replays a directory of sample frames through the model for every
+combination of input size, batch size, torch intra-op / inter-op threads,
+worker count and backend. Each combination runs in fresh processes (one per
+worker, started together) so thread settings and memory are measured
+cleanly. The fastest combination that meets the optional latency and
+memory limits is written to the tuned config file, which app.py reads at
+startup (explicit environment variables still take precedence).
+
+    python benchmark.py --frames samples/ --input-sizes 512,640 \\
+        --batch-sizes 1,4,8 --threads 0,2,4 --workers 1,2 \\
+        --backends pytorch,onnx --max-p95-ms 400
+
+Smaller input sizes are faster but less accurate; only list sizes whose
+accuracy has been checked.
+
+``scaling`` starts serve.py with each WORKERS value and drives concurrent
+/detect/frame requests against it, reporting throughput, latency and the
+RSS / PSS of the parent and every worker (PSS shows how much of the model
+is really shared):
+
+    python benchmark.py scaling --frames samples/ --workers 1,2,4 --duration 30
+
+``tiling`` compares tiled inference (TILE_SIZE / TILE_OVERLAP) with single
+passes at larger input sizes on a labelled set in YOLO layout
+(images/x.jpg with labels/x.txt), reporting latency and recall:
+
+    python benchmark.py tiling --images val/images --single-sizes 1280,1920
+
+``cascade`` runs the same kind of labelled set with and without the
+CASCADE_MODE gate, reporting CPU time per frame and dirty-frame recall:
+
+    CASCADE_MODE=classifier python benchmark.py cascade --images val/images
+
+``reload`` starts serve.py, times the cold start until /ready and the first
+request, then reloads the model through /admin/reload while driving load,
+reporting latency and errors during the swap:
+
+    python benchmark.py reload --frames samples/ --workers 2 --model-path best_v2.pt
+"""
+
+import sys
+import json
+import time
+import argparse
+import itertools
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+
+from settings import TUNED_CONFIG_PATH, InferenceSettings, export_model, host_fingerprint, load_settings
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def int_list(value):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def run_trial(config: dict):
+    """Child process: load the model with ``config`` and replay the frames."""
+    import resource
+
+    import cv2
+    import numpy as np
+    from ultralytics import YOLO
+
+    from settings import apply_threading
+
+    settings = InferenceSettings(**config["settings"])
+    apply_threading(settings)
+
+    load_start = time.perf_counter()
+    model = YOLO(export_model(settings), task="detect")
+    load_seconds = time.perf_counter() - load_start
+
+    frames = [Path(p).read_bytes() for p in config["frames"]]
+
+    def decode(data):
+        img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        return cv2.resize(img, (settings.input_size, settings.input_size))
+
+    def run_batch(i):
+        batch = [decode(frames[(i + j) % len(frames)]) for j in range(settings.max_batch)]
+        model(batch, conf=settings.conf, imgsz=settings.input_size, verbose=False)
+
+    for i in range(config["warmup"]):
+        run_batch(i * settings.max_batch)
+
+    # Workers of one trial start together so they really compete for CPU.
+    print("ready", flush=True)
+    sys.stdin.readline()
+
+    latencies = []
+    start = time.perf_counter()
+    for i in range(config["iterations"]):
+        t0 = time.perf_counter()
+        run_batch(i * settings.max_batch)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "images": config["iterations"] * settings.max_batch,
+        "elapsed": elapsed,
+        "latencies_ms": latencies,
+        "load_seconds": load_seconds,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def measure(settings: InferenceSettings, frames, iterations, warmup):
+    config = {
+        "settings": asdict(settings),
+        "frames": frames,
+        "iterations": iterations,
+        "warmup": warmup,
+    }
+
+    procs = [
+        subprocess.Popen(
+            [sys.executable, __file__, "trial", json.dumps(config)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(settings.workers)
+    ]
+
+    for proc in procs:
+        for line in proc.stdout:
+            if line.strip() == "ready":
+                break
+    for proc in procs:
+        if proc.poll() is None:
+            proc.stdin.write("go\n")
+            proc.stdin.flush()
+
+    outputs = []
+    for proc in procs:
+        out, _ = proc.communicate()
+        if proc.returncode != 0:
+            return {"settings": asdict(settings), "error": f"trial exited with {proc.returncode}"}
+        outputs.append(json.loads(out.strip().splitlines()[-1]))
+
+    latencies = [l for o in outputs for l in o["latencies_ms"]]
+    images = sum(o["images"] for o in outputs)
+    elapsed = max(o["elapsed"] for o in outputs)
+
+    return {
+        "settings": asdict(settings),
+        "throughput_ips": round(images / elapsed, 2),
+        "batch_latency_ms": {
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+        },
+        "per_image_ms": round(percentile(latencies, 50) / settings.max_batch, 1),
+        "rss_mb_per_worker": round(max(o["rss_mb"] for o in outputs), 1),
+        "rss_mb_total": round(sum(o["rss_mb"] for o in outputs), 1),
+        "load_seconds": round(max(o["load_seconds"] for o in outputs), 2),
+    }
+
+
+def pick_best(results, max_p95_ms, max_rss_mb):
+    feasible = [
+        r for r in results
+        if "error" not in r
+        and (not max_p95_ms or r["batch_latency_ms"]["p95"] <= max_p95_ms)
+        and (not max_rss_mb or r["rss_mb_total"] <= max_rss_mb)
+    ]
+    if not feasible:
+        return None
+    return max(feasible, key=lambda r: (r["throughput_ips"], -r["batch_latency_ms"]["p95"]))
+
+
+def list_frames(directory, limit):
+    return sorted(
+        str(p) for p in Path(directory).iterdir()
+        if p.suffix.lower() in IMAGE_SUFFIXES
+    )[:limit]
+
+
+def wait_ready(url, proc, timeout):
+    import requests
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"serve.py exited with {proc.returncode}")
+        try:
+            if requests.get(f"{url}/ready", timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"serve.py not ready after {timeout}s")
+
+
+def drive(url, frames, concurrency, duration):
+    import requests
+
+    payloads = [Path(p).read_bytes() for p in frames]
+    deadline = time.perf_counter() + duration
+
+    def client(n):
+        session = requests.Session()
+        latencies, errors, i = [], 0, n
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            res = session.post(
+                f"{url}/detect/frame",
+                files={"file": ("frame.jpg", payloads[i % len(payloads)], "image/jpeg")},
+                timeout=60,
+            )
+            if res.status_code == 200:
+                latencies.append((time.perf_counter() - t0) * 1000)
+            else:
+                errors += 1
+            i += concurrency
+        return latencies, errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        outcomes = list(executor.map(client, range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [l for lat, _ in outcomes for l in lat]
+    return {
+        "requests": len(latencies),
+        "errors": sum(e for _, e in outcomes),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 1) if latencies else None,
+            "p95": round(percentile(latencies, 95), 1) if latencies else None,
+        },
+    }
+
+
+def scaling(argv):
+    import os
+
+    import requests
+
+    parser = argparse.ArgumentParser(prog="benchmark.py scaling")
+    parser.add_argument("--frames", required=True, help="directory of sample frames")
+    parser.add_argument("--workers", type=int_list, default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=0, help="parallel clients, 0 = 2 per worker")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load per worker count")
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--cpus", default="", help="WORKER_CPUS for serve.py, e.g. auto")
+    parser.add_argument("--port", type=int, default=7961)
+    parser.add_argument("--max-frames", type=int, default=64)
+    parser.add_argument("--output", default="", help="also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    frames = list_frames(args.frames, args.max_frames)
+    if not frames:
+        parser.error(f"No images found in {args.frames}")
+
+    url = f"http://127.0.0.1:{args.port}"
+    here = os.path.dirname(os.path.abspath(__file__))
+    runs = []
+
+    for workers in args.workers:
+        env = {**os.environ, "WORKERS": str(workers), "WORKER_CPUS": args.cpus, "PORT": str(args.port)}
+        proc = subprocess.Popen([sys.executable, "serve.py"], cwd=here, env=env)
+        try:
+            wait_ready(url, proc, timeout=300)
+            concurrency = args.concurrency or 2 * workers
+            drive(url, frames, concurrency, args.warmup)
+            result = drive(url, frames, concurrency, args.duration)
+            memory = requests.get(f"{url}/workers", timeout=10).json()
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+        processes = [memory["parent"]] + memory.get("workers", [])
+        run = {
+            "workers": workers,
+            "concurrency": concurrency,
+            **result,
+            "rss_mb_total": round(sum(p.get("rss_mb", 0) for p in processes), 1),
+            "pss_mb_total": round(sum(p.get("pss_mb", 0) for p in processes), 1),
+            "processes": processes,
+        }
+        runs.append(run)
+        print(json.dumps({k: v for k, v in run.items() if k != "processes"}), file=sys.stderr)
+
+    report = {
+        "host": host_fingerprint(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": asdict(load_settings()),
+        "runs": runs,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+
+
+def reload(argv):
+    import os
+    import threading
+
+    import requests
+
+    parser = argparse.ArgumentParser(prog="benchmark.py reload")
+    parser.add_argument("--frames", required=True, help="directory of sample frames")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=0, help="parallel clients, 0 = 2 per worker")
+    parser.add_argument("--duration", type=float, default=60, help="seconds of load around the reload")
+    parser.add_argument("--model-path", default="", help="model to reload to (default: the same file)")
+    parser.add_argument("--port", type=int, default=7962)
+    parser.add_argument("--max-frames", type=int, default=64)
+    parser.add_argument("--output", default="")
+    args = parser.parse_args(argv)
+
+    frames = list_frames(args.frames, args.max_frames)
+    if not frames:
+        parser.error(f"No images found in {args.frames}")
+
+    url = f"http://127.0.0.1:{args.port}"
+    token = os.getenv("RELOAD_TOKEN") or "benchmark"
+    headers = {"X-Reload-Token": token}
+    env = {**os.environ, "WORKERS": str(args.workers), "PORT": str(args.port), "RELOAD_TOKEN": token}
+    here = os.path.dirname(os.path.abspath(__file__))
+    concurrency = args.concurrency or 2 * args.workers
+
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "serve.py"], cwd=here, env=env)
+    try:
+        wait_ready(url, proc, timeout=300)
+        ready_s = time.perf_counter() - started
+
+        t0 = time.perf_counter()
+        requests.post(
+            f"{url}/detect/frame",
+            files={"file": ("frame.jpg", Path(frames[0]).read_bytes(), "image/jpeg")},
+            timeout=60,
+        ).raise_for_status()
+        first_ms = (time.perf_counter() - t0) * 1000
+        before = requests.get(f"{url}/ready", timeout=10).json()
+
+        # Reload a third of the way into the load run.
+        def trigger():
+            time.sleep(args.duration / 3)
+            body = {"model_path": args.model_path} if args.model_path else None
+            requests.post(f"{url}/admin/reload", json=body, headers=headers, timeout=10).raise_for_status()
+
+        threading.Thread(target=trigger, daemon=True).start()
+        result = drive(url, frames, concurrency, args.duration)
+
+        status = requests.get(f"{url}/admin/reload", headers=headers, timeout=10).json()
+        while status.get("state") == "loading":
+            time.sleep(1)
+            status = requests.get(f"{url}/admin/reload", headers=headers, timeout=10).json()
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+    report = {
+        "host": host_fingerprint(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "workers": args.workers,
+        "concurrency": concurrency,
+        "cold_start": {
+            "ready_s": round(ready_s, 2),
+            "first_request_ms": round(first_ms, 1),
+            "model": before,
+        },
+        "during_reload": result,
+        "reload": status,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+
+
+def load_labels(image_path, labels_dir, width, height):
+    """Ground-truth boxes as (class_id, [x1, y1, x2, y2] in REFERENCE_SIZE, area in source px)."""
+    from settings import REFERENCE_SIZE
+
+    path = Path(labels_dir) / (Path(image_path).stem + ".txt")
+    boxes = []
+    if not path.exists():
+        return boxes
+    for line in path.read_text().splitlines():
+        parts = line.split()
+        if len(parts) < 5:
+            continue
+        cls, cx, cy, bw, bh = int(parts[0]), *(float(v) for v in parts[1:5])
+        boxes.append((
+            cls,
+            [(cx - bw / 2) * REFERENCE_SIZE, (cy - bh / 2) * REFERENCE_SIZE,
+             (cx + bw / 2) * REFERENCE_SIZE, (cy + bh / 2) * REFERENCE_SIZE],
+            bw * width * bh * height,
+        ))
+    return boxes
+
+
+def box_iou(a, b):
+    ix = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def match(detections, truths, threshold=0.5):
+    """Greedy same-class matching by confidence; returns the matched truth indexes."""
+    matched = set()
+    for det in sorted(detections, key=lambda d: -d["confidence"]):
+        best, best_iou = None, threshold
+        for j, (cls, box, _) in enumerate(truths):
+            if j in matched or cls != det["class_id"]:
+                continue
+            iou = box_iou(det["bbox"], box)
+            if iou >= best_iou:
+                best, best_iou = j, iou
+        if best is not None:
+            matched.add(best)
+    return matched
+
+
+def tiling(argv):
+    parser = argparse.ArgumentParser(prog="benchmark.py tiling")
+    parser.add_argument("--images", required=True, help="directory of labelled images")
+    parser.add_argument("--labels", default="", help="YOLO label directory (default: ../labels)")
+    parser.add_argument("--single-sizes", type=int_list, default=[1280], help="input sizes for single passes")
+    parser.add_argument("--small-area", type=float, default=32 * 32, help="objects below this many source px count as small")
+    parser.add_argument("--max-frames", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--output", default="")
+    args = parser.parse_args(argv)
+
+    import cv2
+    import numpy as np
+
+    import app as service
+    from inference_profile import InferenceProfile
+    from tiling import TILE_OVERLAP, TILE_SIZE
+
+    frames = list_frames(args.images, args.max_frames)
+    if not frames:
+        parser.error(f"No images found in {args.images}")
+    labels_dir = args.labels or str(Path(args.images).parent / "labels")
+
+    samples = []
+    for path in frames:
+        data = Path(path).read_bytes()
+        h, w = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR).shape[:2]
+        samples.append((data, load_labels(path, labels_dir, w, h)))
+
+    service.manager.load_now()
+    state = service.manager.active
+
+    modes = {f"single_{state.settings.input_size}": InferenceProfile(tile=False)}
+    for size in args.single_sizes:
+        modes[f"single_{size}"] = InferenceProfile(input_size=size, tile=False)
+    modes[f"tiled_{TILE_SIZE}"] = InferenceProfile(tile=True)
+
+    runs = []
+    for name, profile in modes.items():
+        for data, _ in samples[:args.warmup]:
+            service.run_inference([data], profile)
+
+        latencies, found, total, small_found, small_total, detections = [], 0, 0, 0, 0, 0
+        for data, truths in samples:
+            t0 = time.perf_counter()
+            result = service.run_inference([data], profile)[0]
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+            matched = match(result["detections"], truths)
+            small = {j for j, (_, _, area) in enumerate(truths) if area < args.small_area}
+            found += len(matched)
+            total += len(truths)
+            small_found += len(matched & small)
+            small_total += len(small)
+            detections += result["count"]
+
+        run = {
+            "mode": name,
+            "input_size": service.input_size_for(profile, state.settings),
+            "latency_ms": {"p50": round(percentile(latencies, 50), 1), "p95": round(percentile(latencies, 95), 1)},
+            "recall": round(found / total, 4) if total else None,
+            "recall_small": round(small_found / small_total, 4) if small_total else None,
+            "precision": round(found / detections, 4) if detections else None,
+            "objects": total,
+            "detections": detections,
+        }
+        runs.append(run)
+        print(json.dumps(run), file=sys.stderr)
+
+    report = {
+        "host": host_fingerprint(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "frames": len(samples),
+        "tiling": {"tile_size": TILE_SIZE, "overlap": TILE_OVERLAP},
+        "model": state.describe(),
+        "settings": asdict(state.settings),
+        "runs": runs,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+
+
+def cascade(argv):
+    parser = argparse.ArgumentParser(prog="benchmark.py cascade")
+    parser.add_argument("--images", required=True, help="directory of labelled images, clean frames have no boxes")
+    parser.add_argument("--labels", default="", help="YOLO label directory (default: ../labels)")
+    parser.add_argument("--max-frames", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--output", default="")
+    args = parser.parse_args(argv)
+
+    import app as service
+
+    service.manager.load_now()
+    state = service.manager.active
+    if state.gate is None:
+        parser.error("No cascade gate loaded, set CASCADE_MODE (see README)")
+
+    frames = list_frames(args.images, args.max_frames)
+    if not frames:
+        parser.error(f"No images found in {args.images}")
+    labels_dir = args.labels or str(Path(args.images).parent / "labels")
+    samples = [
+        (Path(path).read_bytes(), bool(load_labels(path, labels_dir, 1, 1)))
+        for path in frames
+    ]
+
+    gate = state.gate
+    runs = []
+    for name, active in (("detector_only", None), ("cascade", gate)):
+        state.gate = active
+        for data, _ in samples[:args.warmup]:
+            service.run_inference([data])
+
+        latencies, cpu, stages = [], 0.0, {"gate": 0, "detector": 0}
+        dirty_hits, dirty_total, clean_alarms, clean_total, gate_misses = 0, 0, 0, 0, 0
+        for data, dirty in samples:
+            t0, c0 = time.perf_counter(), time.process_time()
+            result = service.run_inference([data])[0]
+            latencies.append((time.perf_counter() - t0) * 1000)
+            cpu += time.process_time() - c0
+
+            stages[result["stage"]] += 1
+            if dirty:
+                dirty_total += 1
+                dirty_hits += result["count"] > 0
+                gate_misses += result["stage"] == "gate"
+            else:
+                clean_total += 1
+                clean_alarms += result["count"] > 0
+
+        run = {
+            "mode": name,
+            "cpu_ms_per_frame": round(cpu * 1000 / len(samples), 1),
+            "latency_ms": {"p50": round(percentile(latencies, 50), 1), "p95": round(percentile(latencies, 95), 1)},
+            "stages": stages,
+            "dirty_frame_recall": round(dirty_hits / dirty_total, 4) if dirty_total else None,
+            "dirty_frames_gated_clean": gate_misses,
+            "clean_frame_alarm_rate": round(clean_alarms / clean_total, 4) if clean_total else None,
+        }
+        runs.append(run)
+        print(json.dumps(run), file=sys.stderr)
+    state.gate = gate
+
+    report = {
+        "host": host_fingerprint(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "frames": len(samples),
+        "dirty_frames": sum(1 for _, dirty in samples if dirty),
+        "cascade": gate.describe(),
+        "model": state.describe(),
+        "settings": asdict(state.settings),
+        "runs": runs,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "trial":
+        run_trial(json.loads(sys.argv[2]))
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "scaling":
+        scaling(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "tiling":
+        tiling(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "cascade":
+        cascade(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "reload":
+        reload(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", required=True, help="directory of sample frames")
+    parser.add_argument("--input-sizes", type=int_list, default=[640])
+    parser.add_argument("--batch-sizes", type=int_list, default=[1, 4, 8])
+    parser.add_argument("--threads", type=int_list, default=[0], help="torch intra-op threads, 0 = torch default")
+    parser.add_argument("--interop", type=int_list, default=[0], help="torch inter-op threads, 0 = torch default")
+    parser.add_argument("--workers", type=int_list, default=[1])
+    parser.add_argument("--backends", default="pytorch", help="comma separated: pytorch, onnx, openvino")
+    parser.add_argument("--iterations", type=int, default=30, help="timed batches per worker")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--max-frames", type=int, default=64)
+    parser.add_argument("--max-p95-ms", type=float, default=0, help="reject configs with slower batches")
+    parser.add_argument("--max-rss-mb", type=float, default=0, help="reject configs using more memory in total")
+    parser.add_argument("--output", default=TUNED_CONFIG_PATH)
+    parser.add_argument("--results", default="", help="also write every trial to this JSON file")
+    parser.add_argument("--dry-run", action="store_true", help="measure only, do not write --output")
+    args = parser.parse_args()
+
+    frames = list_frames(args.frames, args.max_frames)
+    if not frames:
+        parser.error(f"No images found in {args.frames}")
+
+    base = load_settings(path="")
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    results = []
+
+    for backend, size in itertools.product(backends, args.input_sizes):
+        # Export once up front so parallel workers do not race on it.
+        export_model(InferenceSettings(**{**asdict(base), "backend": backend, "input_size": size}))
+
+    combos = list(itertools.product(
+        backends, args.input_sizes, args.batch_sizes, args.threads, args.interop, args.workers,
+    ))
+    for n, (backend, size, batch, threads, interop, workers) in enumerate(combos, 1):
+        settings = InferenceSettings(**{
+            **asdict(base),
+            "backend": backend,
+            "input_size": size,
+            "max_batch": batch,
+            "torch_threads": threads,
+            "interop_threads": interop,
+            "workers": workers,
+        })
+        result = measure(settings, frames, args.iterations, args.warmup)
+        results.append(result)
+        print(f"[{n}/{len(combos)}] {json.dumps(result)}", file=sys.stderr)
+
+    best = pick_best(results, args.max_p95_ms, args.max_rss_mb)
+    report = {
+        "host": host_fingerprint(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "frames": len(frames),
+        "settings": best["settings"] if best else None,
+        "measured": {k: v for k, v in best.items() if k != "settings"} if best else None,
+    }
+
+    if args.results:
+        Path(args.results).write_text(json.dumps({**report, "trials": results}, indent=2))
+
+    if best is None:
+        print(json.dumps({**report, "error": "no configuration met the limits"}, indent=2))
+        sys.exit(1)
+
+    if not args.dry_run:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import os
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger("flooreye-ml")
+
+# "" = off, "classifier" = small clean/dirty classification model,
+# "lowres" = the detector itself at CASCADE_INPUT_SIZE.
+CASCADE_MODE = os.getenv("CASCADE_MODE", "").lower()
+CASCADE_MODEL_PATH = os.getenv("CASCADE_MODEL_PATH", "models/gate-cls.pt")
+CASCADE_INPUT_SIZE = int(os.getenv("CASCADE_INPUT_SIZE", "224"))
+# A frame is answered "clean" by the gate only at or above this score.
+CASCADE_CLEAN_THRESHOLD = float(os.getenv("CASCADE_CLEAN_THRESHOLD", "0.9"))
+CASCADE_CLEAN_CLASS = os.getenv("CASCADE_CLEAN_CLASS", "clean")
+
+
+class CascadeGate:
+    """Cheap first stage answering "clean" for confidently clean frames.
+
+    ``clean_scores`` returns, per image, how sure the gate is that the
+    frame is clean: the classifier's probability for CASCADE_CLEAN_CLASS,
+    or for "lowres" one minus the best detection confidence of a
+    low-resolution detector pass. Frames below the threshold go on to
+    the full detector.
+    """
+
+    def __init__(self, mode: str, detector, input_size: int, threshold: float):
+        self.mode = mode
+        self.input_size = input_size
+        self.threshold = threshold
+
+        if mode == "classifier":
+            from ultralytics import YOLO
+
+            self.model = YOLO(CASCADE_MODEL_PATH, task="classify")
+            names = {v: k for k, v in self.model.names.items()}
+            if CASCADE_CLEAN_CLASS not in names:
+                raise ValueError(
+                    f"{CASCADE_MODEL_PATH} has no class {CASCADE_CLEAN_CLASS!r} (classes: {sorted(names)})"
+                )
+            self.clean_index = names[CASCADE_CLEAN_CLASS]
+        elif mode == "lowres":
+            self.model = detector
+        else:
+            raise ValueError(f"Unsupported CASCADE_MODE: {mode}")
+
+    def clean_scores(self, images: List) -> List[float]:
+        if self.mode == "classifier":
+            outputs = self.model(images, imgsz=self.input_size, verbose=False)
+            return [float(o.probs.data[self.clean_index]) for o in outputs]
+
+        outputs = self.model(images, conf=1.0 - self.threshold, imgsz=self.input_size, verbose=False)
+        return [
+            1.0 - (float(o.boxes.conf.max()) if o.boxes is not None and len(o.boxes) else 0.0)
+            for o in outputs
+        ]
+
+    def describe(self) -> dict:
+        return {"mode": self.mode, "input_size": self.input_size, "clean_threshold": self.threshold}
+
+
+def load_gate(detector, settings) -> Optional[CascadeGate]:
+    if not CASCADE_MODE:
+        return None
+
+    if CASCADE_MODE == "lowres" and settings.backend != "pytorch":
+        # Exported detectors only accept their export input size.
+        logger.error("CASCADE_MODE=lowres needs MODEL_BACKEND=pytorch, cascade disabled")
+        return None
+
+    try:
+        gate = CascadeGate(CASCADE_MODE, detector, CASCADE_INPUT_SIZE, CASCADE_CLEAN_THRESHOLD)
+    except Exception as e:
+        logger.error(f"Cascade gate not loaded, every frame uses the full detector: {e}")
+        return None
+
+    logger.info(f"Cascade gate loaded: {gate.describe()}")
+    return gate
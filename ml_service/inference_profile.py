@@ -0,0 +1,157 @@
+import json
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Letterbox grey used by ultralytics; masked pixels look like padding.
+MASK_VALUE = 114
+
+
+class ProfileError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class InferenceProfile:
+    """Per-request inference options, usually one camera's stored profile.
+
+    ``roi`` is a polygon of normalised (x, y) points and ``crop`` a
+    normalised [x1, y1, x2, y2] rectangle. Only the bounding box of the
+    region is sent to the model and pixels outside a polygon are masked.
+    ``tile`` forces tiled inference on or off instead of deciding by frame
+    size. Fields left as None fall back to the service settings.
+    """
+
+    roi: Optional[Tuple[Tuple[float, float], ...]] = None
+    crop: Optional[Tuple[float, float, float, float]] = None
+    input_size: Optional[int] = None
+    conf: Optional[float] = None
+    iou: Optional[float] = None
+    max_det: Optional[int] = None
+    classes: Optional[Tuple[int, ...]] = None
+    tile: Optional[bool] = None
+
+    def region(self, width: int, height: int) -> Optional[Tuple[int, int, int, int]]:
+        """Pixel bounding box (x1, y1, x2, y2) of the ROI/crop, or None for the full frame."""
+        if self.roi:
+            xs = [x for x, _ in self.roi]
+            ys = [y for _, y in self.roi]
+            box = (min(xs), min(ys), max(xs), max(ys))
+        elif self.crop:
+            box = self.crop
+        else:
+            return None
+
+        x1, y1 = int(box[0] * width), int(box[1] * height)
+        x2, y2 = int(np.ceil(box[2] * width)), int(np.ceil(box[3] * height))
+        return x1, y1, max(x2, x1 + 1), max(y2, y1 + 1)
+
+    def apply(self, img: np.ndarray) -> Tuple[np.ndarray, Tuple[int, int]]:
+        """Crop (and mask) ``img`` to the region; returns the image and its offset."""
+        h, w = img.shape[:2]
+        region = self.region(w, h)
+        if region is None:
+            return img, (0, 0)
+
+        x1, y1, x2, y2 = region
+        cropped = img[y1:y2, x1:x2]
+        if self.roi:
+            points = np.array(
+                [[x * w - x1, y * h - y1] for x, y in self.roi], dtype=np.int32
+            )
+            mask = np.zeros(cropped.shape[:2], dtype=np.uint8)
+            cv2.fillPoly(mask, [points], 255)
+            cropped = cropped.copy()
+            cropped[mask == 0] = MASK_VALUE
+        return cropped, (x1, y1)
+
+
+def _fraction(value, name: str) -> float:
+    value = float(value)
+    if not 0.0 <= value <= 1.0:
+        raise ProfileError(f"{name} must be between 0 and 1")
+    return value
+
+
+def parse_profile(raw: Optional[str]) -> Optional[InferenceProfile]:
+    if not raw:
+        return None
+
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        raise ProfileError(f"profile is not valid JSON: {e}")
+    if not isinstance(data, dict):
+        raise ProfileError("profile must be a JSON object")
+
+    unknown = set(data) - {"roi", "crop", "input_size", "conf", "iou", "max_det", "classes", "tile"}
+    if unknown:
+        raise ProfileError(f"unknown profile fields: {', '.join(sorted(unknown))}")
+
+    try:
+        roi = None
+        if data.get("roi"):
+            roi = tuple(
+                (_fraction(x, "roi x"), _fraction(y, "roi y")) for x, y in data["roi"]
+            )
+            if len(roi) < 3:
+                raise ProfileError("roi needs at least 3 points")
+
+        crop = None
+        if data.get("crop"):
+            x1, y1, x2, y2 = (_fraction(v, "crop") for v in data["crop"])
+            if x2 <= x1 or y2 <= y1:
+                raise ProfileError("crop must be [x1, y1, x2, y2] with x2 > x1 and y2 > y1")
+            crop = (x1, y1, x2, y2)
+
+        input_size = data.get("input_size")
+        if input_size is not None:
+            input_size = int(input_size)
+            if input_size % 32 or not 160 <= input_size <= 2048:
+                raise ProfileError("input_size must be a multiple of 32 between 160 and 2048")
+
+        max_det = data.get("max_det")
+        if max_det is not None:
+            max_det = int(max_det)
+            if not 1 <= max_det <= 1000:
+                raise ProfileError("max_det must be between 1 and 1000")
+
+        classes = data.get("classes")
+        if classes is not None:
+            classes = tuple(int(c) for c in classes)
+
+        tile = data.get("tile")
+        if tile is not None and not isinstance(tile, bool):
+            raise ProfileError("tile must be true, false or null")
+
+        return InferenceProfile(
+            roi=roi,
+            crop=crop,
+            input_size=input_size,
+            conf=_fraction(data["conf"], "conf") if data.get("conf") is not None else None,
+            iou=_fraction(data["iou"], "iou") if data.get("iou") is not None else None,
+            max_det=max_det,
+            classes=classes,
+            tile=tile,
+        )
+    except ProfileError:
+        raise
+    except (TypeError, ValueError) as e:
+        raise ProfileError(f"invalid profile: {e}")
+
+
+def model_kwargs(profile: Optional[InferenceProfile]) -> dict:
+    """Extra YOLO predict arguments set by the profile."""
+    if profile is None:
+        return {}
+
+    kwargs = {}
+    if profile.iou is not None:
+        kwargs["iou"] = profile.iou
+    if profile.max_det is not None:
+        kwargs["max_det"] = profile.max_det
+    if profile.classes is not None:
+        kwargs["classes"] = list(profile.classes)
+    return kwargs
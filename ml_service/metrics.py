@@ -0,0 +1,114 @@
+import time
+import threading
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Histogram
+
+REQUEST_DURATION = Histogram(
+    "flooreye_ml_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0),
+)
+
+STAGE_DURATION = Histogram(
+    "flooreye_ml_stage_duration_seconds",
+    "Time spent per inference pipeline stage",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+BATCH_SIZE = Histogram(
+    "flooreye_ml_batch_size",
+    "Number of images per model call",
+    buckets=(1, 2, 4, 8, 16, 32),
+)
+
+CASCADE_DECISIONS = Counter(
+    "flooreye_ml_cascade_decisions_total",
+    "Frames by the cascade stage that decided the result",
+    ["stage"],
+)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            REQUEST_DURATION.labels(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                str(status_holder[0]),
+            ).observe(time.perf_counter() - start)
+
+
+_capture = threading.local()
+
+
+@contextmanager
+def capture_observations():
+    """Collect stage/batch observations instead of recording them.
+
+    Used in inference worker processes, whose registry is never scraped;
+    the list is sent back and replayed in the serving process.
+    """
+    _capture.items = []
+    try:
+        yield _capture.items
+    finally:
+        _capture.items = None
+
+
+def replay_observations(items):
+    for kind, label, value in items:
+        if kind == "stage":
+            STAGE_DURATION.labels(label).observe(value)
+        elif kind == "decision":
+            CASCADE_DECISIONS.labels(label).inc(value)
+        else:
+            BATCH_SIZE.observe(value)
+
+
+def _record(kind: str, label: str, value: float):
+    items = getattr(_capture, "items", None)
+    if items is not None:
+        items.append((kind, label, value))
+    else:
+        replay_observations([(kind, label, value)])
+
+
+def observe_batch(size: int):
+    _record("batch", "", size)
+
+
+def count_decisions(stage_name: str, frames: int):
+    if frames:
+        _record("decision", stage_name, frames)
+
+
+@contextmanager
+def stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record("stage", name, time.perf_counter() - start)
@@ -0,0 +1,197 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from dataclasses import asdict, dataclass, replace
+from typing import Optional
+
+import numpy as np
+
+from cascade import load_gate
+from settings import InferenceSettings, export_model, file_sha256
+
+logger = logging.getLogger("flooreye-ml")
+
+WARMUP_RUNS = int(os.getenv("WARMUP_RUNS", "3"))
+# Seconds between checks of MODEL_PATH for a new file; 0 = no watching.
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+# Shared secret for POST /admin/reload; the endpoint is off while empty.
+RELOAD_TOKEN = os.getenv("RELOAD_TOKEN", "")
+
+
+@dataclass
+class ModelState:
+    settings: InferenceSettings
+    model: object
+    gate: object
+    version: str
+    loaded_at: float
+    load_seconds: float
+    cold_ms: float = 0.0
+    warm_ms: float = 0.0
+
+    def describe(self) -> dict:
+        return {
+            "version": self.version,
+            "model_path": self.settings.model_path,
+            "backend": self.settings.backend,
+            "precision": self.settings.precision,
+            "input_size": self.settings.input_size,
+            "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.loaded_at)),
+            "load_seconds": round(self.load_seconds, 3),
+            "first_inference_ms": round(self.cold_ms, 1),
+            "warm_inference_ms": round(self.warm_ms, 1),
+        }
+
+
+def model_version(settings: InferenceSettings) -> str:
+    stem = os.path.splitext(os.path.basename(settings.model_path))[0]
+    digest = file_sha256(settings.model_path)[:12] if os.path.isfile(settings.model_path) else "unknown"
+    return f"{stem}-{digest}-{settings.backend}-{settings.precision}-{settings.input_size}"
+
+
+def warm_up(state: ModelState, runs: int = WARMUP_RUNS):
+    """Run a synthetic frame through the model so the first real request is not the slow one."""
+    size = state.settings.input_size
+    frame = np.random.default_rng(0).integers(0, 256, (size, size, 3), dtype=np.uint8)
+
+    timings = []
+    for _ in range(max(1, runs)):
+        start = time.perf_counter()
+        state.model([frame], conf=state.settings.conf, imgsz=size, verbose=False)
+        if state.gate is not None:
+            state.gate.clean_scores([frame])
+        timings.append((time.perf_counter() - start) * 1000)
+
+    state.cold_ms = timings[0]
+    state.warm_ms = timings[-1]
+
+
+def load_state(settings: InferenceSettings, warm: bool = True) -> ModelState:
+    from ultralytics import YOLO
+
+    logger.info(f"Loading YOLO model... {settings}")
+    start = time.perf_counter()
+    model = YOLO(export_model(settings), task="detect")
+    if settings.backend == "pytorch":
+        model.to("cpu")
+
+    state = ModelState(
+        settings=settings,
+        model=model,
+        gate=load_gate(model, settings),
+        version=model_version(settings),
+        loaded_at=time.time(),
+        load_seconds=time.perf_counter() - start,
+    )
+    if warm:
+        warm_up(state)
+    logger.info(f"YOLO model loaded: {state.describe()}")
+    return state
+
+
+class ModelManager:
+    """Holds the active ``ModelState`` and swaps in reloaded ones.
+
+    Requests read ``active`` once and use that state throughout, so a swap
+    (a single reference assignment) never mixes two models in one request.
+    With a worker pool each worker holds its own state; a reload is rolled
+    through the workers one at a time while the others keep serving, and
+    the state here only tracks what they run.
+    """
+
+    def __init__(self, settings: InferenceSettings):
+        self.settings = settings
+        self.active: Optional[ModelState] = None
+        self.error: Optional[str] = None
+        self.reload_status = {"state": "idle"}
+        self._reloading = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.active is not None
+
+    @property
+    def reloading(self) -> bool:
+        return self._reloading.locked()
+
+    def load_now(self, warm: bool = True):
+        self.active = load_state(self.settings, warm)
+
+    def load_in_background(self):
+        def run():
+            try:
+                self.load_now()
+            except Exception as e:
+                logger.exception("YOLO load failed")
+                self.error = str(e)
+
+        threading.Thread(target=run, daemon=True, name="model-load").start()
+
+    def swap(self, state: ModelState) -> float:
+        start = time.perf_counter()
+        self.active = state
+        return (time.perf_counter() - start) * 1000
+
+    async def reload(self, settings: InferenceSettings, pool=None, worker_reload=None) -> bool:
+        """Load ``settings`` in the background and swap it in.
+
+        With a pool, ``worker_reload`` (a module-level function, so it can
+        be sent to the workers) runs in each worker in turn. Returns False
+        if a reload is already running.
+        """
+        if not self._reloading.acquire(blocking=False):
+            return False
+
+        started = time.perf_counter()
+        self.reload_status = {"state": "loading", "target": asdict(settings), "started_at": time.time()}
+        try:
+            if pool is None:
+                state = await asyncio.to_thread(load_state, settings)
+                swaps = [{**state.describe(), "swap_ms": round(self.swap(state), 4)}]
+            else:
+                swaps = await pool.rolling_call(worker_reload, asdict(settings))
+                # The models live in the workers; keep only what they run.
+                self.active = replace(
+                    self.active, settings=settings, model=None, gate=None,
+                    version=swaps[0]["version"], loaded_at=time.time(),
+                )
+
+            self.settings = settings
+            self.reload_status = {
+                "state": "done",
+                "version": swaps[0]["version"],
+                "seconds": round(time.perf_counter() - started, 3),
+                "swaps": swaps,
+            }
+            logger.info(f"Model reloaded: {self.reload_status}")
+        except Exception as e:
+            logger.exception("Model reload failed, keeping the current model")
+            self.reload_status = {"state": "failed", "error": str(e), "target": asdict(settings)}
+        finally:
+            self._reloading.release()
+        return True
+
+    async def watch(self, pool=None, worker_reload=None, interval: float = MODEL_WATCH_INTERVAL):
+        """Reload when the file at the current model_path changes."""
+        def signature():
+            try:
+                stat = os.stat(self.settings.model_path)
+                return stat.st_mtime_ns, stat.st_size
+            except OSError:
+                return None
+
+        last = signature()
+        while True:
+            await asyncio.sleep(interval)
+            current = signature()
+            if current is None or current == last:
+                continue
+            # Wait for the copy to finish before loading it.
+            await asyncio.sleep(interval)
+            if signature() != current:
+                continue
+            last = current
+            logger.info(f"{self.settings.model_path} changed, reloading")
+            await self.reload(self.settings, pool, worker_reload)
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Build and validate an INT8 version of the detection model.
+
+1. Collect calibration frames from stored floor_events via the backend:
+       python quantize.py fetch-calibration --backend https://backend.example --count 200 --out calib/
+
+2. Quantise (static post-training quantisation with ONNX Runtime, or dynamic):
+       python quantize.py build --calibration calib/ [--mode dynamic]
+
+3. Check accuracy on a labelled validation set (ultralytics dataset yaml)
+   and record the result next to the INT8 model:
+       python quantize.py evaluate --data floor_val.yaml --frames calib/
+
+The service serves INT8 only with MODEL_PRECISION=int8 and only if the
+recorded mAP@0.5 drop from FP32 is within QUANT_MAX_DROP for this exact
+model file; otherwise it logs why and stays on FP32.
+
+Requires onnx and onnxruntime (pip install onnx onnxruntime).
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from dataclasses import replace
+from pathlib import Path
+
+from settings import (
+    QUANT_MAX_DROP,
+    export_model,
+    file_sha256,
+    gate_path,
+    int8_model_path,
+    load_settings,
+)
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+def list_images(directory, limit=None):
+    images = sorted(
+        str(p) for p in Path(directory).iterdir()
+        if p.suffix.lower() in IMAGE_SUFFIXES
+    )
+    return images[:limit] if limit else images
+
+
+def preprocess(path, size):
+    import cv2
+    import numpy as np
+
+    img = cv2.imread(path, cv2.IMREAD_COLOR)
+    img = cv2.resize(img, (size, size))
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    return np.ascontiguousarray(img.transpose(2, 0, 1)[None], dtype=np.float32) / 255.0
+
+
+def fetch_calibration(args):
+    import requests
+
+    backend = args.backend.rstrip("/")
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    session = requests.Session()
+    saved = 0
+    offset = 0
+
+    while saved < args.count:
+        res = session.get(f"{backend}/history", params={"limit": 50, "offset": offset}, timeout=30)
+        res.raise_for_status()
+        events = res.json()
+        if not events:
+            break
+        offset += len(events)
+
+        for event in events:
+            if args.dirty_only and not event["is_dirty"]:
+                continue
+            img = session.get(f"{backend}/history/{event['id']}/image", timeout=30)
+            if img.status_code != 200:
+                continue
+            (out / f"{event['id']}.jpg").write_bytes(img.content)
+            saved += 1
+            if saved >= args.count:
+                break
+
+    print(json.dumps({"saved": saved, "out": str(out)}))
+
+
+class CalibrationReader:
+    def __init__(self, images, input_name, size):
+        self.images = iter(images)
+        self.input_name = input_name
+        self.size = size
+
+    def get_next(self):
+        path = next(self.images, None)
+        if path is None:
+            return None
+        return {self.input_name: preprocess(path, self.size)}
+
+
+def build(args):
+    import onnx
+    import onnxruntime
+    from onnxruntime.quantization import (
+        CalibrationMethod,
+        QuantFormat,
+        QuantType,
+        quantize_dynamic,
+        quantize_static,
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    settings = replace(load_settings(), precision="fp32")
+    if args.input_size:
+        settings = replace(settings, input_size=args.input_size)
+
+    fp32_path = export_model(replace(settings, backend="onnx"))
+    target = int8_model_path(settings)
+    prepared = f"{fp32_path}.prep.onnx"
+    quant_pre_process(fp32_path, prepared, skip_symbolic_shape=True)
+
+    exclude = []
+    if args.exclude_pattern:
+        pattern = re.compile(args.exclude_pattern)
+        exclude = [n.name for n in onnx.load(prepared).graph.node if pattern.search(n.name)]
+
+    start = time.perf_counter()
+    if args.mode == "dynamic":
+        quantize_dynamic(prepared, target, weight_type=QuantType.QUInt8, nodes_to_exclude=exclude)
+        calibration = None
+    else:
+        images = list_images(args.calibration, args.max_images)
+        if not images:
+            sys.exit(f"No calibration images in {args.calibration}")
+        input_name = onnxruntime.InferenceSession(prepared).get_inputs()[0].name
+        quantize_static(
+            prepared,
+            target,
+            CalibrationReader(images, input_name, settings.input_size),
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            weight_type=QuantType.QInt8,
+            activation_type=QuantType.QUInt8,
+            calibrate_method=CalibrationMethod.MinMax,
+            nodes_to_exclude=exclude,
+        )
+        calibration = {"images": len(images), "source": args.calibration}
+
+    os.remove(prepared)
+    # A previous accuracy check no longer applies to the new file.
+    if os.path.exists(gate_path(target)):
+        os.remove(gate_path(target))
+
+    print(json.dumps({
+        "mode": args.mode,
+        "fp32": fp32_path,
+        "int8": target,
+        "fp32_mb": round(os.path.getsize(fp32_path) / 1e6, 2),
+        "int8_mb": round(os.path.getsize(target) / 1e6, 2),
+        "excluded_nodes": len(exclude),
+        "calibration": calibration,
+        "seconds": round(time.perf_counter() - start, 1),
+    }, indent=2))
+
+
+def accuracy(model_path, data, size):
+    from ultralytics import YOLO
+
+    metrics = YOLO(model_path, task="detect").val(
+        data=data, imgsz=size, batch=1, plots=False, verbose=False,
+    )
+    return {"map50": round(float(metrics.box.map50), 4), "map50_95": round(float(metrics.box.map), 4)}
+
+
+def evaluate(args):
+    from benchmark import measure
+
+    settings = replace(load_settings(), precision="fp32", max_batch=1, workers=1)
+    if args.input_size:
+        settings = replace(settings, input_size=args.input_size)
+
+    int8_path = int8_model_path(settings)
+    if not os.path.exists(int8_path):
+        sys.exit(f"{int8_path} not found, run quantize.py build first")
+
+    frames = list_images(args.frames, 32)
+    if not frames:
+        sys.exit(f"No images in {args.frames}")
+
+    variants = {
+        "fp32": replace(settings, backend="pytorch"),
+        "fp32_onnx": replace(settings, backend="onnx"),
+        "int8": replace(settings, backend="onnx", precision="int8"),
+    }
+    report = {}
+    for name, variant in variants.items():
+        perf = measure(variant, frames, args.iterations, warmup=3)
+        report[name] = {
+            **accuracy(export_model(variant), args.data, settings.input_size),
+            "per_image_ms": perf.get("per_image_ms"),
+            "throughput_ips": perf.get("throughput_ips"),
+            "rss_mb": perf.get("rss_mb_per_worker"),
+            "model_mb": round(os.path.getsize(export_model(variant)) / 1e6, 2),
+        }
+
+    drop = round(report["fp32"]["map50"] - report["int8"]["map50"], 4)
+    gate = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "data": args.data,
+        "input_size": settings.input_size,
+        "model_sha256": file_sha256(int8_path),
+        "drop": drop,
+        "max_drop": args.max_drop,
+        "passed": drop <= args.max_drop,
+        "results": report,
+    }
+
+    with open(gate_path(int8_path), "w", encoding="utf-8") as f:
+        json.dump(gate, f, indent=2)
+    print(json.dumps(gate, indent=2))
+    if not gate["passed"]:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    fetch = sub.add_parser("fetch-calibration", help="download stored event images from the backend")
+    fetch.add_argument("--backend", required=True)
+    fetch.add_argument("--count", type=int, default=200)
+    fetch.add_argument("--out", default="calibration")
+    fetch.add_argument("--dirty-only", action="store_true")
+
+    b = sub.add_parser("build", help="produce the INT8 ONNX model")
+    b.add_argument("--calibration", default="calibration")
+    b.add_argument("--mode", choices=("static", "dynamic"), default="static")
+    b.add_argument("--max-images", type=int, default=300)
+    b.add_argument("--input-size", type=int, default=0, help="default: current INPUT_SIZE / tuned config")
+    b.add_argument(
+        "--exclude-pattern", default="",
+        help="regex of node names kept in FP32, e.g. '/model.22/' for the YOLOv8 detect head",
+    )
+
+    e = sub.add_parser("evaluate", help="compare FP32 and INT8 accuracy, latency and memory")
+    e.add_argument("--data", required=True, help="ultralytics dataset yaml with a labelled val split")
+    e.add_argument("--frames", default="calibration", help="images used for the latency/memory runs")
+    e.add_argument("--iterations", type=int, default=50)
+    e.add_argument("--max-drop", type=float, default=QUANT_MAX_DROP)
+    e.add_argument("--input-size", type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == "fetch-calibration":
+        fetch_calibration(args)
+    elif args.command == "build":
+        build(args)
+    else:
+        evaluate(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Start the ML service, optionally with a pool of forked inference workers.
+
+    WORKERS=4 WORKER_CPUS=auto python serve.py
+
+The model is loaded and warmed up before the server starts listening. With
+WORKERS > 1 the inference workers are forked from it afterwards and share
+the weights copy-on-write, then each worker is warmed up in turn; this
+process keeps serving HTTP and hands each request to the least busy worker.
+With WORKERS=1 it behaves like ``uvicorn app:app``.
+"""
+
+import os
+
+import uvicorn
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "7860"))
+WORKER_CPUS = os.getenv("WORKER_CPUS", "")
+
+
+def main():
+    import app as service
+
+    settings = service.settings
+    if settings.workers > 1:
+        import asyncio
+
+        import torch
+        from workers import InferencePool
+
+        # Keep the parent single-threaded and warm up in the workers, not
+        # here: forking after an OpenMP parallel region can hang children.
+        # Fuse layers now, since fusing in each child would give every
+        # worker a private copy of the weights.
+        torch.set_num_threads(1)
+        service.manager.load_now(warm=False)
+        if settings.backend == "pytorch":
+            service.manager.active.model.fuse()
+
+        service.pool = InferencePool(
+            service.run_inference,
+            settings.workers,
+            cpus=WORKER_CPUS,
+            threads=settings.torch_threads,
+        )
+        warmed = asyncio.run(service.pool.rolling_call(service.warm_worker))
+        service.manager.active.cold_ms = max(w["first_inference_ms"] for w in warmed)
+        service.manager.active.warm_ms = max(w["warm_inference_ms"] for w in warmed)
+    else:
+        service.manager.load_now()
+
+    try:
+        uvicorn.run(service.app, host=HOST, port=PORT)
+    finally:
+        if service.pool is not None:
+            service.pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
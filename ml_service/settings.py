@@ -0,0 +1,184 @@
+import os
+import json
+import hashlib
+import logging
+import platform
+from dataclasses import asdict, dataclass, fields, replace
+from typing import Optional
+
+logger = logging.getLogger("flooreye-ml")
+
+TUNED_CONFIG_PATH = os.getenv("TUNED_CONFIG_PATH", "tuned_config.json")
+# Largest mAP@0.5 drop from FP32 accepted before an INT8 model may be served.
+QUANT_MAX_DROP = float(os.getenv("QUANT_MAX_DROP", "0.02"))
+
+# Boxes are always reported in this coordinate space, whatever input size the
+# model actually runs at, so clients do not depend on tuning.
+REFERENCE_SIZE = 640
+
+
+@dataclass
+class InferenceSettings:
+    model_path: str = "models/best.pt"
+    backend: str = "pytorch"
+    precision: str = "fp32"
+    input_size: int = 640
+    conf: float = 0.25
+    max_batch: int = 8
+    torch_threads: int = 0
+    interop_threads: int = 0
+    workers: int = 1
+
+
+# Environment variable for each field; an explicit env value always wins
+# over the tuned file.
+ENV_NAMES = {
+    "model_path": "MODEL_PATH",
+    "backend": "MODEL_BACKEND",
+    "precision": "MODEL_PRECISION",
+    "input_size": "INPUT_SIZE",
+    "conf": "CONF_THRESHOLD",
+    "max_batch": "MAX_BATCH",
+    "torch_threads": "TORCH_THREADS",
+    "interop_threads": "TORCH_INTEROP_THREADS",
+    "workers": "WORKERS",
+}
+
+
+def host_fingerprint() -> dict:
+    cpu = platform.processor()
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    cpu = line.split(":", 1)[1].strip()
+                    break
+    except OSError:
+        pass
+
+    return {
+        "cpu": cpu,
+        "cpus": len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count(),
+        "machine": platform.machine(),
+    }
+
+
+def read_tuned(path: str = TUNED_CONFIG_PATH) -> Optional[dict]:
+    if not path:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable tuned config {path}: {e}")
+        return None
+
+
+def load_settings(path: str = TUNED_CONFIG_PATH) -> InferenceSettings:
+    values = asdict(InferenceSettings())
+
+    tuned = read_tuned(path)
+    if tuned:
+        values.update({k: v for k, v in tuned.get("settings", {}).items() if k in values})
+        if tuned.get("host") != host_fingerprint():
+            logger.warning(
+                f"Tuned config {path} was produced on {tuned.get('host')}, "
+                f"this host is {host_fingerprint()}; consider re-running benchmark.py"
+            )
+        else:
+            logger.info(f"Using tuned config {path}")
+
+    for field in fields(InferenceSettings):
+        raw = os.getenv(ENV_NAMES[field.name])
+        if raw not in (None, ""):
+            values[field.name] = field.type(raw)
+
+    return InferenceSettings(**values)
+
+
+def apply_threading(settings: InferenceSettings):
+    import torch
+
+    if settings.torch_threads > 0:
+        torch.set_num_threads(settings.torch_threads)
+    if settings.interop_threads > 0:
+        try:
+            torch.set_num_interop_threads(settings.interop_threads)
+        except RuntimeError:
+            logger.warning("Inter-op threads can only be set before torch starts parallel work")
+
+
+def int8_model_path(settings: InferenceSettings) -> str:
+    stem, _ = os.path.splitext(settings.model_path)
+    return f"{stem}_{settings.input_size}_int8.onnx"
+
+
+def gate_path(model_path: str) -> str:
+    return f"{model_path}.gate.json"
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def check_int8_gate(settings: InferenceSettings, max_drop: float = QUANT_MAX_DROP) -> Optional[str]:
+    """Return why the INT8 model may not be served, or None if it may."""
+    path = int8_model_path(settings)
+    if not os.path.exists(path):
+        return f"{path} not found, run quantize.py build"
+
+    try:
+        with open(gate_path(path), "r", encoding="utf-8") as f:
+            gate = json.load(f)
+    except FileNotFoundError:
+        return f"no accuracy check for {path}, run quantize.py evaluate"
+    except Exception as e:
+        return f"unreadable accuracy check for {path}: {e}"
+
+    if gate.get("model_sha256") != file_sha256(path):
+        return f"accuracy check is for a different build of {path}"
+    if gate.get("drop") is None or gate["drop"] > max_drop:
+        return f"mAP@0.5 drop {gate.get('drop')} exceeds the allowed {max_drop}"
+    return None
+
+
+def resolve_precision(settings: InferenceSettings) -> InferenceSettings:
+    if settings.precision == "fp32":
+        return settings
+    if settings.precision != "int8":
+        raise ValueError(f"Unsupported precision: {settings.precision}")
+
+    reason = check_int8_gate(settings)
+    if reason:
+        logger.error(f"Refusing INT8 model, serving FP32 instead: {reason}")
+        return replace(settings, precision="fp32")
+    return replace(settings, backend="onnx")
+
+
+def export_model(settings: InferenceSettings) -> str:
+    """Return a model path for ``settings.backend``, exporting it on first use."""
+    if settings.precision == "int8":
+        return int8_model_path(settings)
+    if settings.backend == "pytorch":
+        return settings.model_path
+
+    suffix = {"onnx": ".onnx", "openvino": "_openvino_model"}.get(settings.backend)
+    if suffix is None:
+        raise ValueError(f"Unsupported backend: {settings.backend}")
+
+    stem, _ = os.path.splitext(settings.model_path)
+    target = f"{stem}_{settings.input_size}{suffix}"
+    # Re-export when the source weights were replaced (e.g. by a hot reload).
+    if not os.path.exists(target) or os.path.getmtime(target) < os.path.getmtime(settings.model_path):
+        from ultralytics import YOLO
+
+        logger.info(f"Exporting {settings.model_path} to {settings.backend} ({settings.input_size}px)")
+        exported = YOLO(settings.model_path).export(format=settings.backend, imgsz=settings.input_size)
+        os.replace(exported, target)
+    return target
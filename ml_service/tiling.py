@@ -0,0 +1,69 @@
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+# Source pixels per tile side; each tile is then resized to the model input.
+TILE_SIZE = int(os.getenv("TILE_SIZE", "640"))
+# Fraction of a tile shared with its neighbour, so objects on a seam are
+# seen whole by at least one tile.
+TILE_OVERLAP = float(os.getenv("TILE_OVERLAP", "0.2"))
+# Frames whose longer side is at least this many pixels are tiled; 0 = never.
+TILE_MIN_SIDE = int(os.getenv("TILE_MIN_SIDE", "0"))
+TILE_MERGE_IOU = float(os.getenv("TILE_MERGE_IOU", "0.5"))
+
+
+def should_tile(height: int, width: int, min_side: int = TILE_MIN_SIDE) -> bool:
+    return min_side > 0 and max(height, width) >= min_side
+
+
+def tile_origins(length: int, tile: int, overlap: float) -> List[int]:
+    """Start offsets covering ``length`` with tiles of ``tile`` pixels."""
+    if length <= tile:
+        return [0]
+
+    step = max(1, int(tile * (1 - overlap)))
+    origins = list(range(0, length - tile, step))
+    origins.append(length - tile)
+    return origins
+
+
+def make_tiles(
+    img: np.ndarray, tile: int = TILE_SIZE, overlap: float = TILE_OVERLAP
+) -> List[Tuple[np.ndarray, Tuple[int, int]]]:
+    """Overlapping tiles of ``img`` with their (x, y) offsets; views, not copies."""
+    h, w = img.shape[:2]
+    return [
+        (img[y:y + tile, x:x + tile], (x, y))
+        for y in tile_origins(h, tile, overlap)
+        for x in tile_origins(w, tile, overlap)
+    ]
+
+
+def merge_detections(detections: List[dict], iou: float = TILE_MERGE_IOU) -> List[dict]:
+    """Per-class NMS over detections collected from overlapping tiles."""
+    if len(detections) < 2:
+        return detections
+
+    boxes = np.array([d["bbox"] for d in detections], dtype=np.float32)
+    scores = np.array([d["confidence"] for d in detections], dtype=np.float32)
+    classes = np.array([d["class_id"] for d in detections])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+
+    keep = []
+    order = np.argsort(-scores)
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+
+        xx1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+        yy1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+        xx2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+        yy2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+        inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+        overlap = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+
+        order = rest[(overlap < iou) | (classes[rest] != classes[i])]
+
+    return [detections[i] for i in keep]
@@ -0,0 +1,200 @@
+import os
+import math
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from settings import REFERENCE_SIZE
+
+# Minimum IoU for a detection to continue a track.
+TRACK_IOU = float(os.getenv("TRACK_IOU", "0.3"))
+# Fallback match when the IoU is too low: centre distance in REFERENCE_SIZE
+# pixels (spills spread and boxes jitter more than they move).
+TRACK_MAX_DISTANCE = float(os.getenv("TRACK_MAX_DISTANCE", str(REFERENCE_SIZE * 0.05)))
+# Frames a track may go unmatched before it is reported as ended.
+TRACK_MAX_MISSES = int(os.getenv("TRACK_MAX_MISSES", "5"))
+TRACK_MAX_TRACKS = int(os.getenv("TRACK_MAX_TRACKS", "100"))
+TRACK_MAX_SESSIONS = int(os.getenv("TRACK_MAX_SESSIONS", "256"))
+# Seconds without a frame before a session and its tracks are dropped.
+TRACK_SESSION_TTL = float(os.getenv("TRACK_SESSION_TTL", "300"))
+
+
+def box_iou(a, b) -> float:
+    ix = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def centre_distance(a, b) -> float:
+    return math.hypot((a[0] + a[2] - b[0] - b[2]) / 2, (a[1] + a[3] - b[1] - b[3]) / 2)
+
+
+@dataclass
+class Track:
+    track_id: int
+    class_id: int
+    bbox: list
+    confidence: float
+    first_seen: float
+    last_seen: float
+    frames: int = 1
+    misses: int = 0
+
+    def summary(self) -> dict:
+        return {
+            "track_id": self.track_id,
+            "class_id": self.class_id,
+            "bbox": self.bbox,
+            "confidence": self.confidence,
+            "frames": self.frames,
+            "duration_s": round(self.last_seen - self.first_seen, 3),
+        }
+
+
+@dataclass
+class Tracker:
+    """Greedy IoU / centre-distance tracker for one stream.
+
+    Detections of the same class are matched to live tracks by IoU, falling
+    back to centre distance. Matched detections are ``ongoing``, unmatched
+    ones start a ``new`` track, and tracks unmatched for more than
+    ``max_misses`` frames are returned as ended.
+    """
+
+    iou: float = TRACK_IOU
+    max_distance: float = TRACK_MAX_DISTANCE
+    max_misses: int = TRACK_MAX_MISSES
+    max_tracks: int = TRACK_MAX_TRACKS
+    tracks: Dict[int, Track] = field(default_factory=dict)
+    next_id: int = 1
+    frames: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def update(self, detections: List[dict], now: Optional[float] = None) -> List[dict]:
+        """Tag ``detections`` in place with track_id / track_state; returns ended tracks."""
+        now = time.time() if now is None else now
+        self.frames += 1
+        self.last_used = time.monotonic()
+
+        candidates: List[Tuple[float, float, int, int]] = []
+        for d, det in enumerate(detections):
+            for track in self.tracks.values():
+                if track.class_id != det["class_id"]:
+                    continue
+                overlap = box_iou(track.bbox, det["bbox"])
+                distance = centre_distance(track.bbox, det["bbox"])
+                if overlap >= self.iou or distance <= self.max_distance:
+                    candidates.append((-overlap, distance, d, track.track_id))
+
+        matched_dets, matched_tracks = set(), set()
+        for _, _, d, track_id in sorted(candidates):
+            if d in matched_dets or track_id in matched_tracks:
+                continue
+            matched_dets.add(d)
+            matched_tracks.add(track_id)
+
+            det, track = detections[d], self.tracks[track_id]
+            track.bbox, track.confidence = det["bbox"], det["confidence"]
+            track.last_seen, track.frames, track.misses = now, track.frames + 1, 0
+            det["track_id"], det["track_state"] = track_id, "ongoing"
+
+        for d, det in enumerate(detections):
+            if d in matched_dets:
+                continue
+            track = Track(self.next_id, det["class_id"], det["bbox"], det["confidence"], now, now)
+            self.tracks[track.track_id] = track
+            self.next_id += 1
+            matched_tracks.add(track.track_id)
+            det["track_id"], det["track_state"] = track.track_id, "new"
+
+        ended = []
+        for track_id in list(self.tracks):
+            track = self.tracks[track_id]
+            if track_id in matched_tracks:
+                continue
+            track.misses += 1
+            if track.misses > self.max_misses:
+                ended.append(self.tracks.pop(track_id).summary())
+
+        # Keep memory bounded on pathological scenes: drop the stalest tracks.
+        if len(self.tracks) > self.max_tracks:
+            stale = sorted(self.tracks.values(), key=lambda t: t.last_seen)
+            for track in stale[:len(self.tracks) - self.max_tracks]:
+                ended.append(self.tracks.pop(track.track_id).summary())
+
+        return ended
+
+
+class TrackerStore:
+    """Trackers per session id, LRU-bounded and expired when idle."""
+
+    def __init__(self, max_sessions: int = TRACK_MAX_SESSIONS, ttl: float = TRACK_SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, Tracker]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.expired = 0
+        self.evicted = 0
+
+    def get(self, session: str) -> Tracker:
+        with self._lock:
+            self._expire()
+            tracker = self._sessions.get(session)
+            if tracker is None:
+                tracker = self._sessions[session] = Tracker()
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._sessions.move_to_end(session)
+            tracker.last_used = time.monotonic()
+            return tracker
+
+    def drop(self, session: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session, None) is not None
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl
+        while self._sessions:
+            session, tracker = next(iter(self._sessions.items()))
+            if tracker.last_used >= cutoff:
+                break
+            del self._sessions[session]
+            self.expired += 1
+
+    def track(self, session: str, results: List[dict]) -> List[dict]:
+        """Run the frames of one request through ``session``'s tracker, in order."""
+        tracker = self.get(session)
+        with tracker.lock:
+            for result in results:
+                if "error" in result:
+                    continue
+                ended = tracker.update(result["detections"])
+                states = [d["track_state"] for d in result["detections"]]
+                result["session"] = session
+                result["tracks"] = {
+                    "new": states.count("new"),
+                    "ongoing": states.count("ongoing"),
+                    "ended": len(ended),
+                    "active": len(tracker.tracks),
+                }
+                result["ended_tracks"] = ended
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._expire()
+            return {
+                "sessions": len(self._sessions),
+                "tracks": sum(len(t.tracks) for t in self._sessions.values()),
+                "max_sessions": self.max_sessions,
+                "ttl": self.ttl,
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
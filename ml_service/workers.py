@@ -0,0 +1,265 @@
+import gc
+import os
+import signal
+import asyncio
+import logging
+import itertools
+import threading
+import multiprocessing as mp
+from typing import Callable, Dict, List, Optional, Set
+
+from metrics import capture_observations, replay_observations
+
+logger = logging.getLogger("flooreye-ml")
+
+
+def parse_cpus(spec: str, workers: int) -> List[Optional[Set[int]]]:
+    """CPU set per worker: "" = no pinning, "auto" = split evenly, or "0-1;2-3"."""
+    if not spec:
+        return [None] * workers
+
+    if spec == "auto":
+        available = sorted(os.sched_getaffinity(0))
+        per = max(1, len(available) // workers)
+        return [set(available[(i * per) % len(available):][:per]) for i in range(workers)]
+
+    groups = []
+    for group in spec.split(";"):
+        cpus = set()
+        for part in group.split(","):
+            lo, _, hi = part.strip().partition("-")
+            cpus.update(range(int(lo), int(hi or lo) + 1))
+        groups.append(cpus)
+    if len(groups) != workers:
+        raise ValueError(f"WORKER_CPUS lists {len(groups)} groups for {workers} workers")
+    return groups
+
+
+def process_memory(pid: int) -> Dict[str, float]:
+    """RSS, PSS and shared memory in MB from /proc (Linux only)."""
+    fields = {"Rss": "rss_mb", "Pss": "pss_mb", "Shared_Clean": "shared_mb", "Shared_Dirty": "shared_mb"}
+    memory = {"rss_mb": 0.0, "pss_mb": 0.0, "shared_mb": 0.0}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in fields:
+                    memory[fields[key]] += int(rest.split()[0]) / 1024
+    except (OSError, ValueError):
+        return {}
+    return {k: round(v, 1) for k, v in memory.items()}
+
+
+def _worker_main(conn, infer: Callable, cpus: Optional[Set[int]], threads: int):
+    # The parent owns shutdown; a Ctrl+C must not kill workers mid-batch.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    if cpus:
+        os.sched_setaffinity(0, cpus)
+
+    import torch
+    torch.set_num_threads(threads)
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+
+        job_id, kind, payload = message
+        try:
+            with capture_observations() as observations:
+                if kind == "infer":
+                    images, options = payload
+                    results = infer(images, **options)
+                else:
+                    func, args = payload
+                    results = func(*args)
+            conn.send((job_id, results, None, observations))
+        except Exception as e:
+            conn.send((job_id, None, f"{type(e).__name__}: {e}", []))
+
+
+class _Worker:
+    __slots__ = ("index", "process", "conn", "cpus", "send_lock", "inflight", "processed", "alive", "draining")
+
+    def __init__(self, index, process, conn, cpus):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.cpus = cpus
+        self.send_lock = threading.Lock()
+        self.inflight = 0
+        self.processed = 0
+        self.alive = True
+        self.draining = False
+
+
+class InferencePool:
+    """Forked inference workers sharing the parent's model weights.
+
+    Create it after the model is loaded and before any threads or event
+    loop exist: the children inherit the weights copy-on-write. gc.freeze()
+    keeps the collector from touching (and so copying) the inherited objects.
+    Each request goes to the worker with the fewest jobs in flight, skipping
+    workers that are busy with a ``rolling_call``.
+    """
+
+    def __init__(self, infer: Callable, workers: int, cpus: str = "", threads: int = 0):
+        ctx = mp.get_context("fork")
+        cpu_sets = parse_cpus(cpus, workers)
+        self._workers: List[_Worker] = []
+        self._pending: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        self._closing = False
+        self._ids = itertools.count()
+        self._rr = itertools.count()
+
+        gc.collect()
+        gc.freeze()
+
+        for i, cpu_set in enumerate(cpu_sets):
+            per_worker = threads or (len(cpu_set) if cpu_set else max(1, (os.cpu_count() or 1) // workers))
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker_main,
+                args=(child_conn, infer, cpu_set, per_worker),
+                name=f"inference-{i}",
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            self._workers.append(_Worker(i, process, parent_conn, cpu_set))
+            logger.info(f"Started inference worker {i} pid={process.pid} cpus={sorted(cpu_set) if cpu_set else 'any'} threads={per_worker}")
+
+        for worker in self._workers:
+            threading.Thread(target=self._read, args=(worker,), daemon=True, name=f"inference-reader-{worker.index}").start()
+
+    async def submit(self, images: List[bytes], **options) -> List[dict]:
+        alive = [w for w in self._workers if w.alive]
+        if not alive:
+            raise RuntimeError("No inference workers available")
+
+        # Least loaded first; ties rotate so idle workers share the load.
+        # A draining worker is only used when no other is left; its jobs
+        # then queue behind the call it is running.
+        offset = next(self._rr)
+        candidates = [w for w in alive if not w.draining] or alive
+        worker = min(candidates, key=lambda w: (w.inflight, (w.index - offset) % len(self._workers)))
+        return await self._run(worker, "infer", (images, options))
+
+    async def rolling_call(self, func: Callable, *args) -> list:
+        """Run ``func(*args)`` in every worker, one worker at a time.
+
+        ``func`` must be importable by name (it is pickled by reference).
+        While a worker runs it, new requests go to the other workers.
+        """
+        results = []
+        for worker in self._workers:
+            if not worker.alive:
+                continue
+            worker.draining = True
+            try:
+                results.append(await self._run(worker, "call", (func, args)))
+            finally:
+                worker.draining = False
+        return results
+
+    async def _run(self, worker: _Worker, kind: str, payload):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        job_id = next(self._ids)
+        with self._lock:
+            self._pending[job_id] = (loop, future, worker)
+            worker.inflight += 1
+
+        try:
+            # A busy worker is not reading its pipe, so large sends can block.
+            await asyncio.to_thread(self._send, worker, (job_id, kind, payload))
+        except Exception:
+            self._finish(job_id)
+            raise
+        return await future
+
+    def stats(self) -> dict:
+        return {
+            "parent": {"pid": os.getpid(), **process_memory(os.getpid())},
+            "workers": [
+                {
+                    "index": w.index,
+                    "pid": w.process.pid,
+                    "alive": w.alive,
+                    "cpus": sorted(w.cpus) if w.cpus else None,
+                    "inflight": w.inflight,
+                    "draining": w.draining,
+                    "processed": w.processed,
+                    **process_memory(w.process.pid),
+                }
+                for w in self._workers
+            ],
+        }
+
+    def shutdown(self):
+        self._closing = True
+        for worker in self._workers:
+            if worker.alive:
+                try:
+                    self._send(worker, None)
+                except OSError:
+                    pass
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.kill()
+
+    def _send(self, worker: _Worker, message):
+        with worker.send_lock:
+            worker.conn.send(message)
+
+    def _finish(self, job_id: int):
+        with self._lock:
+            entry = self._pending.pop(job_id, None)
+            if entry is not None:
+                entry[2].inflight -= 1
+        return entry
+
+    def _read(self, worker: _Worker):
+        while True:
+            try:
+                job_id, results, error, observations = worker.conn.recv()
+            except (EOFError, OSError):
+                break
+
+            entry = self._finish(job_id)
+            worker.processed += 1
+            replay_observations(observations)
+            if entry is None:
+                continue
+
+            loop, future, _ = entry
+            if error is None:
+                loop.call_soon_threadsafe(_resolve, future, results, None)
+            else:
+                loop.call_soon_threadsafe(_resolve, future, None, RuntimeError(error))
+
+        worker.alive = False
+        if not self._closing:
+            logger.error(f"Inference worker {worker.index} (pid {worker.process.pid}) exited")
+        with self._lock:
+            orphaned = [job_id for job_id, entry in self._pending.items() if entry[2] is worker]
+        for job_id in orphaned:
+            entry = self._finish(job_id)
+            if entry is not None:
+                loop, future, _ = entry
+                loop.call_soon_threadsafe(_resolve, future, None, RuntimeError("Inference worker exited"))
+
+
+def _resolve(future: asyncio.Future, result, error: Optional[Exception]):
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)